@@ -0,0 +1,215 @@
+"""
+OpenStax Accounts API client used to enrich /me.
+
+- The OAuth client-credentials token is cached in process until shortly before it expires.
+- Requests go through one requests.Session with a keep-alive connection pool and strict timeouts, so a slow
+  Accounts can only hold a worker for CONNECT_TIMEOUT + READ_TIMEOUT.
+- User records are cached in Redis per UUID. Within FRESH_TTL they are served as is; after that, and up to
+  STALE_TTL, they are still served immediately while a background refresh fetches a new copy
+  (stale-while-revalidate).
+- Concurrent lookups for the same UUID in a worker share a single upstream request (single-flight).
+
+aget_user_info is the async twin used by the ASGI views; it talks to Accounts with httpx on the event loop
+and shares the token and the cache with the sync path.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from oauthlib.oauth2 import BackendApplicationClient
+from requests.adapters import HTTPAdapter
+from requests_oauthlib import OAuth2Session
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 2  # seconds
+READ_TIMEOUT = 3  # seconds
+POOL_SIZE = 10
+TOKEN_EXPIRY_MARGIN = 60  # seconds; refresh the token this long before Accounts would reject it
+
+FRESH_TTL = 60 * 5  # 5 minutes
+STALE_TTL = 60 * 60 * 24  # 24 hours
+
+# Fields /me takes from the Accounts user record
+USER_INFO_FIELDS = (
+    "salesforce_contact_id",
+    "faculty_status",
+    "adopter_status",
+    "self_reported_role",
+    "school_type",
+    "school_location",
+    "assignable_user",
+    "assignable_school_integrated",
+)
+
+
+class _SingleFlight:
+    """Runs at most one call per key at a time; callers arriving while it runs wait for its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+class _AsyncSingleFlight:
+    """Single-flight for coroutines: concurrent awaits of the same key on one event loop share one task."""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # shield so one caller being cancelled does not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+
+class AccountsClient:
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self._flights = _SingleFlight()
+        self._aflights = _AsyncSingleFlight()
+        # httpx clients are bound to the event loop they were created on; ASGI workers run a single loop
+        self._async_sessions = weakref.WeakKeyDictionary()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="accounts-refresh")
+
+    def _token_is_valid(self):
+        return self._token is not None and time.time() < self._token_expires_at
+
+    def access_token(self):
+        with self._token_lock:
+            if not self._token_is_valid():
+                oauth = OAuth2Session(client=BackendApplicationClient(client_id=settings.SOCIAL_AUTH_OPENSTAX_KEY))
+                token = oauth.fetch_token(
+                    token_url=settings.ACCESS_TOKEN_URL,
+                    client_id=settings.SOCIAL_AUTH_OPENSTAX_KEY,
+                    client_secret=settings.SOCIAL_AUTH_OPENSTAX_SECRET,
+                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                )
+                self._token = token["access_token"]
+                self._token_expires_at = token.get("expires_at", time.time() + 300) - TOKEN_EXPIRY_MARGIN
+            return self._token
+
+    def _user_url(self, user_uuid, token):
+        return settings.USERS_QUERY + urlencode({"q": f"uuid:{user_uuid}", "access_token": token})
+
+    def _parse(self, data):
+        items = data.get("items")
+        info = {field: items[0].get(field) for field in USER_INFO_FIELDS} if items else None
+        return info, {"info": info, "fetched_at": time.time()}
+
+    def _fetch(self, user_uuid):
+        """Fetch one user from Accounts and store it in the cache. Returns the user info dict or None."""
+        response = self.session.get(
+            self._user_url(user_uuid, self.access_token()), timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        info, entry = self._parse(response.json())
+        cache.set(_cache_key(user_uuid), entry, STALE_TTL)
+        return info
+
+    def _async_session(self):
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None:
+            session = self._async_sessions[loop] = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_keepalive_connections=POOL_SIZE),
+            )
+        return session
+
+    async def _afetch(self, user_uuid):
+        token = self._token if self._token_is_valid() else await sync_to_async(self.access_token)()
+        response = await self._async_session().get(self._user_url(user_uuid, token))
+        response.raise_for_status()
+        info, entry = self._parse(response.json())
+        await cache.aset(_cache_key(user_uuid), entry, STALE_TTL)
+        return info
+
+    def _refresh_in_background(self, user_uuid):
+        # one refresh per user across all workers; the lock expires on its own if this worker dies
+        if not cache.add(f"{_cache_key(user_uuid)}:refreshing", 1, CONNECT_TIMEOUT + READ_TIMEOUT):
+            return
+
+        def refresh():
+            try:
+                self._flights.do(user_uuid, lambda: self._fetch(user_uuid))
+            except Exception:
+                logger.warning("Background refresh of Accounts user %s failed", user_uuid, exc_info=True)
+
+        self._refresher.submit(refresh)
+
+    def get_user_info(self, user_uuid):
+        """
+        Enrichment fields for a user, or None if Accounts has no such user or is unavailable and nothing
+        is cached. Only a cold miss waits on Accounts, and then for at most the request timeouts.
+        """
+        cached = cache.get(_cache_key(user_uuid))
+        if cached is not None:
+            if time.time() - cached["fetched_at"] > FRESH_TTL:
+                self._refresh_in_background(user_uuid)
+            return cached["info"]
+
+        try:
+            return self._flights.do(user_uuid, lambda: self._fetch(user_uuid))
+        except Exception:
+            logger.exception("Failed to fetch user info from Accounts API for %s", user_uuid)
+            return None
+
+    async def aget_user_info(self, user_uuid):
+        """Async twin of get_user_info: waits on Accounts without holding a thread."""
+        cached = await cache.aget(_cache_key(user_uuid))
+        if cached is not None:
+            if time.time() - cached["fetched_at"] > FRESH_TTL:
+                await sync_to_async(self._refresh_in_background)(user_uuid)
+            return cached["info"]
+
+        try:
+            return await self._aflights.do(user_uuid, lambda: self._afetch(user_uuid))
+        except Exception:
+            logger.exception("Failed to fetch user info from Accounts API for %s", user_uuid)
+            return None
+
+
+def _cache_key(user_uuid):
+    return f"sfapi:accounts_user:{user_uuid}"
+
+
+accounts_client = AccountsClient()
@@ -1,12 +1,26 @@
 from django.contrib import admin
 from django.db.models import Sum
-
-from .models import APIKey, FieldChangeLog, FormSubmission, RequestLog, SFAPIUsageLog, SuperUser, SyncConfig
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from . import profiler, rollups
+from .models import (
+    APIKey,
+    FieldChangeLog,
+    FormSubmission,
+    RequestLog,
+    RequestProfile,
+    RequestRollup,
+    SFAPIUsageLog,
+    SuperUser,
+    SyncConfig,
+)
 
 
 @admin.register(RequestLog)
 class RequestLogAdmin(admin.ModelAdmin):
-    list_display = ("timestamp", "method", "path", "status_code", "auth_type", "duration_ms")
+    list_display = ("timestamp", "method", "path", "status_code", "auth_type", "duration_ms", "db_ms", "sf_ms")
     list_filter = ("method", "status_code", "auth_type")
     search_fields = ("path", "auth_identifier")
     readonly_fields = [f.name for f in RequestLog._meta.fields]
@@ -22,6 +36,84 @@ class RequestLogAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(RequestRollup)
+class RequestRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "bucket_start",
+        "period",
+        "method",
+        "path",
+        "status_class",
+        "auth_type",
+        "api_key",
+        "request_count",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "duration_ms_max",
+    )
+    list_filter = ("period", "method", "status_class", "auth_type")
+    search_fields = ("path", "api_key")
+    date_hierarchy = "bucket_start"
+    readonly_fields = [f.name for f in RequestRollup._meta.fields]
+    ordering = ("-bucket_start", "path")
+
+    @admin.display(description="Requests", ordering="requests")
+    def request_count(self, obj):
+        return round(obj.requests)
+
+    @admin.display(description="p50 ms")
+    def p50_ms(self, obj):
+        return rollups.percentile(obj.histogram, 0.5)
+
+    @admin.display(description="p95 ms")
+    def p95_ms(self, obj):
+        return rollups.percentile(obj.histogram, 0.95)
+
+    @admin.display(description="p99 ms")
+    def p99_ms(self, obj):
+        return rollups.percentile(obj.histogram, 0.99)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "method", "path", "status_code", "duration_ms", "samples", "auth_identifier")
+    list_filter = ("method", "status_code", "auth_type", "truncated")
+    search_fields = ("path", "auth_identifier")
+    date_hierarchy = "created_at"
+    readonly_fields = ["top_frames"] + [f.name for f in RequestProfile._meta.fields if f.name != "stacks"]
+    exclude = ("stacks",)
+    ordering = ("-created_at",)
+    actions = ["download_stacks"]
+
+    @admin.display(description="Where the samples landed")
+    def top_frames(self, obj):
+        rows = "\n".join(f"{share:6.1%}  {frame}" for frame, share in profiler.top_frames(obj.stacks))
+        return format_html("<pre>{}</pre>", rows or "No samples")
+
+    @admin.action(description="Download collapsed stacks (flamegraph.pl, speedscope)")
+    def download_stacks(self, request, queryset):
+        # stacks of several profiles add up, so selecting many requests gives their combined flame graph
+        response = HttpResponse("\n".join(profile.stacks for profile in queryset), content_type="text/plain")
+        response["Content-Disposition"] = 'attachment; filename="profile.folded"'
+        return response
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(FieldChangeLog)
 class FieldChangeLogAdmin(admin.ModelAdmin):
     list_display = ("timestamp", "model_name", "record_id", "field_name", "change_source", "changed_by")
@@ -114,11 +206,19 @@ class SFAPIUsageLogAdmin(admin.ModelAdmin):
 
 @admin.register(FormSubmission)
 class FormSubmissionAdmin(admin.ModelAdmin):
-    list_display = ("id", "form_type", "status", "auth_type", "created_at", "processed_at")
+    list_display = ("id", "form_type", "status", "attempts", "auth_type", "created_at", "processed_at")
     list_filter = ("form_type", "status", "auth_type")
     search_fields = ("id", "form_type", "auth_identifier")
     readonly_fields = [f.name for f in FormSubmission._meta.fields]
     ordering = ("-created_at",)
+    actions = ["retry_now"]
+
+    @admin.action(description="Retry selected failed or dead-lettered submissions now")
+    def retry_now(self, request, queryset):
+        count = queryset.filter(status__in=["failed", "dead"]).update(
+            status="pending", attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} submissions queued for another attempt.")
 
     def has_add_permission(self, request):
         return False
@@ -1,66 +1,95 @@
+import bisect
 import datetime
-import json
 import logging
 import math
 import time
-from urllib.parse import urlencode
-from urllib.request import urlopen
+from operator import itemgetter
 
 import jwe
 import jwt
 import sentry_sdk
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.core.cache import cache
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
-from ninja_extra import NinjaExtraAPI, Router, throttle
-from ninja_extra.throttling import UserRateThrottle
-from openstax_accounts.functions import decrypt_cookie, get_logged_in_user_uuid, get_token
+from ninja_extra import NinjaExtraAPI, Router
 
 from api.models import SuperUser
-from db.models import Account, Adoption, Book, Contact
+from db.functions import ADOPTION_SUMMARY_VARIANTS, build_adoption_summaries
+from db.models import Account, AdoptionSummary, Book, Contact
 from pardot.views import router as pardot_router
 from sf.models.case import Case
 
-from .auth import combined_auth, has_scope
+from . import audit, db_pool, export, rollups, sso, typeahead
+from .accounts_client import accounts_client
+from .auth import ServiceAuth, combined_auth, has_scope
+from .cache import books_cache, bump_generations, schools_cache, versioned_key, versioned_keys
+from .db_router import stick_to_primary
 from .forms.pipeline import FormPipeline
-from .forms.processors import process_submission
-from .models import FormSubmission
+from .models import FormSubmission, RequestRollup
+from .pagination import InvalidCursor, clamp_limit, decode_cursor, paginate
+from .ratelimit import charge
+from .renderers import ORJSONRenderer, json_response, render_json
 from .schemas import (
+    BATCH_MAX_SIZE,
+    AccountBatchRequestSchema,
+    AccountBatchSchema,
     AccountDetailSchema,
     AccountsSchema,
     AdoptionsSchema,
     BooksSchema,
     CaseCreateSchema,
     CaseSchema,
+    ContactBatchRequestSchema,
+    ContactBatchSchema,
     ContactSchema,
     ContactUpdateSchema,
     ErrorSchema,
     FormSubmissionResponseSchema,
     FormSubmissionSchema,
+    LatencyReportSchema,
     MeSchema,
+    SchoolSuggestionsSchema,
 )
+from .sso import decrypt_cookie, get_logged_in_user_uuid
 
 logger = logging.getLogger(__name__)
 
 # Cache durations in seconds, calculated with math.prod() to use them in the api
 # A reasonable format is to use math.prod([seconds, minutes, hours, days]) to calculate the duration
-CONTACT_CACHE_DURATION = math.prod([60, 15])  # 15 minutes
-ADOPTIONS_CACHE_DURATION = math.prod([60, 60])  # 1 hour
-SCHOOL_COUNT_CACHE_DURATION = math.prod([60, 60, 24])  # 24 hours
+# Contact and adoption keys embed a generation that syncs bump (see api/cache.py), so they can live for days
+CONTACT_CACHE_DURATION = math.prod([60, 60, 24, 3])  # 3 days
+ADOPTIONS_CACHE_DURATION = math.prod([60, 60, 24, 3])  # 3 days
+SCHOOL_CACHE_DURATION = math.prod([60, 60, 24, 3])  # 3 days
+
+# The default /books page holds more than all active books, so existing clients still get the full list
+BOOKS_DEFAULT_LIMIT = 500
+BOOKS_MAX_LIMIT = 1000
+# /schools returns every match unless the client pages with limit or cursor
+SCHOOL_SEARCH_DEFAULT_LIMIT = 50
+SCHOOL_SEARCH_MAX_LIMIT = 200
+SCHOOL_SUGGEST_DEFAULT_LIMIT = 10
+SCHOOL_SUGGEST_MAX_LIMIT = 25
 
 api = NinjaExtraAPI(
     version="1.0.0",  # Do not exceed 1.x.x in this file, create api_v2.py for new versions; NO breaking changes!
     title="OpenStax Salesforce API",
+    renderer=ORJSONRenderer(),
 )
 router = Router()
 
-possible_error_codes = frozenset([401, 404, 422])
+possible_error_codes = frozenset([400, 401, 404, 422])
 
 
-# TODO: consider this now that caching of requests is now in place
-# Throttling for Salesforce endpoints to prevent API calls going over the limit
-class SalesforceAPIRateThrottle(UserRateThrottle):
-    rate = settings.SALESFORCE_API_RATE_LIMIT
+def _sync_or_async(sync_view, async_view):
+    """
+    Pick the async variant of an I/O-bound endpoint when serving over ASGI (settings.ASYNC_VIEWS), so slow
+    upstreams are awaited on the event loop instead of holding a worker thread. WSGI keeps the sync view.
+    """
+    return async_view if settings.ASYNC_VIEWS else sync_view
 
 
 def calculate_cache_expire(duration):
@@ -73,12 +102,13 @@ def get_user_contact(request, expire=False):
         return 401, {"code": 401, "detail": "User is not logged in."}
 
     # Check cache first (unless expire=True to force refresh)
-    cache_key = f"sfapi:contact:{user_uuid}"
+    cache_key = versioned_key("contact", user_uuid)
     if not expire:
         cached = cache.get(cache_key)
         if cached is not None:
             return cached
 
+    charge(request, "read")
     try:
         sf_contact = Contact.objects.select_related("account").get(accounts_uuid=user_uuid)
     except Contact.DoesNotExist:
@@ -92,70 +122,105 @@ def get_user_contact(request, expire=False):
         )
 
     if sf_contact:
-        contact = {
-            "id": sf_contact.id,
-            "first_name": sf_contact.first_name,
-            "last_name": sf_contact.last_name,
-            "full_name": sf_contact.full_name,
-            "school": sf_contact.account.name,
-            "role": sf_contact.role,
-            "position": sf_contact.position,
-            "adoption_status": sf_contact.adoption_status,
-            "subject_interest": sf_contact.subject_interest,
-            "lms": sf_contact.lms,
-            "accounts_uuid": sf_contact.accounts_uuid,
-            "verification_status": sf_contact.verification_status,
-            "signup_date": sf_contact.signup_date.strftime("%Y-%m-%d") if sf_contact.signup_date else None,
-            "last_modified_date": sf_contact.last_modified_date.strftime("%Y-%m-%d")
-            if sf_contact.last_modified_date
-            else None,
-            "lead_source": sf_contact.lead_source,
-        }
-
+        contact = _contact_payload(sf_contact)
         cache.set(cache_key, contact, CONTACT_CACHE_DURATION)
         return contact
 
 
+def _contact_payload(sf_contact):
+    # you must update this if you change the ContactSchema or anything it depends on!
+    return {
+        "id": sf_contact.id,
+        "first_name": sf_contact.first_name,
+        "last_name": sf_contact.last_name,
+        "full_name": sf_contact.full_name,
+        "school": sf_contact.account.name,
+        "role": sf_contact.role,
+        "position": sf_contact.position,
+        "adoption_status": sf_contact.adoption_status,
+        "subject_interest": sf_contact.subject_interest,
+        "lms": sf_contact.lms,
+        "accounts_uuid": sf_contact.accounts_uuid,
+        "verification_status": sf_contact.verification_status,
+        "signup_date": sf_contact.signup_date.strftime("%Y-%m-%d") if sf_contact.signup_date else None,
+        "last_modified_date": sf_contact.last_modified_date.strftime("%Y-%m-%d")
+        if sf_contact.last_modified_date
+        else None,
+        "lead_source": sf_contact.lead_source,
+    }
+
+
+def get_contacts(request, accounts_uuids, contact_ids):
+    """
+    Contact payloads for many users at once, as ({uuid: contact}, {contact_id: contact}) in request order.
+
+    UUIDs are served from the same cache entries as GET /contact; the UUID misses and all contact IDs are
+    loaded with a single query and the misses cached with one multi-set. Like get_user_contact, a UUID with
+    several contacts resolves to the most recently modified one. Every record looked up in the database costs
+    one "read" token.
+    """
+    keys = versioned_keys("contact", accounts_uuids)
+    cached = cache.get_many(keys.values())
+    by_uuid = {user_uuid: cached[key] for user_uuid, key in keys.items() if key in cached}
+    by_id = {}
+
+    misses = [user_uuid for user_uuid in accounts_uuids if user_uuid not in by_uuid]
+    if misses or contact_ids:
+        charge(request, "read", len(misses) + len(contact_ids))
+        loaded = {}
+        sf_contacts = (
+            Contact.objects.select_related("account")
+            .filter(Q(accounts_uuid__in=misses) | Q(id__in=contact_ids))
+            .order_by("-last_modified_date")
+        )
+        for sf_contact in sf_contacts:
+            contact = _contact_payload(sf_contact)
+            by_id[sf_contact.id] = contact
+            loaded.setdefault(sf_contact.accounts_uuid, contact)
+        # only UUID misses are cached, a contact found by ID is not necessarily the one its UUID resolves to
+        fresh = {user_uuid: loaded[user_uuid] for user_uuid in misses if user_uuid in loaded}
+        cache.set_many({keys[user_uuid]: contact for user_uuid, contact in fresh.items()}, CONTACT_CACHE_DURATION)
+        by_uuid.update(fresh)
+
+    ordered = {user_uuid: by_uuid[user_uuid] for user_uuid in accounts_uuids if user_uuid in by_uuid}
+    return ordered, {contact_id: by_id[contact_id] for contact_id in contact_ids if contact_id in by_id}
+
+
+def get_adoption_summary(contact_id):
+    """Load the precomputed adoption summary for a contact with a single primary key lookup.
+
+    Summaries are maintained by the syncs; a contact without one (e.g. synced before summaries existed) is
+    built from the adoption tables but not stored, since this runs on the read replica.
+    """
+    summary = AdoptionSummary.objects.filter(contact_id=contact_id).values("adoptions", "totals").first()
+    if summary is None:
+        summary = build_adoption_summaries([contact_id])[contact_id]
+
+    return {
+        "adoptions": summary["adoptions"],
+        "totals": summary["totals"],
+        "cache_create": timezone.now(),
+        "cache_expire": calculate_cache_expire(ADOPTIONS_CACHE_DURATION),
+    }
+
+
 def _fetch_accounts_user_info(user_uuid):
     """Fetch additional user info from the Accounts API.
 
-    Calls the Accounts API directly to get the full user record,
-    including fields like salesforce_contact_id, assignable_user, etc.
-    that get_user_info_by_uuid() doesn't extract.
+    Uses the full user record (salesforce_contact_id, assignable_user, etc.) that get_user_info_by_uuid()
+    doesn't extract, through the pooled, cached client in accounts_client.py.
 
     Returns a dict with SSO-enrichment fields, or None on failure.
     """
-    try:
-        token = get_token()
-        url = settings.USERS_QUERY + urlencode({"q": f"uuid:{user_uuid}", "access_token": token["access_token"]})
-        with urlopen(url) as response:  # noqa: S310 - URL built from trusted ACCOUNTS_URL setting
-            data = json.loads(response.read().decode())
-
-        if not data.get("items"):
-            return None
-
-        user = data["items"][0]
-        return {
-            "salesforce_contact_id": user.get("salesforce_contact_id"),
-            "faculty_status": user.get("faculty_status"),
-            "adopter_status": user.get("adopter_status"),
-            "self_reported_role": user.get("self_reported_role"),
-            "school_type": user.get("school_type"),
-            "school_location": user.get("school_location"),
-            "assignable_user": user.get("assignable_user"),
-            "assignable_school_integrated": user.get("assignable_school_integrated"),
-        }
-    except Exception:
-        logger.exception("Failed to fetch user info from Accounts API for %s", user_uuid)
-    return None
+    return accounts_client.get_user_info(user_uuid)
 
 
 # API endpoints, responses are defined in schemas.py
 #######
 # SSO #
 #######
-@router.get("/me", response={200: MeSchema}, tags=["user"])
-def me(request):
+def _me_identity(request):
+    """Everything /me reports except the Accounts enrichment. Returns (response, uuid to enrich or None)."""
     response = {
         "logged_in": False,
         "accounts_environment": settings.ACCOUNTS_ENVIRONMENT,
@@ -172,10 +237,7 @@ def me(request):
                 "is_super_user": SuperUser.is_super_user(settings.DEV_USER_UUID),
             }
         )
-        accounts_info = _fetch_accounts_user_info(settings.DEV_USER_UUID)
-        if accounts_info:
-            response.update(accounts_info)
-        return response
+        return response, settings.DEV_USER_UUID
 
     cookie_value = request.COOKIES.get(settings.SSO_COOKIE_NAME)
 
@@ -190,10 +252,7 @@ def me(request):
                 "is_super_user": SuperUser.is_super_user(payload.user_uuid),
             }
         )
-        accounts_info = _fetch_accounts_user_info(payload.user_uuid)
-        if accounts_info:
-            response.update(accounts_info)
-        return response
+        return response, payload.user_uuid
 
     # Diagnostics — only when not logged in
     debug_info = {
@@ -226,16 +285,36 @@ def me(request):
                 debug_info["signature"] = f"failed: {type(e).__name__}: {e}"
 
     response["debug"] = debug_info
+    return response, None
+
+
+def me(request):
+    response, user_uuid = _me_identity(request)
+    if user_uuid:
+        accounts_info = _fetch_accounts_user_info(user_uuid)
+        if accounts_info:
+            response.update(accounts_info)
     return response
 
 
+async def me_async(request):
+    response, user_uuid = await sync_to_async(_me_identity)(request)
+    if user_uuid:
+        accounts_info = await accounts_client.aget_user_info(user_uuid)
+        if accounts_info:
+            response.update(accounts_info)
+    return response
+
+
+router.get("/me", response={200: MeSchema}, tags=["user"])(_sync_or_async(me, me_async))
+
+
 ###########
 # Contact #
 ###########
 @router.get(
     "/contact", auth=combined_auth, response={200: ContactSchema, possible_error_codes: ErrorSchema}, tags=["user"]
 )
-@throttle(SalesforceAPIRateThrottle)
 def salesforce_contact(request, expire: bool = False):
     result = get_user_contact(request, expire)
     # If get_user_contact returned a (status_code, payload) tuple, propagate it directly.
@@ -248,169 +327,246 @@ def salesforce_contact(request, expire: bool = False):
     return contact
 
 
+@router.post(
+    "/contacts/batch",
+    auth=combined_auth,
+    response={200: ContactBatchSchema, possible_error_codes: ErrorSchema},
+    tags=["user"],
+)
+def salesforce_contacts_batch(request, payload: ContactBatchRequestSchema):
+    if not has_scope(request, "read:contacts"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:contacts"}
+
+    accounts_uuids = list(dict.fromkeys(payload.accounts_uuids))
+    contact_ids = list(dict.fromkeys(payload.contact_ids))
+    if not accounts_uuids and not contact_ids:
+        return 422, {"code": 422, "detail": "You must provide accounts_uuids or contact_ids."}
+    if len(accounts_uuids) + len(contact_ids) > BATCH_MAX_SIZE:
+        return 422, {"code": 422, "detail": f"At most {BATCH_MAX_SIZE} records can be requested at once."}
+
+    by_uuid, by_id = get_contacts(request, accounts_uuids, contact_ids)
+
+    # request order, each contact once even if it was asked for by both UUID and ID
+    contacts = {}
+    for contact in [by_uuid.get(user_uuid) for user_uuid in accounts_uuids] + [by_id.get(i) for i in contact_ids]:
+        if contact is not None:
+            contacts.setdefault(contact["id"], contact)
+    missing = [user_uuid for user_uuid in accounts_uuids if user_uuid not in by_uuid]
+    missing += [contact_id for contact_id in contact_ids if contact_id not in by_id]
+    return {"count": len(contacts), "contacts": list(contacts.values()), "missing": missing}
+
+
 #############
 # Adoptions #
 #############
 @router.get(
     "/adoptions", auth=combined_auth, response={200: AdoptionsSchema, possible_error_codes: ErrorSchema}, tags=["user"]
 )
-@throttle(SalesforceAPIRateThrottle)
 def salesforce_adoptions(request, confirmed: bool = None, assumed: bool = None, expire: bool = False):
     contact = get_user_contact(request, expire)
 
     if not contact or not isinstance(contact, dict):
         return 404, {"code": 404, "detail": "No contact found."}
 
-    contact_adoptions = cache.get(f"sfapi:adoptions{confirmed}:{assumed}:{contact['id']}")
-    if contact_adoptions is not None:
-        return contact_adoptions
-
-    contact_adoptions = Adoption.objects.select_related("opportunity__book", "opportunity__account").filter(
-        contact__id=contact["id"]
-    )
-    if confirmed:
-        contact_adoptions = contact_adoptions.filter(confirmation_type="OpenStax Confirmed Adoption")
-    if assumed:
-        contact_adoptions = contact_adoptions.exclude(confirmation_type="OpenStax Confirmed Adoption")
-
-    if not contact_adoptions:
+    # confirmed and assumed are mutually exclusive, asking for both can never match an adoption
+    if confirmed and assumed:
+        return 404, {"code": 404, "detail": "No adoptions found"}
+    variant = "confirmed" if confirmed else "assumed" if assumed else "all"
+
+    # One cache entry per contact serves every filter variant. Each variant's validated, rendered response is
+    # cached under the same generation, so a repeat request skips schema validation and serialization.
+    cache_key = versioned_key("adoptions", contact["id"])
+    rendered_key = f"{cache_key}:{variant}:json"
+    rendered = None if expire else cache.get(rendered_key)
+    if rendered is not None:
+        return json_response(rendered)
+
+    summary = None if expire else cache.get(cache_key)
+    if summary is None:
+        charge(request, "read")
+        summary = get_adoption_summary(contact["id"])
+        cache.set(cache_key, summary, ADOPTIONS_CACHE_DURATION)
+
+    totals = summary["totals"][variant]
+    if not totals["count"]:
         return 404, {"code": 404, "detail": "No adoptions found"}
 
-    #  calculate the total students and savings for the adoptions (this could be null, so handle that)
-    # if we know they won't be null, we can use a list comprehension to make this more concise in the response_json
-    # total_students = sum([adoption.students for adoption in contact_adoptions if adoption.students])
-    total_students = 0
-    total_savings = 0
-    for adoption in contact_adoptions:
-        if not adoption.students or adoption.students < 0:
-            pass
-        else:
-            total_students += adoption.students
-
-        if not adoption.savings or adoption.savings < 0:
-            pass
-        else:
-            total_savings += adoption.savings
-
-    # build the json for the cache, this keeps the database away from Salesforce on future requests
-    # you must update this if you change the AdoptionsSchema or anything it depends on!
-    response_json = {
-        "count": len(contact_adoptions),
-        "contact_id": contact["id"],
-        "first_year_adopting_openstax": contact_adoptions.order_by("base_year").first().base_year
-        if contact_adoptions
-        else None,
-        "total_students": total_students,
-        "total_savings": total_savings,
-        "adoptions": [],
-        "cache_create": timezone.now(),
-        "cache_expire": calculate_cache_expire(ADOPTIONS_CACHE_DURATION),
-    }
-
-    for adoption in contact_adoptions:
-        response_json["adoptions"].append(
-            {
-                "id": adoption.id,
-                "book": {
-                    "id": adoption.opportunity.book.id,
-                    "name": adoption.opportunity.book.name,
-                    "official_name": adoption.opportunity.book.official_name,
-                    "type": adoption.opportunity.book.type,
-                    "subject_areas": adoption.opportunity.book.subject_areas,
-                    "active_book": adoption.opportunity.book.active_book,
-                    "website_url": adoption.opportunity.book.website_url,
-                },
-                "base_year": adoption.base_year,
-                "school_year": adoption.school_year,
-                "school": adoption.opportunity.account.name,
-                "confirmation_type": adoption.confirmation_type,
-                "students": adoption.students,
-                "savings": adoption.savings,
-                "how_using": adoption.how_using,
-                "confirmation_date": adoption.confirmation_date.strftime("%Y-%m-%d")
-                if adoption.confirmation_date
-                else None,
-            }
-        )
-
-    cache.set(f"sfapi:adoptions{confirmed}:{assumed}:{contact['id']}", response_json, ADOPTIONS_CACHE_DURATION)
-    return response_json
+    matches = ADOPTION_SUMMARY_VARIANTS[variant]
+    rendered = render_json(
+        {
+            "contact_id": contact["id"],
+            **totals,
+            "adoptions": [adoption for adoption in summary["adoptions"] if matches(adoption)],
+            "cache_create": summary["cache_create"],
+            "cache_expire": summary["cache_expire"],
+        },
+        AdoptionsSchema,
+    )
+    cache.set(rendered_key, rendered, ADOPTIONS_CACHE_DURATION)
+    return json_response(rendered)
 
 
 #########
 # Books #
 #########
 @router.get("/books", auth=combined_auth, response={200: BooksSchema, possible_error_codes: ErrorSchema}, tags=["core"])
-@throttle(SalesforceAPIRateThrottle)
-def salesforce_books(request):
+def salesforce_books(request, limit: int = BOOKS_DEFAULT_LIMIT, cursor: str = None):
     if not has_scope(request, "read:books"):
         return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:books"}
-    sf_books = Book.objects.filter(active_book=True)
-    if not sf_books:
+    books = get_active_books()
+    if not books:
+        return 404, {"code": 404, "detail": "No books found."}
+
+    # nearly every client asks for the default first page, it is served pre-rendered
+    if not cursor and limit == BOOKS_DEFAULT_LIMIT:
+        return json_response(
+            books_cache.get_or_set("first_page_json", lambda: render_json(_books_page(books, 0, limit), BooksSchema))
+        )
+
+    # the cached list is ordered by id, so a page starts right after the cursor's id
+    start = 0
+    if cursor:
+        try:
+            start = bisect.bisect_right(books, decode_cursor(cursor, {"id": str})["id"], key=itemgetter("id"))
+        except InvalidCursor:
+            return 400, {"code": 400, "detail": "Invalid cursor."}
+
+    page = _books_page(books, start, clamp_limit(limit, BOOKS_MAX_LIMIT))
+    if not page["books"]:
         return 404, {"code": 404, "detail": "No books found."}
+    return page
 
-    # build the json for the cache, this keeps the database away from Salesforce on future requests
+
+def _books_page(books, start, limit):
+    page, next_cursor = paginate(books[start : start + limit + 1], limit, lambda book: {"id": book["id"]})
+    return {"count": len(page), "next_cursor": next_cursor, "books": page}
+
+
+def _load_active_books():
     # you must update this if you change the BooksSchema or anything it depends on!
-    response_json = {"count": len(sf_books), "books": []}
+    return [
+        {
+            "id": book.id,
+            "name": book.name,
+            "official_name": book.official_name,
+            "type": book.type,
+            "subject_areas": book.subject_areas,
+            "website_url": book.website_url,
+        }
+        for book in Book.objects.filter(active_book=True).order_by("id")
+    ]
 
-    for book in sf_books:
-        response_json["books"].append(
-            {
-                "id": book.id,
-                "name": book.name,
-                "official_name": book.official_name,
-                "type": book.type,
-                "subject_areas": book.subject_areas,
-                "website_url": book.website_url,
-            }
-        )
-    return response_json
+
+def get_active_books():
+    """
+    Active books shaped for BooksSchema and ordered by id, from the in-process/Redis tiered cache (invalidated
+    by the book sync).
+    """
+    return books_cache.get_or_set("active_by_id", _load_active_books)
+
+
+books_cache.register_warmer(get_active_books)
+
+
+def get_school_count():
+    return schools_cache.get_or_set("count", Account.objects.count)
+
+
+schools_cache.register_warmer(get_school_count)
 
 
 ###########
 # Schools #
 ###########
 @router.get("/schools", response={200: AccountsSchema, possible_error_codes: ErrorSchema}, tags=["core"])
-@throttle(SalesforceAPIRateThrottle)
-def salesforce_schools(request, name: str = None):
-    if not name:
+def salesforce_schools(request, name: str = None, city: str = None, limit: int = None, cursor: str = None):
+    if not name and not city:
         return 422, {"code": 422, "detail": "You must provide a name or city to search by."}
 
-    if len(name) < 3:
+    if any(term and len(term) < 3 for term in (name, city)):
         return 422, {"code": 422, "detail": "The query must be at least 3 characters long."}
 
-    sf_schools = Account.objects.filter(name__icontains=name)
+    # every search is a database query, there is no cache in front of it
+    charge(request, "read")
+
+    # substring matches are served by the idx_account_search_trgm GIN index, ranked by how well the
+    # query matches a whole word of the name (or SheerID name) and city, best matches first
+    sf_schools = Account.objects.all()
+    rank = Value(0.0, output_field=FloatField())
+    if name:
+        sf_schools = sf_schools.filter(Q(name__icontains=name) | Q(sheer_id_school_name__icontains=name))
+        rank += Greatest(TrigramWordSimilarity(name, "name"), TrigramWordSimilarity(name, "sheer_id_school_name"))
+    if city:
+        sf_schools = sf_schools.filter(city__icontains=city)
+        rank += TrigramWordSimilarity(city, "city")
+    matches = sf_schools
+    sf_schools = sf_schools.annotate(rank=rank).order_by("-rank", "id")
+
+    if cursor:
+        try:
+            after = decode_cursor(cursor, {"rank": float, "id": str})
+        except InvalidCursor:
+            return 400, {"code": 400, "detail": "Invalid cursor."}
+        sf_schools = sf_schools.filter(Q(rank__lt=after["rank"]) | Q(rank=after["rank"], id__gt=after["id"]))
+
+    fields = ["id", "name", "type", "country", "state", "city", "lms", "sheer_id_school_name", "rank"]
+    if limit is None and cursor is None:
+        # clients that do not page get every match, as before pagination existed
+        page, next_cursor = list(sf_schools.values(*fields)), None
+        count = len(page)
+    else:
+        limit = clamp_limit(limit or SCHOOL_SEARCH_DEFAULT_LIMIT, SCHOOL_SEARCH_MAX_LIMIT)
+        page = list(sf_schools.values(*fields)[: limit + 1])
+        page, next_cursor = paginate(page, limit, lambda school: {"rank": school["rank"], "id": school["id"]})
+        # count stays the number of matches, not the page size
+        count = matches.count() if page else 0
 
-    if not sf_schools:
+    if not page:
         return 404, {"code": 404, "detail": "No schools found."}
 
-    total_count = cache.get("sfapi:school_count")
-    if total_count is None:
-        total_count = Account.objects.count()
-        cache.set("sfapi:school_count", total_count, SCHOOL_COUNT_CACHE_DURATION)
-
-    # build the json for the cache, this keeps the database away from Salesforce on future requests
-    # you must update this if you change the AccountsSchema or anything it depends on!
-    response_json = {
-        "count": len(sf_schools),
-        "total_schools": total_count,
-        "schools": [],
+    for school in page:
+        del school["rank"]
+
+    return {
+        "count": count,
+        "total_schools": get_school_count(),
+        "next_cursor": next_cursor,
+        "schools": page,
     }
 
-    for school in sf_schools:
-        response_json["schools"].append(
-            {
-                "id": school.id,
-                "name": school.name,
-                "type": school.type,
-                "country": school.country,
-                "state": school.state,
-                "city": school.city,
-                "lms": school.lms,
-                "sheer_id_school_name": school.sheer_id_school_name,
-            }
-        )
-    return response_json
+
+@router.get(
+    "/schools/suggest", response={200: SchoolSuggestionsSchema, possible_error_codes: ErrorSchema}, tags=["core"]
+)
+def school_suggest(request, q: str, limit: int = SCHOOL_SUGGEST_DEFAULT_LIMIT):
+    # answered from the worker's in-memory index (api/typeahead.py), no database round trip per keystroke
+    if len(q.strip()) < 2:
+        return 422, {"code": 422, "detail": "The query must be at least 2 characters long."}
+
+    suggestions = typeahead.get_index().search(q, limit=clamp_limit(limit, SCHOOL_SUGGEST_MAX_LIMIT))
+    return {
+        "count": len(suggestions),
+        "schools": [{"id": school_id, "name": name} for school_id, name in suggestions],
+    }
+
+
+@router.post(
+    "/schools/batch",
+    auth=combined_auth,
+    response={200: AccountBatchSchema, possible_error_codes: ErrorSchema},
+    tags=["core"],
+)
+def salesforce_schools_batch(request, payload: AccountBatchRequestSchema):
+    if not has_scope(request, "read:schools"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:schools"}
+
+    school_ids = list(dict.fromkeys(payload.ids))
+    schools = get_schools(request, school_ids)
+    return {
+        "count": len(schools),
+        "schools": [schools[school_id] for school_id in school_ids if school_id in schools],
+        "missing": [school_id for school_id in school_ids if school_id not in schools],
+    }
 
 
 @router.get(
@@ -419,13 +575,15 @@ def salesforce_schools(request, name: str = None):
     response={200: AccountDetailSchema, possible_error_codes: ErrorSchema},
     tags=["core"],
 )
-@throttle(SalesforceAPIRateThrottle)
 def salesforce_school_detail(request, school_id: str):
-    try:
-        school = Account.objects.get(id=school_id)
-    except Account.DoesNotExist:
+    school = get_schools(request, [school_id]).get(school_id)
+    if school is None:
         return 404, {"code": 404, "detail": "School not found."}
+    return school
 
+
+def _school_payload(school):
+    # you must update this if you change the AccountDetailSchema or anything it depends on!
     return {
         "id": school.id,
         "name": school.name,
@@ -442,13 +600,39 @@ def salesforce_school_detail(request, school_id: str):
     }
 
 
-@router.post(
-    "/case", auth=combined_auth, response={200: CaseSchema, possible_error_codes: ErrorSchema}, tags=["support"]
-)
-@throttle(SalesforceAPIRateThrottle)
+def get_schools(request, school_ids):
+    """
+    School detail payloads by account ID, {id: school}. Hits come from the per-school cache (bumped by the
+    accounts sync); misses are loaded with one IN query and cached with one multi-set, at one "read" token each.
+    """
+    keys = versioned_keys("school", school_ids)
+    cached = cache.get_many(keys.values())
+    schools = {school_id: cached[key] for school_id, key in keys.items() if key in cached}
+
+    misses = [school_id for school_id in school_ids if school_id not in schools]
+    if misses:
+        charge(request, "read", len(misses))
+        loaded = {school.id: _school_payload(school) for school in Account.objects.filter(id__in=misses)}
+        cache.set_many({keys[school_id]: school for school_id, school in loaded.items()}, SCHOOL_CACHE_DURATION)
+        schools.update(loaded)
+    return schools
+
+
+def _submitted_by(request):
+    """Auth info for a FormSubmission record: (auth_type, SSO user uuid or API key name)."""
+    auth_type = getattr(request, "auth_type", "")
+    auth_identifier = ""
+    if auth_type == "sso":
+        auth_identifier = getattr(request, "auth_uuid", "")
+    elif auth_type == "api_key":
+        auth_identifier = getattr(request, "auth_key_name", "")
+    return auth_type, auth_identifier
+
+
 def salesforce_case(request, payload: CaseCreateSchema):
     if not has_scope(request, "write:cases"):
         return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: write:cases"}
+    charge(request, "salesforce")
     from api.models import SFAPIUsageLog
 
     case = Case.objects.create(
@@ -462,13 +646,59 @@ def salesforce_case(request, payload: CaseCreateSchema):
     return case
 
 
+async def salesforce_case_async(request, payload: CaseCreateSchema):
+    if not await sync_to_async(has_scope)(request, "write:cases"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: write:cases"}
+    await sync_to_async(charge)(request, "salesforce")
+    from api.models import SFAPIUsageLog
+
+    case = await Case.objects.acreate(
+        subject=payload.subject,
+        description=payload.description,
+        product=payload.product,
+        feature=payload.feature,
+        issue=payload.issue,
+    )
+    await sync_to_async(SFAPIUsageLog.increment)("api_case_create")
+    return case
+
+
+router.post(
+    "/case", auth=combined_auth, response={200: CaseSchema, possible_error_codes: ErrorSchema}, tags=["support"]
+)(_sync_or_async(salesforce_case, salesforce_case_async))
+
+
+@router.post(
+    "/case/queue",
+    auth=combined_auth,
+    response={202: FormSubmissionResponseSchema, possible_error_codes: ErrorSchema},
+    tags=["support"],
+)
+def queue_salesforce_case(request, payload: CaseCreateSchema):
+    """
+    Queue a Case for the Case outbox (api/forms/outbox.py), which creates it in Salesforce with others in a batch.
+    Returns the submission; the Case id is stored on it as sf_record_id once the Case is created.
+    """
+    if not has_scope(request, "write:cases"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: write:cases"}
+    charge(request, "salesforce")
+    auth_type, auth_identifier = _submitted_by(request)
+    submission = FormSubmission.objects.create(
+        form_type="api_case",
+        data=payload.dict(),
+        status="pending",
+        auth_type=auth_type,
+        auth_identifier=auth_identifier,
+    )
+    return 202, {"id": str(submission.id), "form_type": submission.form_type, "status": submission.status}
+
+
 ######################
 # Contact (Update)  #
 ######################
 @router.put(
     "/contact", auth=combined_auth, response={200: ContactSchema, possible_error_codes: ErrorSchema}, tags=["user"]
 )
-@throttle(SalesforceAPIRateThrottle)
 def update_contact(request, payload: ContactUpdateSchema):
     user_uuid = getattr(request, "auth_uuid", None) or get_logged_in_user_uuid(request)
     if user_uuid is None:
@@ -495,8 +725,10 @@ def update_contact(request, payload: ContactUpdateSchema):
         contact._changed_by = user_uuid
         contact.save()
 
-    # Invalidate cached contact after update
-    cache.delete(f"sfapi:contact:{user_uuid}")
+    # Invalidate cached contact after update; reloading it is the "read" this request is charged
+    bump_generations("contact", [user_uuid])
+    # the caller's next reads must see this change even before it reaches the read replica
+    stick_to_primary(request)
     return get_user_contact(request)
 
 
@@ -509,20 +741,15 @@ form_pipeline = FormPipeline()
 @router.post(
     "/forms/submit",
     auth=combined_auth,
-    response={200: FormSubmissionResponseSchema, 202: FormSubmissionResponseSchema, possible_error_codes: ErrorSchema},
+    response={202: FormSubmissionResponseSchema, possible_error_codes: ErrorSchema},
     tags=["forms"],
 )
 def submit_form(request, payload: FormSubmissionSchema):
+    charge(request, "forms")
     request_time = time.time()
     is_valid, errors = form_pipeline.validate(payload, request_time)
 
-    # Get auth info for the submission record
-    auth_type = getattr(request, "auth_type", "")
-    auth_identifier = ""
-    if auth_type == "sso":
-        auth_identifier = getattr(request, "auth_uuid", "")
-    elif auth_type == "api_key":
-        auth_identifier = getattr(request, "auth_key_name", "")
+    auth_type, auth_identifier = _submitted_by(request)
 
     ip_address = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")[0].strip() or request.META.get("REMOTE_ADDR")
 
@@ -552,20 +779,34 @@ def submit_form(request, payload: FormSubmissionSchema):
         ip_address=ip_address,
     )
 
-    # Process synchronously for now
-    process_submission(submission)
+    # processed by the process_form_submissions workers (api/forms/queue.py), Salesforce is not called here
+    return 202, {"id": str(submission.id), "form_type": submission.form_type, "status": submission.status}
+
+
+##########
+# Export #
+##########
+@router.get("/export/{dataset}", auth=ServiceAuth(), response={possible_error_codes: ErrorSchema}, tags=["export"])
+def export_dataset(request, dataset: str, modified_since: datetime.datetime = None, include_deleted: bool = False):
+    """
+    Stream every row of accounts, contacts, opportunities or adoptions as NDJSON (gzip with Accept-Encoding).
+    API keys only; pass modified_since to get only rows Salesforce modified since then.
+    """
+    if not has_scope(request, "read:export"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:export"}
+
+    model = export.DATASETS.get(dataset)
+    if model is None:
+        return 404, {"code": 404, "detail": f"Unknown dataset. Available: {', '.join(export.DATASETS)}."}
 
-    return {"id": str(submission.id), "form_type": submission.form_type, "status": submission.status}
+    charge(request, "export")
+    return export.stream_export(request, export.export_queryset(model, modified_since, include_deleted), dataset)
 
 
 ########
 # Info #
 ########
-@router.get("/info", auth=combined_auth, response={200: dict, possible_error_codes: ErrorSchema}, tags=["admin"])
-def info(request):
-    if not has_scope(request, "read:info"):
-        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:info"}
-
+def _info_payload(request):
     from sf.api_usage import get_sf_api_usage
 
     used, limit = get_sf_api_usage()
@@ -616,6 +857,7 @@ def info(request):
         key = settings.ENCRYPTION_PRIVATE_KEY.strip()
         sso_config["encryption_key_length"] = len(key)
         sso_config["encryption_key_type"] = "RSA" if "BEGIN" in key else "symmetric"
+    sso_config["decrypt_cache"] = sso.stats()
 
     return {
         "release_information": {
@@ -628,9 +870,68 @@ def info(request):
         "api_usage": api_usage,
         "accounts_api": accounts_api,
         "sso_config": sso_config,
+        "school_typeahead": typeahead.stats(),
+        "database_pools": db_pool.stats(),
+        "audit_log": audit.stats(),
     }
 
 
+def info(request):
+    if not has_scope(request, "read:info"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:info"}
+    return _info_payload(request)
+
+
+async def info_async(request):
+    if not await sync_to_async(has_scope)(request, "read:info"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:info"}
+    # the Salesforce /limits/ call goes through django-salesforce, which is sync-only, so it runs in a thread
+    return await sync_to_async(_info_payload)(request)
+
+
+router.get("/info", auth=combined_auth, response={200: dict, possible_error_codes: ErrorSchema}, tags=["admin"])(
+    _sync_or_async(info, info_async)
+)
+
+
+@router.get(
+    "/info/latency",
+    auth=combined_auth,
+    response={200: LatencyReportSchema, possible_error_codes: ErrorSchema},
+    tags=["admin"],
+)
+def info_latency(
+    request,
+    period: str = "hour",
+    since: datetime.datetime = None,
+    path: str = None,
+    auth_type: str = None,
+    api_key: str = None,
+):
+    """
+    Request counts, error rates and latency percentiles per endpoint, auth type and API key, from the rollups of
+    the request audit log (refreshed every 5 minutes by rollup_request_logs). Defaults to the last 24 hours.
+    """
+    if not has_scope(request, "read:info"):
+        return 401, {"code": 401, "detail": "Insufficient permissions. Required scope: read:info"}
+    if period not in ("hour", "day"):
+        return 422, {"code": 422, "detail": "period must be hour or day"}
+
+    since = since or timezone.now() - datetime.timedelta(days=1)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.timezone.utc)
+    rows = RequestRollup.objects.filter(period=period, bucket_start__gte=rollups.period_start(period, since))
+    if path:
+        rows = rows.filter(path=path)
+    if auth_type:
+        rows = rows.filter(auth_type=auth_type)
+    if api_key:
+        rows = rows.filter(api_key=api_key)
+
+    endpoints = rollups.summarize(rows)
+    return {"period": period, "since": since, "count": len(endpoints), "endpoints": endpoints}
+
+
 # Add the endpoints to the API
 api.add_router("", router)
 
@@ -0,0 +1,146 @@
+"""
+Buffered request audit log.
+
+AuditLogMiddleware hands every /api/ request's RequestLog row to record(), which only puts it on a bounded
+in-process queue. A background thread writes the queue with one bulk_create per AUDIT_LOG_FLUSH_SIZE rows or
+AUDIT_LOG_FLUSH_INTERVAL_MS, whichever comes first, so no API request waits for the INSERT; whatever is still
+queued is written when the worker exits. If the database falls behind and the queue fills up, rows are dropped
+and counted rather than making requests wait.
+
+Successful responses can be sampled per path and status (settings.AUDIT_LOG_SAMPLING). A kept row records the
+rate it was sampled at, so counts can be scaled back up. Responses with status 400 and above are always logged.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("openstax")
+
+_queue = None
+_pid = None
+_stopping = threading.Event()
+_flusher = None
+_lock = threading.Lock()
+_metrics = {"written": 0, "flushes": 0, "dropped": 0, "failed": 0, "sampled_out": 0}
+
+
+def sample_rate(path, status_code):
+    """Share of requests to path answered with status_code that are logged; first matching rule wins."""
+    if status_code >= 400:
+        return 1.0
+    for prefix, statuses, rate in settings.AUDIT_LOG_SAMPLING:
+        if path.startswith(prefix) and (str(status_code) in statuses or f"{status_code // 100}xx" in statuses):
+            return rate
+    return 1.0
+
+
+def record(**fields):
+    """Log one request, unless it is sampled out. Never blocks on the database when AUDIT_LOG_BUFFERED is on."""
+    from api.models import RequestLog
+
+    rate = sample_rate(fields["path"], fields["status_code"])
+    if rate < 1 and random.random() >= rate:  # noqa: S311 — sampling, not security
+        _count("sampled_out")
+        return
+    row = RequestLog(sample_rate=rate, **fields)
+    if not settings.AUDIT_LOG_BUFFERED:
+        _write([row])
+        return
+
+    _ensure_flusher()
+    try:
+        _queue.put_nowait(row)
+    except queue.Full:
+        _count("dropped")
+
+
+def flush():
+    """Write everything queued so far in this thread. Used at shutdown and by tests."""
+    while _queue is not None:
+        batch = _take(settings.AUDIT_LOG_FLUSH_SIZE, wait=0)
+        if not batch:
+            break
+        _write(batch)
+
+
+def stats():
+    """Rows written, dropped and sampled out by this worker, for /info."""
+    with _lock:
+        return {**_metrics, "queued": _queue.qsize() if _queue is not None else 0}
+
+
+def reset():
+    """Forget the queue and zero the metrics. Used by tests."""
+    global _queue, _pid
+    with _lock:
+        _queue, _pid = None, None
+        for metric in _metrics:
+            _metrics[metric] = 0
+
+
+def _count(metric, n=1):
+    with _lock:
+        _metrics[metric] += n
+
+
+def _ensure_flusher():
+    """Start the queue and its flusher thread in this process; a forked worker gets its own."""
+    global _queue, _pid, _flusher
+    if _pid == os.getpid():
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _queue = queue.Queue(maxsize=settings.AUDIT_LOG_QUEUE_SIZE)
+        _stopping.clear()
+        _flusher = threading.Thread(target=_run, name="audit-log-flusher", daemon=True)
+        _flusher.start()
+        _pid = os.getpid()
+    atexit.register(_shutdown)
+
+
+def _take(limit, wait):
+    """Up to limit queued rows, waiting at most wait seconds for them to arrive."""
+    batch, deadline = [], time.monotonic() + wait
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get(timeout=max(deadline - time.monotonic(), 0)) if wait else _queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write(batch):
+    from api.models import RequestLog
+
+    try:
+        RequestLog.objects.bulk_create(batch)
+    except Exception as e:
+        _count("failed", len(batch))
+        logger.warning("Failed to write %d audit log rows: %s", len(batch), e)
+    else:
+        _count("written", len(batch))
+        _count("flushes")
+
+
+def _run():
+    while not _stopping.is_set():
+        batch = _take(settings.AUDIT_LOG_FLUSH_SIZE, wait=settings.AUDIT_LOG_FLUSH_INTERVAL_MS / 1000)
+        if batch:
+            _write(batch)
+            connections.close_all()  # this thread's connection goes back to the pool between flushes
+
+
+def _shutdown():
+    _stopping.set()
+    if _flusher is not None:
+        _flusher.join(timeout=settings.AUDIT_LOG_FLUSH_INTERVAL_MS / 1000 + 5)
+    flush()
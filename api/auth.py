@@ -1,11 +1,24 @@
+import atexit
 import hashlib
+import logging
 import secrets
+import threading
+import time
 
 from django.conf import settings
-from django.db import models
+from django.db import DatabaseError, models
 from django.utils import timezone
 from ninja.security import APIKeyCookie, HttpBearer
-from openstax_accounts.functions import get_logged_in_user_uuid
+
+from . import timing
+from .cache import api_keys_cache
+from .sso import get_logged_in_user_uuid
+
+logger = logging.getLogger(__name__)
+
+# last_used_at is informational, so it is buffered per worker and written in one batched UPDATE at most
+# this often instead of on every authenticated request
+LAST_USED_FLUSH_INTERVAL = 60  # seconds
 
 
 class APIKey(models.Model):
@@ -23,6 +36,11 @@ class APIKey(models.Model):
         help_text="SHA-256 hash of the full key.",
     )
     scopes = models.JSONField(default=list, help_text="List of permission scopes, e.g. ['read:books', 'write:cases'].")
+    rate_limits = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Overrides of settings.RATE_LIMITS for this key, e.g. {'read': '3000/min'}.",
+    )
     is_active = models.BooleanField(default=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     last_used_at = models.DateTimeField(null=True, blank=True)
@@ -67,23 +85,75 @@ class APIKey(models.Model):
 
     @classmethod
     def authenticate(cls, raw_key):
-        """Look up and validate an API key. Returns the APIKey instance or None."""
-        prefix = raw_key[:8]
-        try:
-            api_key = cls.objects.get(key_prefix=prefix, is_active=True)
-        except (cls.DoesNotExist, cls.MultipleObjectsReturned):
-            return None
-
-        if not api_key.verify(raw_key):
-            return None
+        """
+        Look up and validate an API key. Returns the APIKey instance or None.
+        Verified keys are cached by key hash (invalidated by api.signals when a key is edited), so steady-state
+        requests neither read nor write the database; last_used_at is recorded by _LastUsedBuffer.
+        """
+        key_hash = hashlib.sha256(raw_key.encode()).hexdigest()
+        cached = api_keys_cache.get(key_hash)
+        if cached is None:
+            try:
+                api_key = cls.objects.get(key_prefix=raw_key[:8], is_active=True)
+            except (cls.DoesNotExist, cls.MultipleObjectsReturned):
+                return None
+            if not api_key.verify(raw_key):
+                return None
+            cached = {
+                "id": api_key.id,
+                "name": api_key.name,
+                "key_prefix": api_key.key_prefix,
+                "scopes": api_key.scopes,
+                "rate_limits": api_key.rate_limits,
+                "expires_at": api_key.expires_at,
+            }
+            api_keys_cache.set(key_hash, cached)
+
+        api_key = cls(key_hash=key_hash, is_active=True, **cached)
         if api_key.is_expired:
             return None
 
-        api_key.last_used_at = timezone.now()
-        api_key.save(update_fields=["last_used_at"])
+        last_used.touch(api_key.id)
         return api_key
 
 
+class _LastUsedBuffer:
+    """Collects last_used_at per key in memory and writes them in one bulk UPDATE at most once per interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def touch(self, key_id):
+        with self._lock:
+            self._pending[key_id] = timezone.now()
+            due = time.monotonic() - self._flushed_at >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            # bulk_update sends no signals, so this does not invalidate the verified-key cache
+            APIKey.objects.bulk_update(
+                [APIKey(id=key_id, last_used_at=used_at) for key_id, used_at in pending.items()], ["last_used_at"]
+            )
+        except DatabaseError:
+            logger.exception("Failed to record API key last_used_at")
+            return 0
+        return len(pending)
+
+
+last_used = _LastUsedBuffer(LAST_USED_FLUSH_INTERVAL)
+atexit.register(last_used.flush)
+
+
 class SSOAuth(APIKeyCookie):
     """Authenticates via OpenStax Accounts SSO cookie.
     When DEV_USER_UUID is set (local dev only), bypasses cookie validation."""
@@ -98,7 +168,8 @@ class SSOAuth(APIKeyCookie):
             request.auth_scopes = None
             return settings.DEV_USER_UUID
 
-        user_uuid = get_logged_in_user_uuid(request)
+        with timing.measure("auth"):
+            user_uuid = get_logged_in_user_uuid(request)
         if user_uuid is not None:
             request.auth_uuid = user_uuid
             request.auth_type = "sso"
@@ -111,7 +182,8 @@ class ServiceAuth(HttpBearer):
     """Authenticates via API key in Authorization: Bearer header."""
 
     def authenticate(self, request, token):
-        api_key = APIKey.authenticate(token)
+        with timing.measure("auth"):
+            api_key = APIKey.authenticate(token)
         if api_key is not None:
             request.auth_type = "api_key"
             request.auth_scopes = api_key.scopes
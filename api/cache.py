@@ -0,0 +1,195 @@
+"""
+Caching helpers shared by the API.
+
+Generation-based invalidation for per-record caches: cached payloads (contacts, adoptions, schools) embed a
+generation token for their record in the cache key. Syncs bump the generation of exactly the records they
+rewrite, and of the records whose payloads copy them (renaming a school bumps its contacts and adoptions), so
+entries can live for days and are still never served stale after a sync: the next read simply builds a new key.
+
+TieredCache for hot, tiny, global values (school count, book list, super users, pardot config) read on nearly
+every request: a bounded in-process LRU in front of Redis, invalidated across workers by a version key.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Generations must outlive every entry keyed by them, otherwise an expired generation could fall back to
+# the default token and resurrect an entry written before the last bump
+GENERATION_CACHE_DURATION = math.prod([60, 60, 24, 7])  # 7 days
+DEFAULT_GENERATION = "0"
+
+# Keep each Redis pipeline bounded on full syncs
+BUMP_BATCH_SIZE = 1000
+
+
+def _generation_key(namespace, ident):
+    return f"sfapi:gen:{namespace}:{ident}"
+
+
+def get_generation(namespace, ident):
+    """Current generation token for a record, or the default token if it was never bumped."""
+    return cache.get(_generation_key(namespace, ident)) or DEFAULT_GENERATION
+
+
+def versioned_key(namespace, ident):
+    """Cache key for a record's payload, e.g. sfapi:contact:<uuid>:<generation>."""
+    return f"sfapi:{namespace}:{ident}:{get_generation(namespace, ident)}"
+
+
+def versioned_keys(namespace, idents):
+    """versioned_key for many records, reading all their generations in one round trip. Returns {ident: key}."""
+    generation_keys = {ident: _generation_key(namespace, ident) for ident in idents}
+    generations = cache.get_many(generation_keys.values())
+    return {
+        ident: f"sfapi:{namespace}:{ident}:{generations.get(key) or DEFAULT_GENERATION}"
+        for ident, key in generation_keys.items()
+    }
+
+
+def bump_generations(namespace, idents):
+    """
+    Give each record a new generation so its cached payloads are no longer read.
+    Writes are pipelined by the django-redis set_many. Returns the number of generations bumped.
+    """
+    idents = {ident for ident in idents if ident}
+    if not idents:
+        return 0
+
+    token = f"{time.time_ns():x}"
+    idents = list(idents)
+    for i in range(0, len(idents), BUMP_BATCH_SIZE):
+        cache.set_many(
+            {_generation_key(namespace, ident): token for ident in idents[i : i + BUMP_BATCH_SIZE]},
+            GENERATION_CACHE_DURATION,
+        )
+    return len(idents)
+
+
+_MISSING = object()
+
+
+class TieredCache:
+    """
+    A namespace of hot values held in a per-worker LRU (with a short TTL) in front of the default Redis cache.
+
+    The namespace has a version key in Redis that is part of every Redis key it writes. invalidate() bumps
+    it; each worker re-reads the version at most every TIERED_CACHE_CHECK_INTERVAL seconds and drops its
+    local entries when it moved, so an invalidation reaches every worker within that interval while most
+    reads cost no network round trip at all.
+    """
+
+    _instances = []
+
+    def __init__(self, namespace, timeout, local_ttl=60, maxsize=128):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local_ttl = local_ttl
+        self.maxsize = maxsize
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._warmers = []
+        TieredCache._instances.append(self)
+
+    def _version_key(self):
+        return f"sfapi:tier:{self.namespace}:version"
+
+    def _redis_key(self, key, version):
+        return f"sfapi:tier:{self.namespace}:{version}:{key}"
+
+    def _current_version(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < settings.TIERED_CACHE_CHECK_INTERVAL:
+            return self._version
+
+        version = cache.get(self._version_key())
+        if version is None:
+            # a fresh token rather than a constant, so a flushed Redis also flushes every worker's local tier
+            cache.add(self._version_key(), f"{time.time_ns():x}", None)
+            version = cache.get(self._version_key()) or DEFAULT_GENERATION
+        with self._lock:
+            if version != self._version:
+                self._local.clear()
+                self._version = version
+            self._checked_at = now
+        return version
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def get(self, key, default=None):
+        version = self._current_version()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._local.move_to_end(key)
+                return entry[1]
+
+        value = cache.get(self._redis_key(key, version), _MISSING)
+        if value is _MISSING:
+            return default
+        self._store_local(key, value)
+        return value
+
+    def set(self, key, value):
+        cache.set(self._redis_key(key, self._current_version()), value, self.timeout)
+        self._store_local(key, value)
+
+    def get_or_set(self, key, loader):
+        """Return the cached value for key, calling loader() and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self):
+        """Drop every value in the namespace, in this worker now and in the others at their next version check."""
+        version = f"{time.time_ns():x}"
+        cache.set(self._version_key(), version, None)
+        with self._lock:
+            self._local.clear()
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def register_warmer(self, warmer):
+        """Have warm_tiered_caches() call warmer, a function that reads through this cache, at boot."""
+        self._warmers.append(warmer)
+
+    def warm(self):
+        for warmer in self._warmers:
+            warmer()
+
+
+# Syncs invalidate these, so the Redis copies can live for a day
+schools_cache = TieredCache("schools", timeout=math.prod([60, 60, 24]))  # 24 hours
+books_cache = TieredCache("books", timeout=math.prod([60, 60, 24]))  # 24 hours
+superusers_cache = TieredCache("superusers", timeout=math.prod([60, 60, 24]))  # 24 hours
+api_keys_cache = TieredCache("api_keys", timeout=math.prod([60, 60]), maxsize=1024)  # 1 hour
+
+
+def warm_tiered_caches():
+    """
+    Fill every TieredCache before the worker takes traffic. Imports the URLconf first so every module that
+    registers a warmer is loaded. Failures are logged and only cost a cold start.
+    """
+    import_module(settings.ROOT_URLCONF)
+    for tiered in TieredCache._instances:
+        try:
+            tiered.warm()
+        except Exception:
+            logger.exception(f"Warming the {tiered.namespace} cache failed")
@@ -0,0 +1,41 @@
+"""
+Metrics of this worker's database connection pools, for /info.
+
+Pools are configured in settings.DATABASES[...]["OPTIONS"]["pool"] and owned by Django's PostgreSQL backend;
+this only reads the counters psycopg_pool keeps for them. Counters are cumulative since the pool was opened.
+"""
+
+from django.db import connections
+
+
+def _pool_stats(pool):
+    raw = pool.get_stats()  # psycopg_pool omits counters that are still zero
+    size, available = raw.get("pool_size", 0), raw.get("pool_available", 0)
+    queued = raw.get("requests_queued", 0)
+    return {
+        "min_size": raw.get("pool_min", pool.min_size),
+        "max_size": raw.get("pool_max", pool.max_size),
+        "size": size,
+        "in_use": size - available,
+        "idle": available,
+        # connections opened beyond min_size to meet demand, closed again once idle for max_idle
+        "overflow": max(0, size - pool.min_size),
+        "waiting": raw.get("requests_waiting", 0),
+        "checkouts": raw.get("requests_num", 0),
+        "checkouts_waited": queued,
+        "wait_ms_total": raw.get("requests_wait_ms", 0),
+        "wait_ms_avg": round(raw.get("requests_wait_ms", 0) / queued, 2) if queued else None,
+        "checkout_timeouts": raw.get("requests_errors", 0),
+        "failed_health_checks": raw.get("connections_lost", 0),
+        "connection_errors": raw.get("connections_errors", 0),
+    }
+
+
+def stats():
+    """Pool metrics per database alias; aliases without a pool are left out."""
+    pools = {}
+    for alias in connections:
+        if not connections.settings[alias].get("OPTIONS", {}).get("pool"):
+            continue
+        pools[alias] = _pool_stats(connections[alias].pool)
+    return pools
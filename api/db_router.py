@@ -0,0 +1,134 @@
+"""
+Read-replica routing.
+
+When a "replica" database is configured, ReadReplicaMiddleware lets the safe (GET/HEAD) requests of the API and
+the Pardot dashboard read from it, so they stay fast while the syncs bulk-upsert into the primary. Everything
+else, the sync commands included, never touches the replica. Within a request that may read from the replica:
+
+- the first write sends all later reads of that request to the primary (read-your-writes)
+- a caller that just changed its contact (PUT /contact) reads from the primary for REPLICA_STICKY_SECONDS,
+  long enough for the change to replicate
+- if the replica is lagging more than DATABASE_REPLICA_MAX_LAG seconds, or cannot be reached, reads go to
+  the primary
+
+Raw SQL does not go through routers; use read_alias() to pick the connection for read-only queries.
+"""
+
+import hashlib
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_ALIAS = "replica"
+REPLICA_STICKY_SECONDS = 15
+LAG_CHECK_INTERVAL = 5  # seconds; each worker asks the replica for its lag at most this often
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REPLICA_PATHS = ("/api/", "/pardot/")
+
+# 0 when the replica has replayed everything it received; otherwise the age of the last replayed transaction
+_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+_reads_from = ContextVar("sfapi_reads_from", default=None)
+_lag = {"checked_at": float("-inf"), "seconds": float("inf")}
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def replica_lag():
+    """Replication lag in seconds, re-checked at most every LAG_CHECK_INTERVAL; infinite if it cannot be read."""
+    now = time.monotonic()
+    if now - _lag["checked_at"] >= LAG_CHECK_INTERVAL:
+        try:
+            with connections[REPLICA_DB_ALIAS].cursor() as cursor:
+                cursor.execute(_LAG_SQL)
+                seconds = float(cursor.fetchone()[0])
+        except DatabaseError:
+            logger.warning("Could not read the replication lag of the read replica", exc_info=True)
+            seconds = float("inf")
+        _lag.update(checked_at=now, seconds=seconds)
+    return _lag["seconds"]
+
+
+def read_alias():
+    """The database alias reads should use right now: the replica when this request may use it, else the primary."""
+    if _reads_from.get() == REPLICA_DB_ALIAS and replica_lag() <= settings.DATABASE_REPLICA_MAX_LAG:
+        return REPLICA_DB_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+def _sticky_key(request):
+    # the caller's credential identifies it before authentication has run; only its hash is stored
+    credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(settings.SSO_COOKIE_NAME)
+    if not credential:
+        return None
+    return f"sfapi:replica_sticky:{hashlib.sha256(credential.encode()).hexdigest()}"
+
+
+def stick_to_primary(request):
+    """Send this caller's reads to the primary for REPLICA_STICKY_SECONDS, so it sees what it just wrote."""
+    _reads_from.set(DEFAULT_DB_ALIAS)
+    key = _sticky_key(request)
+    if key and replica_configured():
+        cache.set(key, 1, REPLICA_STICKY_SECONDS)
+
+
+def _may_read_replica(request):
+    if not replica_configured() or request.method not in SAFE_METHODS:
+        return False
+    if not request.path.startswith(REPLICA_PATHS):
+        return False
+    key = _sticky_key(request)
+    return not (key and cache.get(key))
+
+
+class ReplicaRouter:
+    """Reads from the replica inside requests ReadReplicaMiddleware allows it for; all writes go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if hasattr(model, "_salesforce_object"):
+            return None  # salesforce.router.ModelRouter
+        return REPLICA_DB_ALIAS if read_alias() == REPLICA_DB_ALIAS else None
+
+    def db_for_write(self, model, **hints):
+        if hasattr(model, "_salesforce_object"):
+            return None
+        if _reads_from.get() is not None:
+            _reads_from.set(DEFAULT_DB_ALIAS)
+        # also covers saving an instance that was read from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == REPLICA_DB_ALIAS else None
+
+
+class ReadReplicaMiddleware:
+    """Marks the requests whose reads may be served by the replica; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _reads_from.set(REPLICA_DB_ALIAS if _may_read_replica(request) else DEFAULT_DB_ALIAS)
+        try:
+            return self.get_response(request)
+        finally:
+            _reads_from.reset(token)
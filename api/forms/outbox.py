@@ -0,0 +1,54 @@
+"""
+Case outbox: creates the Salesforce Cases of queued submissions (web_to_case, contact_us, POST /case/queue) in batches.
+
+Each form type's claimed submissions go to Salesforce in sObject Collections requests of up to BATCH_SIZE Cases,
+one API call and one SFAPIUsageLog count per request instead of per Case. Requests are sent with allOrNone=false,
+so a Case Salesforce rejects fails (and is retried) on its own while the rest of the batch is created; each
+created Case's id is stored on its FormSubmission.sf_record_id.
+"""
+
+from collections import defaultdict
+
+from django.utils import timezone
+
+from api.models import FormSubmission
+from sf.collections import BATCH_SIZE, sobject, sobject_collections
+
+from .processors import ATTEMPT_FIELDS, CASE_BUILDERS, begin_attempt, record_failure, record_success
+
+
+def create_cases(cases, usage_source):
+    """Create up to BATCH_SIZE Cases with one request. Returns an (id, error) pair per case, in order."""
+    return sobject_collections("POST", [sobject(case) for case in cases], usage_source)
+
+
+def flush(submissions):
+    """Make one attempt at these claimed Case submissions and record each one's outcome."""
+    now = timezone.now()
+    by_type = defaultdict(list)
+    for submission in submissions:
+        begin_attempt(submission, now)
+        by_type[submission.form_type].append(submission)
+
+    for form_type, pending in by_type.items():
+        usage_source, build = CASE_BUILDERS[form_type]
+        built = []
+        for submission in pending:
+            # a submission whose data cannot make a Case fails on its own, the rest are still sent
+            try:
+                built.append((submission, build(submission.data)))
+            except Exception as e:
+                record_failure(submission, e, now)
+        for start in range(0, len(built), BATCH_SIZE):
+            batch = built[start : start + BATCH_SIZE]
+            try:
+                results = create_cases([case for _, case in batch], usage_source)
+            except Exception as e:
+                results = [(None, e)] * len(batch)
+            for (submission, _), (case_id, error) in zip(batch, results, strict=True):
+                if error is None:
+                    record_success(submission, case_id)
+                else:
+                    record_failure(submission, error, now)
+
+    FormSubmission.objects.bulk_update(submissions, ATTEMPT_FIELDS)
@@ -18,6 +18,9 @@ DISPOSABLE_EMAIL_DOMAINS = frozenset(
     ]
 )
 
+# Form types only POST /case/queue creates, which requires the write:cases scope
+RESERVED_FORM_TYPES = frozenset(["api_case"])
+
 
 class FormPipeline:
     """Validates form submissions and detects spam."""
@@ -50,6 +53,8 @@ class FormPipeline:
         # Basic data validation
         if not payload.form_type:
             errors.append("form_type is required")
+        elif payload.form_type in RESERVED_FORM_TYPES:
+            errors.append(f"form_type {payload.form_type} cannot be submitted as a form")
 
         if not payload.data:
             errors.append("data is required")
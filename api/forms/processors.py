@@ -1,14 +1,24 @@
+import datetime
 import logging
 
 from django.utils import timezone
 
 from sf.models.case import Case
 
+from .queue import MAX_ATTEMPTS, retry_delay
+
 logger = logging.getLogger("openstax")
 
 # Registry of form processors keyed by form_type
 PROCESSORS = {}
 
+# Form types that become a Salesforce Case, keyed by form_type: (SFAPIUsageLog source, builder). Their submissions
+# are sent to Salesforce by the Case outbox (api/forms/outbox.py), many Cases per API call.
+CASE_BUILDERS = {}
+
+# FormSubmission fields an attempt changes
+ATTEMPT_FIELDS = ["status", "attempts", "processed_at", "next_attempt_at", "error_message", "sf_record_id"]
+
 
 def register_processor(form_type):
     """Decorator to register a form processor function."""
@@ -20,60 +30,100 @@ def register_processor(form_type):
     return decorator
 
 
+def register_case_builder(form_type, usage_source):
+    """Decorator to register a function that builds the (unsaved) Case for a form's data."""
+
+    def decorator(func):
+        CASE_BUILDERS[form_type] = (usage_source, func)
+        return func
+
+    return decorator
+
+
+def begin_attempt(submission, now):
+    submission.attempts += 1
+    submission.processed_at = now
+    submission.next_attempt_at = None
+
+
+def record_success(submission, sf_record_id):
+    submission.status = "completed"
+    submission.sf_record_id = sf_record_id or ""
+
+
+def record_failure(submission, error, now):
+    """Schedule a retry with backoff, or dead-letter the submission once it has used up its attempts."""
+    logger.error(
+        f"Form processing failed for {submission.id} (attempt {submission.attempts}): {error}",
+        exc_info=isinstance(error, Exception),
+    )
+    submission.error_message = str(error)[:1000]
+    if submission.attempts >= MAX_ATTEMPTS:
+        submission.status = "dead"
+    else:
+        submission.status = "failed"
+        submission.next_attempt_at = now + datetime.timedelta(seconds=retry_delay(submission.attempts))
+
+
 def process_submission(submission):
     """
-    Process a FormSubmission by dispatching to the appropriate processor.
-    Updates the submission status and sf_record_id.
+    Make one attempt at a FormSubmission by dispatching to the appropriate processor.
+    On success the submission is completed with its sf_record_id; a failed attempt is scheduled for a retry
+    with backoff, or dead-lettered once it has used up its attempts. Unknown form types are dead-lettered at once.
     """
+    if submission.form_type in CASE_BUILDERS:
+        from .outbox import flush
+
+        flush([submission])
+        return
+
+    now = timezone.now()
+    begin_attempt(submission, now)
+
     processor = PROCESSORS.get(submission.form_type)
     if processor is None:
-        submission.status = "failed"
+        submission.status = "dead"
         submission.error_message = f"Unknown form type: {submission.form_type}"
-        submission.processed_at = timezone.now()
-        submission.save(update_fields=["status", "error_message", "processed_at"])
+        submission.save(update_fields=ATTEMPT_FIELDS)
         return
 
-    submission.status = "processing"
-    submission.save(update_fields=["status"])
-
     try:
         sf_record_id = processor(submission.data)
-        submission.status = "completed"
-        submission.sf_record_id = sf_record_id or ""
-        submission.processed_at = timezone.now()
-        submission.save(update_fields=["status", "sf_record_id", "processed_at"])
     except Exception as e:
-        logger.exception(f"Form processing failed for {submission.id}: {e}")
-        submission.status = "failed"
-        submission.error_message = str(e)[:1000]
-        submission.processed_at = timezone.now()
-        submission.save(update_fields=["status", "error_message", "processed_at"])
+        record_failure(submission, e, now)
+    else:
+        record_success(submission, sf_record_id)
+    submission.save(update_fields=ATTEMPT_FIELDS)
 
 
-@register_processor("web_to_case")
+@register_case_builder("web_to_case", usage_source="form_web_to_case")
 def process_web_to_case(data):
-    """Create a Salesforce Case from form data."""
-    from api.models import SFAPIUsageLog
-
-    case = Case.objects.create(
+    """Build a Salesforce Case from form data."""
+    return Case(
         subject=data.get("subject", ""),
         description=data.get("description", ""),
         product=data.get("product"),
         feature=data.get("feature"),
         issue=data.get("issue"),
     )
-    SFAPIUsageLog.increment("form_web_to_case")
-    return case.pk
 
 
-@register_processor("contact_us")
+@register_case_builder("contact_us", usage_source="form_contact_us")
 def process_contact_us(data):
-    """Create a Salesforce Case from a contact us form."""
-    from api.models import SFAPIUsageLog
-
-    case = Case.objects.create(
+    """Build a Salesforce Case from a contact us form."""
+    return Case(
         subject=f"Contact Us: {data.get('subject', 'General Inquiry')}",
         description=data.get("message", ""),
     )
-    SFAPIUsageLog.increment("form_contact_us")
-    return case.pk
+
+
+@register_case_builder("api_case", usage_source="api_case_create")
+def process_api_case(data):
+    """Build a Salesforce Case from a POST /case/queue payload."""
+    return Case(
+        subject=data["subject"],
+        description=data["description"],
+        product=data.get("product"),
+        feature=data.get("feature"),
+        issue=data.get("issue"),
+    )
@@ -0,0 +1,79 @@
+"""
+Database-backed work queue over FormSubmission.
+
+POST /forms/submit only stores the submission; process_form_submissions workers (any number of them, in any
+number of processes) claim and process it:
+
+- claim() takes ready rows with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never claim the same
+  submission, and marks them processing. Salesforce is called after that transaction has committed.
+- Each form type has at most settings.FORM_QUEUE_CONCURRENCY[form_type] Salesforce requests in flight across
+  all workers: as many submissions, or as many outbox batches for forms that create Cases (api/forms/outbox.py).
+  Claims of one type are serialized with a transaction-level advisory lock to keep the count exact.
+- A failed attempt is retried after an exponential backoff; after MAX_ATTEMPTS the submission is dead-lettered.
+- A submission whose worker died mid-attempt is claimed again once its LEASE has run out.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import FormSubmission
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30  # seconds before the first retry, doubling with every attempt
+BACKOFF_MAX = 60 * 60  # 1 hour
+LEASE = datetime.timedelta(minutes=5)  # far longer than a Salesforce request can take
+DEFAULT_CONCURRENCY = 4
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the given number of failed attempts."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def concurrency(form_type):
+    """Submissions of form_type that may be processing at once."""
+    from .outbox import BATCH_SIZE
+    from .processors import CASE_BUILDERS
+
+    requests = settings.FORM_QUEUE_CONCURRENCY.get(form_type, DEFAULT_CONCURRENCY)
+    return requests * BATCH_SIZE if form_type in CASE_BUILDERS else requests
+
+
+def _ready(now):
+    return Q(status__in=["pending", "failed"], next_attempt_at__lte=now) | Q(
+        status="processing", claimed_at__lte=now - LEASE
+    )
+
+
+def claim(limit, form_types=None):
+    """Claim up to limit ready submissions for this worker, oldest due first. Returns them marked processing."""
+    now = timezone.now()
+    ready = FormSubmission.objects.filter(_ready(now))
+    if form_types:
+        ready = ready.filter(form_type__in=form_types)
+
+    claimed = []
+    for form_type in ready.values_list("form_type", flat=True).distinct().order_by():
+        if len(claimed) >= limit:
+            break
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"form_queue:{form_type}"])
+            in_flight = FormSubmission.objects.filter(
+                form_type=form_type, status="processing", claimed_at__gt=now - LEASE
+            ).count()
+            room = min(concurrency(form_type) - in_flight, limit - len(claimed))
+            if room <= 0:
+                continue
+            rows = list(
+                ready.filter(form_type=form_type).select_for_update(skip_locked=True).order_by("next_attempt_at")[:room]
+            )
+            FormSubmission.objects.filter(pk__in=[row.pk for row in rows]).update(status="processing", claimed_at=now)
+        for row in rows:
+            row.status, row.claimed_at = "processing", now
+        claimed += rows
+    return claimed
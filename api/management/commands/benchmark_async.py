@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from openstax_accounts.strategy_2 import Payload
+
+from api import api_v1
+from api.accounts_client import accounts_client
+
+
+class _SlowAccounts(BaseHTTPRequestHandler):
+    """Stands in for the Accounts users API, answering every lookup after a fixed delay."""
+
+    latency = 0.2
+
+    def do_GET(self):  # noqa: N802 - BaseHTTPRequestHandler naming
+        time.sleep(self.latency)
+        body = json.dumps({"items": [{"faculty_status": "confirmed_faculty"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 would make the upstream, not the view, the bottleneck for concurrent clients
+    request_queue_size = 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-process throughput of the sync (WSGI) and async (ASGI) /me views while the Accounts API is "
+        "slow. Every request is a cold cache miss, so each one waits on the simulated upstream."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per run (default: 200)")
+        parser.add_argument("--latency-ms", type=int, default=200, help="Simulated Accounts latency (default: 200)")
+        parser.add_argument(
+            "--threads",
+            type=int,
+            nargs="+",
+            default=[1, 4],
+            help="WSGI worker thread counts to measure, e.g. gunicorn sync (1) and gthread (default: 1 4)",
+        )
+
+    def handle(self, *args, **options):
+        _SlowAccounts.latency = options["latency_ms"] / 1000
+        server = _Server(("127.0.0.1", 0), _SlowAccounts)
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        accounts_client._token, accounts_client._token_expires_at = "benchmark", time.time() + 3600
+        factory = RequestFactory()
+
+        def make_requests():
+            # a new UUID per request (and per run) so every lookup misses the cache
+            requests = []
+            for _ in range(options["requests"]):
+                request = factory.get("/api/v1/me")
+                request.COOKIES["oxa"] = str(uuid.uuid4())
+                requests.append(request)
+            return requests
+
+        def payload_for(cookie):
+            return Payload({"sub": {"uuid": cookie, "id": 1, "name": "Benchmark"}})
+
+        self.stdout.write(
+            f"{options['requests']} requests per run, Accounts latency {options['latency_ms']} ms, one process\n"
+        )
+        with (
+            override_settings(
+                USERS_QUERY=f"http://127.0.0.1:{server.server_port}/api/users?", SSO_COOKIE_NAME="oxa", DEV_USER_UUID=""
+            ),
+            patch("api.api_v1.decrypt_cookie", side_effect=payload_for),
+        ):
+            for threads in options["threads"]:
+                requests = make_requests()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    list(pool.map(api_v1.me, requests))
+                self._report(f"WSGI, {threads} thread(s)", len(requests), time.perf_counter() - started)
+
+            requests = make_requests()
+
+            async def run_async():
+                return await asyncio.gather(*(api_v1.me_async(request) for request in requests))
+
+            started = time.perf_counter()
+            asyncio.run(run_async())
+            self._report("ASGI, 1 event loop", len(requests), time.perf_counter() - started)
+
+        server.shutdown()
+
+    def _report(self, label, count, elapsed):
+        self.stdout.write(f"{label:<22} {count / elapsed:8.1f} req/s  ({elapsed:.2f}s)")
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import Client, override_settings
+
+from api.db_pool import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare API latency with a new database connection per request against the connection pool. Requests go "
+        "through the full middleware stack, and connections are released after each one as the WSGI handler does."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Endpoint to request, may be repeated (default: school search and typeahead)",
+        )
+        parser.add_argument("--requests", type=int, default=500, help="Requests per run (default: 500)")
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent clients (default: 8)")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/api/v1/schools?name=university", "/api/v1/schools/suggest?q=uni"]
+        threads, count = options["threads"], options["requests"]
+        db_options = connections.settings[DEFAULT_DB_ALIAS]["OPTIONS"]
+        configured = db_options.get("pool")
+        pool = configured or {"min_size": threads, "max_size": threads}
+
+        self.stdout.write(f"{count} requests per run over {threads} threads: {', '.join(paths)}\n")
+        self.stdout.write(f"{'':<28}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+        # reads are charged against the rate limiter, which must not turn the runs into 429s
+        unlimited = {budget: "1000000/min" for budget in ("read", "salesforce", "forms", "export")}
+        with override_settings(ALLOWED_HOSTS=["testserver"], RATE_LIMITS=unlimited):
+            try:
+                for label, pool_options in (("new connection per request", None), ("connection pool", pool)):
+                    self._configure(db_options, pool_options)
+                    self._run(paths, threads, threads * 2)  # warm up caches and fill the pool
+                    timings, elapsed = self._run(paths, threads, count)
+                    self._report(label, timings, elapsed)
+                    if pool_options:
+                        self.stdout.write(f"\npool after the run: {stats()[DEFAULT_DB_ALIAS]}")
+            finally:
+                self._configure(db_options, configured)
+
+    def _configure(self, db_options, pool_options):
+        connections[DEFAULT_DB_ALIAS].close()
+        connections[DEFAULT_DB_ALIAS].close_pool()
+        if pool_options:
+            db_options["pool"] = pool_options
+        else:
+            db_options.pop("pool", None)
+
+    def _run(self, paths, threads, count):
+        def client_loop(n):
+            client, timings = Client(), []
+            for i in range(n):
+                started = time.perf_counter()
+                client.get(paths[i % len(paths)])
+                # what the WSGI handler does when a response is finished: close, or return to the pool
+                close_old_connections()
+                timings.append((time.perf_counter() - started) * 1000)
+            connections.close_all()
+            return timings
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            per_thread = list(executor.map(client_loop, [count // threads] * threads))
+        return sorted(t for timings in per_thread for t in timings), time.perf_counter() - started
+
+    def _report(self, label, timings, elapsed):
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(f"{label:<28}{p50:>9.2f}{p99:>9.2f}{len(timings) / elapsed:>9.1f}")
@@ -0,0 +1,133 @@
+import datetime
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ninja.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer, render_json
+from api.schemas import AccountsSchema, AdoptionsSchema
+
+
+def _schools(count):
+    return {
+        "count": count,
+        "total_schools": 120000,
+        "next_cursor": None,
+        "schools": [
+            {
+                "id": f"001{i:015d}",
+                "name": f"School of Example Studies {i}",
+                "type": "College/University (4)",
+                "country": "United States",
+                "state": "Texas",
+                "city": "Houston",
+                "lms": "Canvas",
+                "sheer_id_school_name": f"Example School {i}",
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _adoptions(count):
+    now = timezone.now()
+    return {
+        "count": count,
+        "contact_id": "003000000000001",
+        "first_year_adopting_openstax": 2015,
+        "total_students": 40 * count,
+        "total_savings": 4000.5 * count,
+        "adoptions": [
+            {
+                "id": f"a0A{i:015d}",
+                "book": {
+                    "id": "a0B000000000001",
+                    "name": "Physics",
+                    "official_name": "College Physics 2e",
+                    "type": "Textbook",
+                    "subject_areas": "Science",
+                    "website_url": "https://openstax.org/details/books/college-physics-2e",
+                },
+                "base_year": 2015 + i % 10,
+                "school_year": "2024 - 25",
+                "school": "Rice University",
+                "confirmation_type": "OpenStax Confirmed Adoption",
+                "students": 40,
+                "savings": 4000.5,
+                "how_using": "As the core textbook for my course",
+                "confirmation_date": datetime.date(2024, 9, 1),
+            }
+            for i in range(count)
+        ],
+        "cache_create": now,
+        "cache_expire": now,
+    }
+
+
+def _pardot_assets(count):
+    # shaped like /pardot/assets/{type}: untyped dicts with dates, decimals and nested lists
+    now = timezone.now()
+    return {
+        "asset_type": "forms",
+        "total": count,
+        "items": [
+            {
+                "id": i,
+                "name": f"Form {i}",
+                "created_at": now,
+                "updated_at": now,
+                "submissions": i * 3,
+                "conversion_rate": Decimal("0.125"),
+                "flags": ["no_campaign", "stale"] if i % 3 else [],
+                "folder": {"id": i % 40, "path": f"/Marketing/Folder {i % 40}"},
+            }
+            for i in range(count)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare response rendering on large payloads: ninja's stdlib JSONRenderer, the orjson renderer, and "
+        "validating + rendering against serving pre-rendered bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Rows per payload (default: 5000)")
+        parser.add_argument("--repeat", type=int, default=20, help="Renders per measurement (default: 20)")
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        stdlib, fast = JSONRenderer(), ORJSONRenderer()
+        payloads = [
+            ("/schools", _schools(rows), AccountsSchema),
+            ("/adoptions", _adoptions(rows), AdoptionsSchema),
+            ("/pardot/assets/{type}", _pardot_assets(rows), None),
+        ]
+
+        self.stdout.write(f"{rows} rows per payload, median of {repeat} runs, ms per response\n")
+        self.stdout.write(f"{'payload':<24}{'stdlib':>10}{'orjson':>10}{'speedup':>9}{'validate+orjson':>17}")
+        for name, data, schema in payloads:
+            if schema is not None:
+                data = schema.model_validate(data).model_dump()
+            stdlib_ms = self._measure(repeat, stdlib.render, None, data, response_status=200)
+            fast_ms = self._measure(repeat, fast.render, None, data, response_status=200)
+            # untyped Pardot payloads have no response schema to validate against
+            validated = f"{self._measure(repeat, render_json, data, schema):.2f}" if schema else "n/a"
+            self.stdout.write(
+                f"{name:<24}{stdlib_ms:>10.2f}{fast_ms:>10.2f}{stdlib_ms / fast_ms:>8.1f}x{validated:>17}"
+            )
+        self.stdout.write(
+            "\nA pre-rendered response read from the cache costs neither column; validate+orjson is what a cache "
+            "miss of a pre-rendering endpoint pays once."
+        )
+
+    def _measure(self, repeat, fn, *args, **kwargs):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn(*args, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2]
@@ -3,38 +3,64 @@ from datetime import timedelta
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from api.models import FieldChangeLog, RequestLog
+from api import partitions
+from api.models import RequestProfile, RequestRollup
 
 
 class Command(BaseCommand):
-    help = "Clean up old audit logs. Prunes request logs older than 90 days and field change logs older than 1 year."
+    help = (
+        "Clean up old audit logs. Drops the monthly partitions of request logs older than 90 days and of field change "
+        "logs older than 1 year, and creates the partitions of the coming months. Hourly latency rollups go with the "
+        "request logs; daily ones are kept. Expired request profiles are deleted."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
-            "--request-days", type=int, default=90, help="Delete request logs older than N days (default: 90)"
+            "--request-days", type=int, default=90, help="Drop request logs older than N days (default: 90)"
         )
         parser.add_argument(
-            "--change-days", type=int, default=365, help="Delete field change logs older than N days (default: 365)"
+            "--change-days", type=int, default=365, help="Drop field change logs older than N days (default: 365)"
         )
-        parser.add_argument("--dry-run", action="store_true", help="Show what would be deleted without deleting")
+        parser.add_argument(
+            "--detach", action="store_true", help="Detach old partitions and keep them as tables, e.g. to archive"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Show what would be dropped without dropping")
 
     def handle(self, *args, **options):
-        request_cutoff = timezone.now() - timedelta(days=options["request_days"])
-        change_cutoff = timezone.now() - timedelta(days=options["change_days"])
+        now = timezone.now()
+        retention = {
+            "api_requestlog": ("request logs", options["request_days"]),
+            "api_fieldchangelog": ("field change logs", options["change_days"]),
+        }
 
-        request_count = RequestLog.objects.filter(timestamp__lt=request_cutoff).count()
-        change_count = FieldChangeLog.objects.filter(timestamp__lt=change_cutoff).count()
+        summary = []
+        for table, (label, days) in retention.items():
+            # a partition goes only once all of its month is past the cutoff, so rows are kept up to a month longer
+            expired = partitions.expired_partitions(table, now - timedelta(days=days))
+            rows = sum(estimate for _, estimate in expired)
+            if options["dry_run"]:
+                names = ", ".join(name for name, _ in expired) or "none"
+                self.stdout.write(f"Would drop ~{rows} {label} older than {days} days (partitions: {names})")
+                continue
+            for name, _ in expired:
+                partitions.drop_partition(table, name, detach=options["detach"])
+            created = partitions.create_partitions(table, now)
+            if created:
+                self.stdout.write(f"Created partitions {', '.join(created)}")
+            summary.append(f"{len(expired)} partitions (~{rows} rows) of {label}")
 
+        hourly = RequestRollup.objects.filter(
+            period="hour", bucket_start__lt=now - timedelta(days=options["request_days"])
+        )
+        profiles = RequestProfile.objects.filter(expires_at__lt=now)
         if options["dry_run"]:
-            self.stdout.write(f"Would delete {request_count} request logs older than {options['request_days']} days")
-            self.stdout.write(f"Would delete {change_count} field change logs older than {options['change_days']} days")
+            self.stdout.write(f"Would delete {hourly.count()} hourly request rollups")
+            self.stdout.write(f"Would delete {profiles.count()} expired request profiles")
             return
 
-        if request_count:
-            RequestLog.objects.filter(timestamp__lt=request_cutoff).delete()
-        if change_count:
-            FieldChangeLog.objects.filter(timestamp__lt=change_cutoff).delete()
-
-        self.stdout.write(
-            self.style.SUCCESS(f"Cleaned up {request_count} request logs and {change_count} field change logs")
-        )
+        deleted, _ = hourly.delete()
+        expired_profiles, _ = profiles.delete()
+        action = "Detached" if options["detach"] else "Dropped"
+        self.stdout.write(self.style.SUCCESS(f"{action} {' and '.join(summary)}"))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} hourly request rollups"))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {expired_profiles} expired request profiles"))
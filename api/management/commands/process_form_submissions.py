@@ -0,0 +1,63 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.forms import outbox, queue
+from api.forms.processors import CASE_BUILDERS, process_submission
+from api.models import FormSubmission
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued form submissions. Runs until stopped (SIGTERM/SIGINT finish the current submission "
+        "first); start as many processes as needed, they never pick up the same submission."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=outbox.BATCH_SIZE,
+            help=f"Submissions claimed at a time (default: {outbox.BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=2, help="Seconds to wait when the queue is empty (default: 2)"
+        )
+        parser.add_argument("--form-type", action="append", dest="form_types", help="Only process this form type")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained, e.g. from cron")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        processed = 0
+        while not self._stopping:
+            batch = queue.claim(options["batch_size"], options["form_types"])
+            # Cases go to Salesforce together, up to outbox.BATCH_SIZE per API call
+            cases = [submission for submission in batch if submission.form_type in CASE_BUILDERS]
+            if cases:
+                outbox.flush(cases)
+                processed += len(cases)
+            others = [submission for submission in batch if submission.form_type not in CASE_BUILDERS]
+            for i, submission in enumerate(others):
+                if self._stopping:
+                    # hand back what this worker claimed but will not process, instead of waiting for the lease
+                    unprocessed = [queued.pk for queued in others[i:]]
+                    FormSubmission.objects.filter(pk__in=unprocessed).update(status="pending", claimed_at=None)
+                    break
+                process_submission(submission)
+                processed += 1
+            if not batch:
+                if options["once"]:
+                    break
+                close_old_connections()  # drop a connection that went bad while the queue was idle
+                time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} form submissions"))
+
+    def _stop(self, signum, frame):
+        self._stopping = True
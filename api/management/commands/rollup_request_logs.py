@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold the request logs added since the last run into the hourly and daily latency rollups served by "
+        "/info/latency. Safe to run at any time; concurrent runs wait for each other."
+    )
+
+    def handle(self, *args, **options):
+        folded = rollups.fold()
+        self.stdout.write(self.style.SUCCESS(f"Folded {folded} request logs into rollups"))
@@ -1,10 +1,97 @@
 import time
 
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
+from api import profiler, timing
+
+
+def get_auth_identifier(request):
+    auth_type = getattr(request, "auth_type", "")
+    if auth_type == "sso":
+        return getattr(request, "auth_uuid", "")
+    if auth_type == "api_key":
+        return getattr(request, "auth_key_name", "")
+    return ""
+
+
+class ProfilerMiddleware(MiddlewareMixin):
+    """
+    Samples the call stacks of /api/ requests flagged with ?profile=1 or X-Profile: 1 (api/profiler.py), and
+    stores the profile for super users and API keys with read:info.
+    """
+
+    def process_request(self, request):
+        if request.path.startswith("/api/") and profiler.requested(request) and self._may_profile(request):
+            request._profile_start_time = time.monotonic()
+            request._profiler = profiler.start()
+
+    def _may_profile(self, request):
+        """
+        Whether the caller is a super user or has an API key with read:info, checked like combined_auth does (SSO
+        first, then the bearer key) before the view runs, so nobody else can take the sampling slot.
+        """
+        from api import auth
+        from api.models import SuperUser
+
+        if settings.DEV_USER_UUID or request.COOKIES.get(settings.SSO_COOKIE_NAME):
+            user_uuid = settings.DEV_USER_UUID or auth.get_logged_in_user_uuid(request)
+            if user_uuid is not None:
+                return SuperUser.is_super_user(user_uuid)
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            return False
+        api_key = auth.APIKey.authenticate(token.strip())
+        return api_key is not None and "read:info" in (api_key.scopes or [])
+
+    def process_response(self, request, response):
+        sampler = getattr(request, "_profiler", None)
+        if sampler is None:
+            return response
+        profiler.stop(sampler)
+
+        from api.auth import has_scope
+
+        if has_scope(request, "read:info"):
+            duration_ms = int((time.monotonic() - request._profile_start_time) * 1000)
+            profile = profiler.save(sampler, request, response, duration_ms, get_auth_identifier(request))
+            response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+
+class ServerTimingMiddleware(MiddlewareMixin):
+    """
+    Measures the database, Redis, Salesforce and auth time of each /api/ request (api/timing.py). The totals go
+    into the request's RequestLog row, and into a Server-Timing header for super users or when
+    settings.SERVER_TIMING_ENABLED is on.
+    """
+
+    def process_request(self, request):
+        if request.path.startswith("/api/"):
+            request._timings, request._timings_token = timing.start()
+
+    def process_response(self, request, response):
+        token = getattr(request, "_timings_token", None)
+        if token is None:
+            return response
+        try:
+            timing.stop(token)
+        except ValueError:
+            pass  # reset from another context (ASGI), the context goes away with the request anyway
+        if settings.SERVER_TIMING_ENABLED or self._is_super_user(request):
+            response["Server-Timing"] = request._timings.header()
+        return response
+
+    def _is_super_user(self, request):
+        if getattr(request, "auth_type", None) != "sso":
+            return False
+        from api.models import SuperUser
+
+        return SuperUser.is_super_user(getattr(request, "auth_uuid", None))
+
 
 class AuditLogMiddleware(MiddlewareMixin):
-    """Logs all /api/ requests to the RequestLog model after response."""
+    """Logs all /api/ requests to the RequestLog model after response, through the buffer in api/audit.py."""
 
     def process_request(self, request):
         request._audit_start_time = time.monotonic()
@@ -20,32 +107,25 @@ class AuditLogMiddleware(MiddlewareMixin):
         duration_ms = int((time.monotonic() - request._audit_start_time) * 1000)
 
         try:
-            from api.models import RequestLog
+            from api import audit
 
-            RequestLog.objects.create(
+            audit.record(
                 method=request.method,
                 path=request.path,
                 query_params=dict(request.GET),
                 auth_type=getattr(request, "auth_type", ""),
-                auth_identifier=self._get_auth_identifier(request),
+                auth_identifier=get_auth_identifier(request),
                 status_code=response.status_code,
                 duration_ms=duration_ms,
                 ip_address=self._get_client_ip(request),
                 user_agent=request.META.get("HTTP_USER_AGENT", "")[:512],
+                **(request._timings.log_fields() if hasattr(request, "_timings") else {}),
             )
         except Exception:  # noqa: S110
             pass  # Never let audit logging break the response
 
         return response
 
-    def _get_auth_identifier(self, request):
-        auth_type = getattr(request, "auth_type", "")
-        if auth_type == "sso":
-            return getattr(request, "auth_uuid", "")
-        if auth_type == "api_key":
-            return getattr(request, "auth_key_name", "")
-        return ""
-
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
         if x_forwarded_for:
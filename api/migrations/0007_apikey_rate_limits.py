@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_sfapiusagelog"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apikey",
+            name="rate_limits",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Overrides of settings.RATE_LIMITS for this key, e.g. {'read': '3000/min'}.",
+            ),
+        ),
+    ]
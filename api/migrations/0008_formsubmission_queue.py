@@ -0,0 +1,60 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_apikey_rate_limits"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="formsubmission",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("completed", "Completed"),
+                    ("failed", "Failed"),
+                    ("dead", "Dead letter"),
+                    ("spam", "Spam"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="formsubmission",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="formsubmission",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=django.utils.timezone.now,
+                help_text="When a worker may pick this up (again).",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="formsubmission",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, help_text="When a worker started processing it.", null=True),
+        ),
+        # rows that were already finished are not waiting for anything
+        migrations.RunSQL(
+            "UPDATE api_formsubmission SET next_attempt_at = NULL WHERE status IN ('completed', 'failed', 'spam')",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="formsubmission",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "failed", "processing"])),
+                fields=["next_attempt_at"],
+                name="idx_formsub_queue",
+            ),
+        ),
+    ]
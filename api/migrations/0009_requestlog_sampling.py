@@ -0,0 +1,21 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_formsubmission_queue"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="requestlog",
+            name="timestamp",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="sample_rate",
+            field=models.FloatField(default=1.0, help_text="Share of matching requests logged; 1 unless sampled."),
+        ),
+    ]
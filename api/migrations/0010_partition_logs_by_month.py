@@ -0,0 +1,116 @@
+"""
+Turn api_requestlog and api_fieldchangelog into tables range-partitioned by month on timestamp (see api/partitions.py).
+
+Existing rows are not copied: the old table becomes the "<table>_legacy" partition, holding everything before next
+month (or the month after its newest row), and monthly partitions follow it, then a DEFAULT partition for rows past
+the last of them. cleanup_logs drops the legacy partition once all of it is past retention. Partitioned tables need the partition key in the
+primary key, so it becomes (id, timestamp); ids still come from one sequence, so id alone stays unique as the
+models expect. Migrating back copies every row into plain tables again.
+"""
+
+import datetime
+
+from django.db import migrations
+
+TABLES = ["api_requestlog", "api_fieldchangelog"]
+MONTHS_AHEAD = 3
+
+
+def _next_month(value):
+    return (value.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def partition_by_month(apps, schema_editor):
+    connection = schema_editor.connection
+    now = datetime.datetime.now(datetime.timezone.utc)
+    next_month = _next_month(datetime.datetime(now.year, now.month, 1, tzinfo=datetime.timezone.utc))
+
+    for table in TABLES:
+        legacy = f"{table}_legacy"
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX("timestamp") FROM "{table}"')  # noqa: S608
+            newest = cursor.fetchone()[0]
+        # the legacy partition has to hold every existing row, even one stamped in the future
+        if newest:
+            newest = newest.astimezone(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        first_month = max(next_month, _next_month(newest)) if newest else next_month
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index "
+                "WHERE indrelid = %s::regclass AND NOT indisprimary",
+                [table],
+            )
+            indexes = cursor.fetchall()
+        schema_editor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        # the new table's ids continue from the identity sequence, which goes away with the identity
+        schema_editor.execute(f'ALTER TABLE "{legacy}" ALTER COLUMN "id" DROP IDENTITY IF EXISTS')
+        schema_editor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")'
+        )
+        schema_editor.execute(f'CREATE SEQUENCE "{table}_id_seq" OWNED BY "{table}"."id"')
+        schema_editor.execute(
+            f"SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM \"{legacy}\"), 0) + 1, false)"  # noqa: S608
+        )
+        schema_editor.execute(f'ALTER TABLE "{table}" ALTER COLUMN "id" SET DEFAULT nextval(\'{table}_id_seq\')')
+        # ATTACH PARTITION gives the legacy table the (id, timestamp) key in place of this one
+        schema_editor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{table}_pkey"')
+        schema_editor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ("id", "timestamp")')
+
+        # the parent takes over the index names Django knows; the legacy partition's copies get new names. The
+        # definitions were read before the rename, so they name the new parent table and keep opclasses,
+        # ordering and conditions; ATTACH PARTITION adopts the legacy copies instead of building new ones
+        for name, definition in indexes:
+            name = name.strip('"')
+            schema_editor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:55]}_legacy"')
+            schema_editor.execute(definition)
+
+        # the CHECK constraint lets ATTACH PARTITION skip its own scan of the table
+        schema_editor.execute(
+            f'ALTER TABLE "{legacy}" ADD CONSTRAINT "{legacy}_range" CHECK ("timestamp" < %s)', [first_month]
+        )
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" FOR VALUES FROM (MINVALUE) TO (%s)', [first_month]
+        )
+        schema_editor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{legacy}_range"')
+
+        month = first_month
+        for _ in range(MONTHS_AHEAD):
+            following = _next_month(month)
+            schema_editor.execute(
+                f'CREATE TABLE "{table}_p{month:%Y%m}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+                [month, following],
+            )
+            month = following
+        # catches rows past the last monthly partition, should cleanup_logs stop creating them in time
+        schema_editor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def unpartition(apps, schema_editor):
+    """Copy the rows back into plain tables as migration 0009 left them. Slow on big tables: it rewrites every row."""
+    connection = schema_editor.connection
+    for table, model_name in zip(TABLES, ["RequestLog", "FieldChangeLog"], strict=True):
+        partitioned = f"{table}_partitioned"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+            indexes = [row[0] for row in cursor.fetchall()]
+        schema_editor.execute(f'ALTER TABLE "{table}" RENAME TO "{partitioned}"')
+        for name in indexes:
+            schema_editor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:51]}_part"')
+
+        model = apps.get_model("api", model_name)
+        schema_editor.create_model(model)
+        columns = ", ".join(f'"{field.column}"' for field in model._meta.local_fields)
+        schema_editor.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{partitioned}"')  # noqa: S608
+        max_id = f'COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1'  # noqa: S608
+        schema_editor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), {max_id}, false)")
+        schema_editor.execute(f'DROP TABLE "{partitioned}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_requestlog_sampling"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_by_month, unpartition),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_partition_logs_by_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.CharField(choices=[("hour", "Hour"), ("day", "Day")], max_length=4)),
+                ("bucket_start", models.DateTimeField()),
+                (
+                    "path",
+                    models.CharField(help_text="Route template, e.g. /api/v1/schools/<school_id>.", max_length=255),
+                ),
+                ("method", models.CharField(max_length=10)),
+                ("status_class", models.CharField(help_text="2xx, 3xx, 4xx or 5xx.", max_length=3)),
+                ("auth_type", models.CharField(blank=True, max_length=20)),
+                (
+                    "api_key",
+                    models.CharField(blank=True, help_text="API key name, for requests made with one.", max_length=255),
+                ),
+                (
+                    "requests",
+                    models.FloatField(default=0, help_text="Requests, with sampled log rows scaled back up."),
+                ),
+                ("logged", models.PositiveIntegerField(default=0, help_text="RequestLog rows folded in.")),
+                ("duration_ms_total", models.FloatField(default=0)),
+                ("duration_ms_max", models.PositiveIntegerField(default=0)),
+                (
+                    "histogram",
+                    models.JSONField(default=dict, help_text="Requests per log-scale latency bucket."),
+                ),
+            ],
+            options={
+                "verbose_name": "Request Rollup",
+                "verbose_name_plural": "Request Rollups",
+                "ordering": ["-bucket_start", "path"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "bucket_start", "path", "method", "status_class", "auth_type", "api_key"),
+                        name="uniq_reqrollup_key",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
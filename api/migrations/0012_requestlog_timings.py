@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0011_requestrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestlog",
+            name="db_queries",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="db_ms",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="cache_hits",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="cache_misses",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="cache_ms",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="sf_calls",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="sf_ms",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="requestlog",
+            name="auth_ms",
+            field=models.FloatField(default=0),
+        ),
+    ]
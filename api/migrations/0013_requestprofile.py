@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0012_requestlog_timings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=2048)),
+                ("query_string", models.CharField(blank=True, max_length=2048)),
+                ("status_code", models.IntegerField()),
+                ("duration_ms", models.IntegerField()),
+                ("auth_type", models.CharField(blank=True, max_length=20)),
+                ("auth_identifier", models.CharField(blank=True, max_length=255)),
+                ("interval_ms", models.FloatField(help_text="Time between samples.")),
+                ("samples", models.PositiveIntegerField(default=0)),
+                (
+                    "truncated",
+                    models.BooleanField(
+                        default=False, help_text="The rarest stacks were left out to fit the size limit."
+                    ),
+                ),
+                (
+                    "stacks",
+                    models.TextField(blank=True, help_text="One 'frame;frame;frame count' line per distinct stack."),
+                ),
+            ],
+            options={
+                "verbose_name": "Request Profile",
+                "verbose_name_plural": "Request Profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
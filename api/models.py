@@ -2,8 +2,10 @@ import uuid
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 from .auth import APIKey  # noqa: F401 — re-export so Django finds it
+from .cache import superusers_cache
 
 
 class SyncConfig(models.Model):
@@ -88,18 +90,33 @@ class SuperUser(models.Model):
     def __str__(self):
         return f"{self.name} ({self.accounts_uuid})" if self.name else str(self.accounts_uuid)
 
+    @classmethod
+    def active_uuids(cls):
+        """UUIDs of all active super users, from the tiered cache. Invalidated by api.signals on save/delete."""
+        return superusers_cache.get_or_set(
+            "active",
+            lambda: frozenset(
+                str(u) for u in cls.objects.filter(is_active=True).values_list("accounts_uuid", flat=True)
+            ),
+        )
+
     @classmethod
     def is_super_user(cls, user_uuid):
         if user_uuid is None:
             return False
         try:
-            return cls.objects.filter(accounts_uuid=user_uuid, is_active=True).exists()
+            user_uuid = str(uuid.UUID(str(user_uuid)))
         except (ValueError, ValidationError):
             return False
+        return user_uuid in cls.active_uuids()
+
+
+superusers_cache.register_warmer(SuperUser.active_uuids)
 
 
 class RequestLog(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # set when the request is handled, not when the buffered row is written (api/audit.py)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     method = models.CharField(max_length=10)
     path = models.CharField(max_length=2048)
     query_params = models.JSONField(default=dict, blank=True)
@@ -109,6 +126,16 @@ class RequestLog(models.Model):
     duration_ms = models.IntegerField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=512, blank=True)
+    sample_rate = models.FloatField(default=1.0, help_text="Share of matching requests logged; 1 unless sampled.")
+    # time per layer, measured by api.middleware.ServerTimingMiddleware
+    db_queries = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+    cache_ms = models.FloatField(default=0)
+    sf_calls = models.PositiveIntegerField(default=0)
+    sf_ms = models.FloatField(default=0)
+    auth_ms = models.FloatField(default=0)
 
     class Meta:
         verbose_name = "Request Log"
@@ -123,6 +150,82 @@ class RequestLog(models.Model):
         return f"{self.method} {self.path} {self.status_code} ({self.timestamp})"
 
 
+class RequestRollup(models.Model):
+    """
+    Counts and a latency histogram of one hour or day of API requests with the same route, method, status class,
+    auth type and API key, folded incrementally from RequestLog by rollup_request_logs (api/rollups.py).
+    """
+
+    PERIOD_CHOICES = [("hour", "Hour"), ("day", "Day")]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    path = models.CharField(max_length=255, help_text="Route template, e.g. /api/v1/schools/<school_id>.")
+    method = models.CharField(max_length=10)
+    status_class = models.CharField(max_length=3, help_text="2xx, 3xx, 4xx or 5xx.")
+    auth_type = models.CharField(max_length=20, blank=True)
+    api_key = models.CharField(max_length=255, blank=True, help_text="API key name, for requests made with one.")
+    requests = models.FloatField(default=0, help_text="Requests, with sampled log rows scaled back up.")
+    logged = models.PositiveIntegerField(default=0, help_text="RequestLog rows folded in.")
+    duration_ms_total = models.FloatField(default=0)
+    duration_ms_max = models.PositiveIntegerField(default=0)
+    histogram = models.JSONField(default=dict, help_text="Requests per log-scale latency bucket.")
+
+    class Meta:
+        verbose_name = "Request Rollup"
+        verbose_name_plural = "Request Rollups"
+        ordering = ["-bucket_start", "path"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "bucket_start", "path", "method", "status_class", "auth_type", "api_key"],
+                name="uniq_reqrollup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} {self.status_class} ({self.period} of {self.bucket_start})"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has folded its source table: every row with an id up to last_id is in."""
+
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} through id {self.last_id}"
+
+
+class RequestProfile(models.Model):
+    """
+    Sampled call stacks of one API request, recorded on demand with ?profile=1 or an X-Profile header
+    (api/profiler.py). Stacks are in the collapsed format that flamegraph.pl and speedscope read.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    query_string = models.CharField(max_length=2048, blank=True)
+    status_code = models.IntegerField()
+    duration_ms = models.IntegerField()
+    auth_type = models.CharField(max_length=20, blank=True)
+    auth_identifier = models.CharField(max_length=255, blank=True)
+    interval_ms = models.FloatField(help_text="Time between samples.")
+    samples = models.PositiveIntegerField(default=0)
+    truncated = models.BooleanField(default=False, help_text="The rarest stacks were left out to fit the size limit.")
+    stacks = models.TextField(blank=True, help_text="One 'frame;frame;frame count' line per distinct stack.")
+
+    class Meta:
+        verbose_name = "Request Profile"
+        verbose_name_plural = "Request Profiles"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms} ms, {self.created_at:%Y-%m-%d %H:%M})"
+
+
 class FieldChangeLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     model_name = models.CharField(max_length=100)
@@ -150,11 +253,14 @@ class FieldChangeLog(models.Model):
 
 
 class FormSubmission(models.Model):
+    """A submitted form, queued for processing by the process_form_submissions workers (api/forms/queue.py)."""
+
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("processing", "Processing"),
         ("completed", "Completed"),
-        ("failed", "Failed"),
+        ("failed", "Failed"),  # the last attempt failed, retried at next_attempt_at
+        ("dead", "Dead letter"),  # gave up, needs a person to look at it
         ("spam", "Spam"),
     ]
 
@@ -170,11 +276,24 @@ class FormSubmission(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        null=True, blank=True, default=timezone.now, help_text="When a worker may pick this up (again)."
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a worker started processing it.")
 
     class Meta:
         verbose_name = "Form Submission"
         verbose_name_plural = "Form Submissions"
         ordering = ["-created_at"]
+        indexes = [
+            # the queue: submissions waiting for a (re)try, and processing ones whose worker may have died
+            models.Index(
+                fields=["next_attempt_at"],
+                name="idx_formsub_queue",
+                condition=models.Q(status__in=["pending", "failed", "processing"]),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.form_type} ({self.status}) - {self.id}"
@@ -0,0 +1,62 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row on a page, serialized as URL-safe base64 JSON. Clients pass it back
+unchanged to get the next page; the endpoint turns it into a WHERE clause on its (indexed) ordering.
+"""
+
+import base64
+import binascii
+import json
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not produced by encode_cursor."""
+
+
+def encode_cursor(values):
+    """Serialize a dict of sort key values into an opaque cursor string."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _checked(value, kind):
+    if not isinstance(kind, type):
+        return kind(value)
+    if isinstance(value, bool) and kind is not bool:
+        raise TypeError(value)
+    if kind is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, kind):
+        raise TypeError(value)
+    return value
+
+
+def decode_cursor(cursor, fields):
+    """
+    Parse a cursor produced by encode_cursor back into its dict of sort key values. fields maps each key to the
+    type its value must have, or to a function that parses it (e.g. date.fromisoformat), so a tampered cursor
+    raises InvalidCursor here instead of failing in the query.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        return {name: _checked(values[name], kind) for name, kind in fields.items()}
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def clamp_limit(limit, maximum):
+    """Bound a client supplied page size to 1..maximum."""
+    return max(1, min(limit, maximum))
+
+
+def paginate(rows, limit, cursor_for):
+    """
+    Split a fetch of limit + 1 rows into one page and the cursor of the next one (None on the last page).
+    cursor_for maps the last row of the page to its sort key values.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_for(rows[-1]))
@@ -0,0 +1,141 @@
+"""
+Monthly range partitions of the append-only log tables, RequestLog and FieldChangeLog.
+
+Both tables are partitioned by month on timestamp (migration 0010). The rows that predate partitioning live in a
+"<table>_legacy" partition from MINVALUE to the first month that got its own partition, and a "<table>_default"
+partition takes any row past the last monthly one, so inserts never fail. cleanup_logs keeps MONTHS_AHEAD months
+of partitions created ahead of time, moving rows out of the default partition into them, and enforces retention by
+dropping (or detaching) whole partitions, which takes milliseconds whatever their size, instead of deleting rows.
+"""
+
+import datetime
+import re
+
+from django.db import connection, transaction
+
+PARTITIONED_TABLES = ["api_requestlog", "api_fieldchangelog"]
+MONTHS_AHEAD = 3
+
+_BOUND = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+def month_start(value):
+    """Midnight UTC on the first day of value's month."""
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, n):
+    year, index = divmod(month.month - 1 + n, 12)
+    return month.replace(year=month.year + year, month=index + 1)
+
+
+def _parse_bound(bound):
+    if bound in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.datetime.fromisoformat(bound.strip("'"))
+
+
+def _children(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def partitions(table):
+    """(name, lower bound, upper bound) of each range partition of table, oldest first; None stands for an open end."""
+    found = []
+    for name, bound in _children(table):
+        match = _BOUND.search(bound)
+        if match:
+            found.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    minimum = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+    return sorted(found, key=lambda partition: partition[1] or minimum)
+
+
+def default_partition(table):
+    """The DEFAULT partition of table, which takes rows no monthly partition covers, or None."""
+    return next((name for name, bound in _children(table) if bound == "DEFAULT"), None)
+
+
+def _create_partition(table, name, month, following, default):
+    if default is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', [month, following]
+            )
+        return
+    # a partition cannot be added while the default partition holds rows of its range, so they move over first
+    with transaction.atomic(), connection.cursor() as cursor:
+        columns = ", ".join(
+            f'"{column.name}"' for column in connection.introspection.get_table_description(cursor, table)
+        )
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING {columns}) '  # noqa: S608
+            f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved',
+            [month, following],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [month, following]
+        )
+
+
+def create_partitions(table, now, months_ahead=MONTHS_AHEAD):
+    """
+    Create the monthly partitions of table from now's month through months_ahead months later, and for any earlier
+    month with rows in the default partition, moving those rows into it. Returns the names of the new partitions.
+    """
+    covered = [(lower, upper) for _, lower, upper in partitions(table)]
+    default = default_partition(table)
+    month = month_start(now)
+    end = add_months(month, months_ahead + 1)
+    if default is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MIN("timestamp") FROM "{default}"')  # noqa: S608
+            oldest = cursor.fetchone()[0]
+        if oldest is not None:
+            # months that were missed while cleanup_logs was not running; rows past `end` stay where they are
+            month = min(month, month_start(oldest))
+
+    created = []
+    while month < end:
+        following = add_months(month, 1)
+        overlaps = any(
+            (lower is None or lower < following) and (upper is None or upper > month) for lower, upper in covered
+        )
+        if not overlaps:
+            name = f"{table}_p{month:%Y%m}"
+            _create_partition(table, name, month, following, default)
+            created.append(name)
+        month = following
+    return created
+
+
+def expired_partitions(table, cutoff):
+    """Partitions of table holding only rows older than cutoff, with their estimated row counts."""
+    expired = [name for name, _, upper in partitions(table) if upper is not None and upper <= cutoff]
+    if not expired:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, GREATEST(reltuples, 0)::bigint FROM pg_class WHERE relname = ANY(%s)", [expired]
+        )
+        estimates = dict(cursor.fetchall())
+    return [(name, estimates.get(name, 0)) for name in expired]
+
+
+def drop_partition(table, name, detach=False):
+    """Drop a partition, or detach it from table and keep it as a standalone table (e.g. to archive it)."""
+    with connection.cursor() as cursor:
+        if detach:
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+        else:
+            cursor.execute(f'DROP TABLE "{name}"')
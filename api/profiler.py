@@ -0,0 +1,150 @@
+"""
+On-demand sampling profiler for single API requests.
+
+A request with ?profile=1 or an "X-Profile: 1" header is profiled by ProfilerMiddleware: a sampler thread reads
+the request thread's Python stack every INTERVAL and counts each distinct stack. The profile is kept, as a
+RequestProfile, and its id sent in an X-Profile-Id header, for super users and API keys with read:info.
+Nobody else can tell that the flag did anything.
+
+The middleware checks the caller's credentials (with the same cached checks as the views) before it starts
+sampling, so flags from anyone else neither start a sampler nor take the slot. At most one request per worker
+process is sampled at a time, and sampling stops after MAX_SECONDS. Stored stacks are capped at MAX_STACK_BYTES, dropping the rarest first.
+Profiles expire after RETENTION and are deleted by cleanup_logs.
+
+Under ASGI, async views run on the event loop thread, not the one sampled; profile them with ASYNC_VIEWS off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+INTERVAL = 0.005  # seconds between samples
+MAX_SECONDS = 60
+MAX_DEPTH = 128  # frames per stack, the outermost are dropped beyond this
+MAX_STACK_BYTES = 512 * 1024
+RETENTION = timedelta(days=14)
+QUERY_FLAG = "profile"
+HEADER = "HTTP_X_PROFILE"
+
+_slot = threading.BoundedSemaphore(1)
+_roots = sorted(
+    {os.path.normpath(path) + os.sep for path in [settings.BASE_DIR, *sys.path] if path}, key=len, reverse=True
+)
+
+
+def requested(request):
+    flags = (request.GET.get(QUERY_FLAG), request.META.get(HEADER))
+    return any(str(flag).lower() in ("1", "true", "yes", "on") for flag in flags if flag is not None)
+
+
+def _location(filename):
+    """The file relative to the project or the sys.path entry it was imported from."""
+    filename = os.path.normpath(filename)
+    for root in _roots:
+        if filename.startswith(root):
+            return filename[len(root) :]
+    return filename
+
+
+def _collapse(frame):
+    frames = []
+    while frame is not None and len(frames) < MAX_DEPTH:
+        code = frame.f_code
+        frames.append(f"{code.co_qualname} ({_location(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class Sampler(threading.Thread):
+    """Counts the stacks of one thread until stopped."""
+
+    def __init__(self, thread_id, interval=INTERVAL, max_seconds=MAX_SECONDS):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+            del frame
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def start():
+    """Start sampling the calling thread. Returns the Sampler, or None while another request is being sampled."""
+    if not _slot.acquire(blocking=False):
+        return None
+    sampler = Sampler(threading.get_ident())
+    try:
+        sampler.start()
+    except RuntimeError:
+        _slot.release()
+        return None
+    return sampler
+
+
+def stop(sampler):
+    try:
+        sampler.stop()
+    finally:
+        _slot.release()
+
+
+def collapsed(stacks, max_bytes=MAX_STACK_BYTES):
+    """Stacks in collapsed format, most frequent first, up to max_bytes. Returns (text, truncated)."""
+    lines, size = [], 0
+    for stack, count in stacks.most_common():
+        line = f"{stack} {count}"
+        size += len(line.encode()) + 1
+        if size > max_bytes:
+            return "\n".join(lines), True
+        lines.append(line)
+    return "\n".join(lines), False
+
+
+def save(sampler, request, response, duration_ms, auth_identifier):
+    from api.models import RequestProfile
+
+    stacks, truncated = collapsed(sampler.stacks)
+    return RequestProfile.objects.create(
+        expires_at=timezone.now() + RETENTION,
+        method=request.method,
+        path=request.path[:2048],
+        query_string=request.META.get("QUERY_STRING", "")[:2048],
+        status_code=response.status_code,
+        duration_ms=duration_ms,
+        auth_type=getattr(request, "auth_type", None) or "",
+        auth_identifier=auth_identifier,
+        interval_ms=sampler.interval * 1000,
+        samples=sampler.samples,
+        truncated=truncated,
+        stacks=stacks,
+    )
+
+
+def top_frames(stacks, limit=20):
+    """[(frame, share of samples)] for the frames samples most often landed in, from collapsed stacks."""
+    total, leaves = 0, Counter()
+    for line in stacks.splitlines():
+        stack, _, count = line.rpartition(" ")
+        total += int(count)
+        leaves[stack.rpartition(";")[2]] += int(count)
+    return [(frame, count / total) for frame, count in leaves.most_common(limit)] if total else []
@@ -0,0 +1,121 @@
+"""
+Distributed, cost-aware rate limiting.
+
+Every budget in settings.RATE_LIMITS is a token bucket per caller (API key, SSO user, or client IP for anonymous
+requests), held in Redis and updated by a single Lua script, so the check-and-take is atomic and shared by all
+workers. Endpoints charge a budget only for work that costs something:
+
+- "read": a cache miss that has to go to Postgres (batch lookups pay one token per miss)
+- "salesforce": a write to Salesforce, e.g. POST /case
+- "forms": a form submission
+- "export": a bulk export
+
+Responses served from the cache are free, which is what lets the read budget be generous. An API key can
+override any budget with its rate_limits field. If Redis is unreachable the limiter lets requests through
+rather than failing them.
+"""
+
+import logging
+
+from django.conf import settings
+from ninja_extra.exceptions import Throttled
+from redis.exceptions import RedisError
+
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sfapi:ratelimit"
+
+# Refills the bucket for the time elapsed since the last call (using the Redis clock, so workers never
+# disagree), then takes `cost` tokens if there are enough. Returns {allowed, seconds until enough tokens}.
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+_PERIODS = {
+    "s": 1,
+    "sec": 1,
+    "second": 1,
+    "m": 60,
+    "min": 60,
+    "minute": 60,
+    "h": 3600,
+    "hour": 3600,
+    "d": 86400,
+    "day": 86400,
+}
+
+_script = None
+
+
+class RateLimited(Throttled):
+    """Raised when a budget is exhausted; NinjaExtraAPI turns it into a 429 with Retry-After."""
+
+
+def parse_rate(rate):
+    """'600/min' -> (600, 60): the bucket capacity and the seconds it takes to refill completely."""
+    count, period = rate.split("/")
+    return int(count), _PERIODS[period.strip().lower()]
+
+
+def _token_bucket():
+    global _script
+    if _script is None:
+        from django_redis import get_redis_connection
+
+        _script = get_redis_connection("default").register_script(_TOKEN_BUCKET)
+    return _script
+
+
+def _caller(request):
+    auth = getattr(request, "auth", None)
+    if getattr(request, "auth_type", None) == "api_key" and auth is not None:
+        return f"key:{auth.id}", auth.rate_limits or {}
+    if getattr(request, "auth_uuid", None):
+        return f"user:{request.auth_uuid}", {}
+    ip = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")[0].strip() or request.META.get("REMOTE_ADDR")
+    return f"ip:{ip}", {}
+
+
+def charge(request, budget, cost=1):
+    """Take cost tokens from the caller's budget, raising RateLimited if it does not have them."""
+    if cost <= 0:
+        return
+    caller, overrides = _caller(request)
+    capacity, period = parse_rate(overrides.get(budget) or settings.RATE_LIMITS[budget])
+
+    try:
+        # a batch larger than the whole bucket drains it instead of being refused forever
+        with timing.measure("cache"):
+            allowed, wait = _token_bucket()(
+                keys=[f"{KEY_PREFIX}:{budget}:{caller}"], args=[capacity, capacity / period, min(cost, capacity)]
+            )
+    except (RedisError, NotImplementedError):
+        # NotImplementedError: the cache is not Redis (local development)
+        logger.warning("Rate limiter unavailable, allowing request", exc_info=True)
+        return
+
+    if not allowed:
+        raise RateLimited(wait=float(wait))
@@ -0,0 +1,48 @@
+"""
+orjson response rendering for the API.
+
+ORJSONRenderer is the renderer of the NinjaExtraAPI in api_v1.py, so it serves every router mounted on it,
+Pardot's included. Dates and times are handed back to the encoder ninja used before, so the wire format of
+existing fields does not change; orjson does the rest several times faster than the stdlib encoder.
+
+Endpoints whose payload is stable between syncs can go further: render_json() validates a payload against
+its response schema once and renders it to bytes, which can be cached and returned with json_response() on
+later requests, skipping both schema validation and rendering.
+"""
+
+import orjson
+from django.http import HttpResponse
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+_fallback = NinjaJSONEncoder()
+
+
+def _default(obj):
+    # dates and times (passed through by orjson), decimals, pydantic models, ... come out exactly as they did
+    # with ninja's JSONRenderer
+    return _fallback.default(obj)
+
+
+def dumps(data):
+    return orjson.dumps(data, default=_default, option=_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        return dumps(data)
+
+
+def render_json(data, schema=None):
+    """Validate data against a response schema the way ninja would, then render it to JSON bytes."""
+    if schema is not None:
+        data = schema.model_validate(data).model_dump()
+    return dumps(data)
+
+
+def json_response(content, status=200):
+    """Response for JSON bytes produced by render_json(), e.g. read back from the cache."""
+    return HttpResponse(content, status=status, content_type=f"{ORJSONRenderer.media_type}; charset=utf-8")
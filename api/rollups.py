@@ -0,0 +1,208 @@
+"""
+Incremental latency rollups of the request audit log.
+
+fold() reads the RequestLog rows added since the watermark and merges them into hourly and daily RequestRollup
+rows keyed by (route template, method, status class, auth type, API key). Each rollup keeps a histogram of
+request counts over fixed log-scale latency buckets, so rollups of any hours, paths or keys can be merged by
+adding their histograms and percentiles read off the merged one (within BUCKET_GROWTH of the true value).
+Rows that were logged at a sample rate below 1 (api/audit.py) count 1 / sample_rate requests.
+
+The watermark only moves past rows that are SETTLE old, and stops at the first id that is not, so a row whose
+INSERT committed after a higher id (the audit log writes from many workers) is never skipped.
+"""
+
+import datetime
+import functools
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Max, Min, Sum, Value, When
+from django.db.models.functions import Cast, Floor, Ln, TruncHour
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from api.models import RequestLog, RequestRollup, RollupWatermark
+
+WATERMARK = "request_rollups"
+BUCKET_GROWTH = 1.1  # each latency bucket is 10% wider than the one below it
+SETTLE = datetime.timedelta(minutes=2)
+BATCH_IDS = 200_000  # RequestLog ids folded per transaction
+UNMATCHED_PATH = "<unmatched>"
+
+_KEY_FIELDS = ("path", "method", "status_class", "auth_type", "api_key")
+
+
+def bucket_index(duration_ms):
+    return math.floor(math.log(duration_ms + 1) / math.log(BUCKET_GROWTH))
+
+
+def bucket_value(index):
+    """A latency in the middle of the bucket, in ms."""
+    return round((BUCKET_GROWTH ** (index + 0.5)) - 1, 1)
+
+
+def merge_histograms(into, histogram):
+    for index, count in histogram.items():
+        into[str(index)] = into.get(str(index), 0) + count
+    return into
+
+
+def percentile(histogram, q):
+    """The q-th quantile (0-1) of a latency histogram, in ms, or None for an empty one."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for index in sorted(histogram, key=int):
+        seen += histogram[index]
+        if seen >= q * total:
+            return bucket_value(int(index))
+    return None
+
+
+def period_start(period, moment):
+    """Start of the hour or UTC day that moment falls in."""
+    start = moment.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if period == "day" else start
+
+
+@functools.lru_cache(maxsize=4096)
+def path_template(path):
+    """The route a request path matched, so /schools/001... and /schools/002... roll up together."""
+    try:
+        return "/" + resolve(path).route
+    except Resolver404:
+        return UNMATCHED_PATH
+
+
+def _grouped(first_id, last_id):
+    """RequestLog rows with ids in [first_id, last_id], aggregated per hour, raw path, key and latency bucket."""
+    weight = Value(1.0) / F("sample_rate")
+    return (
+        RequestLog.objects.filter(id__gte=first_id, id__lte=last_id)
+        .annotate(
+            hour=TruncHour("timestamp", tzinfo=datetime.timezone.utc),
+            status_class=Floor(F("status_code") / Value(100)),
+            api_key=Case(When(auth_type="api_key", then=F("auth_identifier")), default=Value("")),
+            bucket=Floor(Ln(Cast("duration_ms", FloatField()) + Value(1.0)) / Value(math.log(BUCKET_GROWTH))),
+        )
+        .values("hour", "path", "method", "status_class", "auth_type", "api_key", "bucket")
+        .annotate(
+            requests=Sum(weight),
+            logged=Count("id"),
+            duration_ms_total=Sum(Cast("duration_ms", FloatField()) * weight),
+            duration_ms_max=Max("duration_ms"),
+        )
+        .order_by()
+    )
+
+
+def _accumulate(groups):
+    """Fold aggregated groups into {(period, bucket_start, *key): partial rollup} for hours and days."""
+    rollups = defaultdict(lambda: {"requests": 0.0, "logged": 0, "total": 0.0, "max": 0, "histogram": {}})
+    for group in groups:
+        key = (
+            path_template(group["path"]),
+            group["method"],
+            f"{int(group['status_class'])}xx",
+            group["auth_type"],
+            group["api_key"],
+        )
+        for period in ("hour", "day"):
+            rollup = rollups[(period, period_start(period, group["hour"]), *key)]
+            rollup["requests"] += group["requests"]
+            rollup["logged"] += group["logged"]
+            rollup["total"] += group["duration_ms_total"]
+            rollup["max"] = max(rollup["max"], group["duration_ms_max"])
+            merge_histograms(rollup["histogram"], {int(group["bucket"]): group["requests"]})
+    return rollups
+
+
+def _merge(rollups):
+    """Add partial rollups to the stored ones, creating those that do not exist yet."""
+    existing = {}
+    for period, start in {(key[0], key[1]) for key in rollups}:
+        for row in RequestRollup.objects.select_for_update().filter(period=period, bucket_start=start):
+            existing[(period, start, *(getattr(row, field) for field in _KEY_FIELDS))] = row
+
+    changed, created = [], []
+    for key, partial in rollups.items():
+        row = existing.get(key)
+        if row is None:
+            row = RequestRollup(period=key[0], bucket_start=key[1], **dict(zip(_KEY_FIELDS, key[2:], strict=True)))
+            created.append(row)
+        else:
+            changed.append(row)
+        row.requests += partial["requests"]
+        row.logged += partial["logged"]
+        row.duration_ms_total += partial["total"]
+        row.duration_ms_max = max(row.duration_ms_max, partial["max"])
+        row.histogram = merge_histograms(dict(row.histogram), partial["histogram"])
+
+    RequestRollup.objects.bulk_create(created)
+    RequestRollup.objects.bulk_update(
+        changed, ["requests", "logged", "duration_ms_total", "duration_ms_max", "histogram"], batch_size=500
+    )
+
+
+def fold(now=None):
+    """Fold every settled RequestLog row past the watermark into the rollups. Returns the number of rows folded."""
+    now = now or timezone.now()
+    folded = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+            unsettled = RequestLog.objects.filter(id__gt=watermark.last_id, timestamp__gt=now - SETTLE)
+            stop = unsettled.aggregate(first=Min("id"))["first"]
+            pending = RequestLog.objects.filter(id__gt=watermark.last_id)
+            if stop is not None:
+                pending = pending.filter(id__lt=stop)
+            last_id = pending.filter(id__lte=watermark.last_id + BATCH_IDS).aggregate(last=Max("id"))["last"]
+            if last_id is None:
+                # ids can have gaps wider than a batch; jump to the next row that is ready
+                last_id = pending.aggregate(first=Min("id"))["first"]
+                if last_id is None:
+                    return folded
+            groups = list(_grouped(watermark.last_id + 1, last_id))
+            _merge(_accumulate(groups))
+            folded += sum(group["logged"] for group in groups)
+            watermark.last_id = last_id
+            watermark.save(update_fields=["last_id", "updated_at"])
+
+
+def summarize(rollups):
+    """Merge rollups per (path, method, auth type, API key) into request counts, error rates and percentiles."""
+    merged = {}
+    for rollup in rollups:
+        key = (rollup.path, rollup.method, rollup.auth_type, rollup.api_key)
+        entry = merged.setdefault(
+            key, {"requests": 0.0, "client_errors": 0.0, "errors": 0.0, "total": 0.0, "max": 0, "histogram": {}}
+        )
+        entry["requests"] += rollup.requests
+        entry["client_errors"] += rollup.requests if rollup.status_class == "4xx" else 0
+        entry["errors"] += rollup.requests if rollup.status_class == "5xx" else 0
+        entry["total"] += rollup.duration_ms_total
+        entry["max"] = max(entry["max"], rollup.duration_ms_max)
+        merge_histograms(entry["histogram"], rollup.histogram)
+
+    summary = []
+    for (path, method, auth_type, api_key), entry in merged.items():
+        requests = entry["requests"]
+        summary.append(
+            {
+                "path": path,
+                "method": method,
+                "auth_type": auth_type,
+                "api_key": api_key,
+                "requests": round(requests),
+                "error_rate": round(entry["errors"] / requests, 4) if requests else None,
+                "client_error_rate": round(entry["client_errors"] / requests, 4) if requests else None,
+                "mean_ms": round(entry["total"] / requests, 1) if requests else None,
+                "p50_ms": percentile(entry["histogram"], 0.5),
+                "p95_ms": percentile(entry["histogram"], 0.95),
+                "p99_ms": percentile(entry["histogram"], 0.99),
+                "max_ms": entry["max"],
+            }
+        )
+    return sorted(summary, key=lambda row: -row["requests"])
@@ -9,6 +9,10 @@ from ninja import Field, FilterSchema, Schema
 # Commented out fields might be useful, but can cause performance issues and are marked as suck
 
 
+# Upper bound on records per batch lookup (POST /contacts/batch, POST /schools/batch)
+BATCH_MAX_SIZE = 500
+
+
 # General schema for errors returned by the API, change this if more details are needed with an error response
 # See api_vX.py @api decorator response for usage
 class ErrorSchema(Schema):
@@ -30,6 +34,7 @@ class BookSchema(Schema):
 
 class BooksSchema(Schema):
     count: int
+    next_cursor: Optional[str] = None
     books: List[BookSchema]
 
 
@@ -57,9 +62,30 @@ class AccountDetailSchema(AccountSchema):
 class AccountsSchema(Schema):
     count: int
     total_schools: int
+    next_cursor: Optional[str] = None
     schools: List[AccountSchema]
 
 
+class AccountBatchRequestSchema(Schema):
+    ids: List[str] = Field(min_length=1, max_length=BATCH_MAX_SIZE, description="Salesforce Account IDs.")
+
+
+class AccountBatchSchema(Schema):
+    count: int
+    schools: List[AccountDetailSchema]
+    missing: List[str] = Field(description="Requested IDs with no matching school.")
+
+
+class SchoolSuggestionSchema(Schema):
+    id: str
+    name: str
+
+
+class SchoolSuggestionsSchema(Schema):
+    count: int
+    schools: List[SchoolSuggestionSchema]
+
+
 class AccountFilterSchema(FilterSchema):
     name: Optional[str] = None
     type: Optional[str] = None
@@ -117,6 +143,17 @@ class ContactsSchema(Schema):
     contacts: List[ContactSchema]
 
 
+class ContactBatchRequestSchema(Schema):
+    accounts_uuids: List[str] = Field([], max_length=BATCH_MAX_SIZE, description="OpenStax Accounts UUIDs.")
+    contact_ids: List[str] = Field([], max_length=BATCH_MAX_SIZE, description="Salesforce Contact IDs.")
+
+
+class ContactBatchSchema(Schema):
+    count: int
+    contacts: List[ContactSchema]
+    missing: List[str] = Field(description="Requested UUIDs and contact IDs with no matching contact.")
+
+
 #############
 # Adoptions #
 #############
@@ -203,3 +240,25 @@ class FormSubmissionResponseSchema(Schema):
     id: str
     form_type: str
     status: str
+
+
+class LatencySchema(Schema):
+    path: str = Field(description="Route template, e.g. /api/v1/schools/<school_id>.")
+    method: str
+    auth_type: str
+    api_key: str = Field(description="API key name for auth_type api_key, otherwise empty.")
+    requests: int = Field(description="Requests served, scaled up from sampled audit logs.")
+    error_rate: Optional[float] = Field(description="Share of 5xx responses.")
+    client_error_rate: Optional[float] = Field(description="Share of 4xx responses.")
+    mean_ms: Optional[float]
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    p99_ms: Optional[float]
+    max_ms: int
+
+
+class LatencyReportSchema(Schema):
+    period: str
+    since: datetime.datetime
+    count: int
+    endpoints: List[LatencySchema]
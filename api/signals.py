@@ -0,0 +1,29 @@
+"""
+Cache invalidation driven by model signals.
+
+Queryset .update() does not send signals; code that bulk-updates these models must invalidate itself.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import api_keys_cache, superusers_cache
+from .models import APIKey, SuperUser
+
+
+@receiver(post_save, sender=SuperUser)
+@receiver(post_delete, sender=SuperUser)
+def invalidate_super_users(sender, **kwargs):
+    # Invalidate now so this worker sees the change immediately, and again after commit so another worker
+    # that reloaded the set mid-transaction (and cached the pre-commit rows) does not keep it
+    superusers_cache.invalidate()
+    transaction.on_commit(superusers_cache.invalidate)
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_keys(sender, **kwargs):
+    # Deactivating, expiring or re-scoping a key in the admin must take effect on every worker
+    api_keys_cache.invalidate()
+    transaction.on_commit(api_keys_cache.invalidate)
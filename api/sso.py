@@ -0,0 +1,91 @@
+"""
+Memoized OpenStax Accounts SSO cookie decryption.
+
+Decrypting the cookie is an RSA JWE decrypt plus an RS256 JWT verify, and the same cookie is presented on every
+request of a session. Decrypted payloads are kept in a bounded per-worker LRU keyed by a hash of the cookie,
+and each entry expires at the token's own exp, so a cached payload is never honored past the point where a
+fresh decrypt would reject it. Cookies that fail to decrypt are remembered briefly so garbage cookies cannot
+be used to burn CPU.
+
+decrypt_cookie and get_logged_in_user_uuid are drop-in replacements for the openstax_accounts functions.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from openstax_accounts import functions as accounts
+
+MAX_ENTRIES = 10000
+MAX_TTL = 60 * 60  # seconds; upper bound even for long-lived tokens
+FAILURE_TTL = 60  # seconds
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_metrics = {"hits": 0, "misses": 0, "decrypts": 0, "crypto_seconds": 0.0}
+
+
+def decrypt_cookie(cookie):
+    """Decrypted SSO cookie payload (openstax_accounts Payload), or None if the cookie is missing or invalid."""
+    if not cookie:
+        return None
+
+    key = hashlib.sha256(cookie.encode()).digest()
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            _metrics["hits"] += 1
+            return entry[1]
+        _metrics["misses"] += 1
+
+    started = time.perf_counter()
+    payload = accounts.decrypt_cookie(cookie)
+    elapsed = time.perf_counter() - started
+
+    if payload is None:
+        expires_at = now + FAILURE_TTL
+    else:
+        expires_at = min(payload.payload_dict.get("exp", 0), now + MAX_TTL)
+
+    with _lock:
+        _metrics["decrypts"] += 1
+        _metrics["crypto_seconds"] += elapsed
+        if expires_at > now:
+            _entries[key] = (expires_at, payload)
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return payload
+
+
+def get_logged_in_user_uuid(request):
+    payload = decrypt_cookie(request.COOKIES.get(settings.SSO_COOKIE_NAME))
+    return payload.user_uuid if payload else None
+
+
+def stats():
+    """Cache hit/miss counts and time spent in cookie crypto for this worker, for /info."""
+    with _lock:
+        lookups = _metrics["hits"] + _metrics["misses"]
+        return {
+            "entries": len(_entries),
+            "hits": _metrics["hits"],
+            "misses": _metrics["misses"],
+            "hit_rate": round(_metrics["hits"] / lookups, 3) if lookups else None,
+            "decrypts": _metrics["decrypts"],
+            "crypto_ms_total": round(_metrics["crypto_seconds"] * 1000, 1),
+            "crypto_ms_avg": (
+                round(_metrics["crypto_seconds"] * 1000 / _metrics["decrypts"], 2) if _metrics["decrypts"] else None
+            ),
+        }
+
+
+def reset():
+    """Forget every cached payload and zero the metrics. Used by tests."""
+    with _lock:
+        _entries.clear()
+        _metrics.update(hits=0, misses=0, decrypts=0, crypto_seconds=0.0)
@@ -1,18 +1,46 @@
 # Disable logging to prevent unnecessary output during tests
+import datetime
+import gzip
+import json
 import logging
+import threading
 import time
 import uuid
-from unittest.mock import patch
-
-from django.test import TestCase
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
+from urllib.parse import urlencode
+
+import httpx
+import requests
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
 from django.utils import timezone
+from ninja.renderers import JSONRenderer
 from ninja.testing import TestClient
+from openstax_accounts.strategy_2 import Payload
 
+from api import accounts_client, auth, export, sso, typeahead
+from api.accounts_client import AccountsClient
 from api.auth import APIKey
-from api.models import SuperUser
-from db.models import Account, Adoption, Book, Contact, Opportunity
-
-from .api_v1 import router
+from api.cache import TieredCache, bump_generations
+from api.models import FormSubmission, SuperUser
+from db.functions import refresh_adoption_summaries, update_or_create_books
+from db.models import Account, Adoption, AdoptionSummary, Book, Contact, Opportunity
+
+from .api_v1 import (
+    SCHOOL_SEARCH_DEFAULT_LIMIT,
+    api,
+    get_active_books,
+    info_async,
+    me_async,
+    router,
+    salesforce_case_async,
+)
+from .pagination import encode_cursor
+from .ratelimit import RateLimited
+from .renderers import ORJSONRenderer, render_json
+from .schemas import CaseCreateSchema, ErrorSchema
 
 logging.disable(logging.CRITICAL)
 
@@ -92,11 +120,187 @@ class APIKeyTest(TestCase):
         result = APIKey.authenticate("definitely-not-a-real-key-at-all")
         self.assertIsNone(result)
 
+    def test_authenticate_cached_key_is_query_free(self):
+        api_key, raw_key = APIKey.create_key(name="test-key", scopes=["read:books"])
+        APIKey.authenticate(raw_key)
+        with self.assertNumQueries(0):
+            result = APIKey.authenticate(raw_key)
+        self.assertEqual(result.id, api_key.id)
+        self.assertEqual(result.scopes, ["read:books"])
+
+    def test_admin_edit_invalidates_cached_key(self):
+        api_key, raw_key = APIKey.create_key(name="test-key")
+        self.assertIsNotNone(APIKey.authenticate(raw_key))
+        api_key.is_active = False
+        api_key.save()
+        self.assertIsNone(APIKey.authenticate(raw_key))
+
+    def test_last_used_is_flushed_in_batches(self):
+        api_key, raw_key = APIKey.create_key(name="test-key")
+        with patch.object(auth.last_used, "interval", 3600):
+            auth.last_used.flush()
+            APIKey.authenticate(raw_key)
+            api_key.refresh_from_db()
+            self.assertIsNone(api_key.last_used_at)
+            self.assertEqual(auth.last_used.flush(), 1)
+        api_key.refresh_from_db()
+        self.assertIsNotNone(api_key.last_used_at)
+
+
+class SSOCookieCacheTest(TestCase):
+    """Test memoized SSO cookie decryption."""
+
+    def setUp(self):
+        sso.reset()
+
+    def tearDown(self):
+        sso.reset()
+
+    def _payload(self, exp):
+        return Payload({"sub": {"uuid": TEST_UUID}, "exp": exp})
+
+    def test_repeat_cookie_decrypts_once(self):
+        with patch("api.sso.accounts.decrypt_cookie", return_value=self._payload(time.time() + 600)) as decrypt:
+            self.assertEqual(sso.decrypt_cookie("cookie").user_uuid, TEST_UUID)
+            self.assertEqual(sso.decrypt_cookie("cookie").user_uuid, TEST_UUID)
+        decrypt.assert_called_once_with("cookie")
+        stats = sso.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["decrypts"]), (1, 1, 1))
+
+    def test_entry_expires_with_token(self):
+        with patch("api.sso.accounts.decrypt_cookie", return_value=self._payload(time.time() - 1)) as decrypt:
+            sso.decrypt_cookie("cookie")
+            sso.decrypt_cookie("cookie")
+        self.assertEqual(decrypt.call_count, 2)
+
+    def test_invalid_cookie_is_remembered(self):
+        with patch("api.sso.accounts.decrypt_cookie", return_value=None) as decrypt:
+            self.assertIsNone(sso.decrypt_cookie("garbage"))
+            self.assertIsNone(sso.decrypt_cookie("garbage"))
+        decrypt.assert_called_once()
+
+
+class AccountsClientTest(TestCase):
+    """Test the cached, single-flight Accounts API client behind /me enrichment."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = AccountsClient()
+        self.client.access_token = lambda: "token"
+        self.response = Mock(status_code=200)
+        self.response.json.return_value = {"items": [{"faculty_status": "confirmed_faculty", "uuid": TEST_UUID}]}
+
+    def test_cached_until_fresh_ttl(self):
+        with patch.object(self.client.session, "get", return_value=self.response) as get:
+            self.assertEqual(self.client.get_user_info(TEST_UUID)["faculty_status"], "confirmed_faculty")
+            self.assertEqual(self.client.get_user_info(TEST_UUID)["faculty_status"], "confirmed_faculty")
+        get.assert_called_once()
+        self.assertEqual(
+            get.call_args.kwargs["timeout"], (accounts_client.CONNECT_TIMEOUT, accounts_client.READ_TIMEOUT)
+        )
+
+    def test_stale_entry_served_while_revalidating(self):
+        cache.set(
+            accounts_client._cache_key(TEST_UUID),
+            {"info": {"faculty_status": "pending_faculty"}, "fetched_at": time.time() - accounts_client.FRESH_TTL - 1},
+        )
+        with patch.object(self.client, "_refresher") as refresher:
+            self.assertEqual(self.client.get_user_info(TEST_UUID)["faculty_status"], "pending_faculty")
+        refresher.submit.assert_called_once()
+
+    def test_concurrent_lookups_share_one_request(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return self.response
+
+        results = []
+        with patch.object(self.client.session, "get", side_effect=slow_get) as get:
+            leader = threading.Thread(target=lambda: results.append(self.client.get_user_info(TEST_UUID)))
+            leader.start()
+            started.wait(5)
+            follower = threading.Thread(
+                target=lambda: results.append(self.client._flights.do(TEST_UUID, lambda: self.fail("second fetch")))
+            )
+            follower.start()
+            time.sleep(0.1)  # let the follower join the in-flight call
+            release.set()
+            leader.join(5)
+            follower.join(5)
+        get.assert_called_once()
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], results[1])
+
+    def test_upstream_failure_returns_none(self):
+        with patch.object(self.client.session, "get", side_effect=requests.Timeout):
+            self.assertIsNone(self.client.get_user_info(TEST_UUID))
+
+
+class AsyncViewsTest(TestCase):
+    """Test the async variants of /me, /info and /case used when serving over ASGI."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_me_async_enriches_from_accounts(self):
+        request = self.factory.get("/api/v1/me")
+        with (
+            self.settings(DEV_USER_UUID=TEST_UUID),
+            patch.object(
+                accounts_client.accounts_client,
+                "aget_user_info",
+                AsyncMock(return_value={"faculty_status": "confirmed_faculty"}),
+            ),
+        ):
+            response = async_to_sync(me_async)(request)
+        self.assertTrue(response["logged_in"])
+        self.assertEqual(response["faculty_status"], "confirmed_faculty")
+
+    def test_aget_user_info_fetches_with_httpx_and_caches(self):
+        client = AccountsClient()
+        client._token, client._token_expires_at = "token", time.time() + 600
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={"items": [{"faculty_status": "confirmed_faculty"}]})
+
+        async def lookup_twice():
+            session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with patch.object(client, "_async_session", return_value=session):
+                first = await client.aget_user_info(TEST_UUID)
+                second = await client.aget_user_info(TEST_UUID)
+            await session.aclose()
+            return first, second
+
+        first, second = async_to_sync(lookup_twice)()
+        self.assertEqual(first, second)
+        self.assertEqual(first["faculty_status"], "confirmed_faculty")
+        self.assertEqual(len(calls), 1)
+
+    def test_info_async_requires_scope(self):
+        request = self.factory.get("/api/v1/info")
+        status, body = async_to_sync(info_async)(request)
+        self.assertEqual(status, 401)
+
+    def test_case_async_creates_case(self):
+        request = self.factory.post("/api/v1/case")
+        request.auth_type, request.auth_scopes = "api_key", ["write:cases"]
+        payload = CaseCreateSchema(subject="Test", description="Test")
+        with patch("api.api_v1.Case.objects.acreate", AsyncMock(return_value="case")) as acreate:
+            self.assertEqual(async_to_sync(salesforce_case_async)(request, payload), "case")
+        self.assertEqual(acreate.call_args.kwargs["subject"], "Test")
+
 
 class ContactEndpointTest(TestCase):
     """Test GET /contact endpoint."""
 
     def setUp(self):
+        cache.clear()
         self.client = TestClient(router)
         self.account = Account.objects.create(id="001000000000001", name="Test University")
         self.contact = Contact.objects.create(
@@ -127,6 +331,16 @@ class ContactEndpointTest(TestCase):
         response = self.client.get("/contact")
         self.assertEqual(response.status_code, 404)
 
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    def test_generation_bump_invalidates_cached_contact(self, mock_v1, mock_auth):
+        self.assertEqual(self.client.get("/contact").json()["first_name"], "Test")
+        Contact.objects.filter(id=self.contact.id).update(first_name="Synced")
+        self.assertEqual(self.client.get("/contact").json()["first_name"], "Test")
+
+        bump_generations("contact", [TEST_UUID])
+        self.assertEqual(self.client.get("/contact").json()["first_name"], "Synced")
+
     @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
     @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
     def test_update_contact(self, mock_v1, mock_auth):
@@ -144,10 +358,203 @@ class ContactEndpointTest(TestCase):
         self.assertEqual(self.contact.full_name, "Updated User")
 
 
+class BatchLookupEndpointTest(TestCase):
+    """Test POST /contacts/batch and POST /schools/batch."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient(router)
+        self.account = Account.objects.create(id="001000000000001", name="Test University")
+        Account.objects.create(id="001000000000002", name="Rice University")
+        self.contact = Contact.objects.create(
+            id="003000000000001",
+            first_name="Test",
+            accounts_uuid=TEST_UUID,
+            account=self.account,
+        )
+        Contact.objects.create(
+            id="003000000000002", first_name="Other", accounts_uuid="other-uuid", account=self.account
+        )
+        _, raw_key = APIKey.create_key(name="nightly", scopes=["read:contacts", "read:schools"])
+        self.headers = {"Authorization": f"Bearer {raw_key}"}
+
+    def test_contacts_batch_by_uuid_and_id(self):
+        response = self.client.post(
+            "/contacts/batch",
+            json={"accounts_uuids": [TEST_UUID, "unknown-uuid"], "contact_ids": ["003000000000002"]},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([c["id"] for c in data["contacts"]], ["003000000000001", "003000000000002"])
+        self.assertEqual(data["missing"], ["unknown-uuid"])
+
+    def test_contacts_batch_shares_contact_cache(self):
+        self.client.post("/contacts/batch", json={"accounts_uuids": [TEST_UUID]}, headers=self.headers)
+        Contact.objects.filter(id=self.contact.id).update(first_name="Synced")
+        with patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user):
+            self.assertEqual(self.client.get("/contact").json()["first_name"], "Test")
+
+        with self.assertNumQueries(0):
+            response = self.client.post("/contacts/batch", json={"accounts_uuids": [TEST_UUID]}, headers=self.headers)
+        self.assertEqual(response.json()["contacts"][0]["first_name"], "Test")
+
+    def test_contacts_batch_keeps_request_order_with_cached_and_uncached(self):
+        # cache only TEST_UUID, then ask for the uncached one first
+        self.client.post("/contacts/batch", json={"accounts_uuids": [TEST_UUID]}, headers=self.headers)
+        response = self.client.post(
+            "/contacts/batch", json={"accounts_uuids": ["other-uuid", TEST_UUID]}, headers=self.headers
+        )
+        self.assertEqual([c["id"] for c in response.json()["contacts"]], ["003000000000002", "003000000000001"])
+
+    def test_contacts_batch_requires_scope(self):
+        _, raw_key = APIKey.create_key(name="books-only", scopes=["read:books"])
+        response = self.client.post(
+            "/contacts/batch", json={"accounts_uuids": [TEST_UUID]}, headers={"Authorization": f"Bearer {raw_key}"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_schools_batch_caches_misses(self):
+        ids = ["001000000000002", "001000000000001", "001000000000009"]
+        response = self.client.post("/schools/batch", json={"ids": ids}, headers=self.headers)
+        data = response.json()
+        self.assertEqual([s["name"] for s in data["schools"]], ["Rice University", "Test University"])
+        self.assertEqual(data["missing"], ["001000000000009"])
+
+        with self.assertNumQueries(1):  # only the miss is queried again
+            self.client.post("/schools/batch", json={"ids": ids}, headers=self.headers)
+
+    def test_school_generation_bump_invalidates_cached_school(self):
+        self.client.post("/schools/batch", json={"ids": ["001000000000002"]}, headers=self.headers)
+        Account.objects.filter(id="001000000000002").update(name="Rice")
+        bump_generations("school", ["001000000000002"])
+        response = self.client.get("/schools/001000000000002", headers=self.headers)
+        self.assertEqual(response.json()["name"], "Rice")
+
+
+@override_settings(RATE_LIMITS={"read": "2/hour", "salesforce": "1/hour", "forms": "10/min", "export": "30/hour"})
+class RateLimitTest(TestCase):
+    """Test the per-caller token buckets in api/ratelimit.py."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient(router)
+        account = Account.objects.create(id="001000000000001", name="Test University")
+        Account.objects.create(id="001000000000002", name="Rice University")
+        Account.objects.create(id="001000000000003", name="Houston Community College")
+        Contact.objects.create(id="003000000000001", first_name="Test", accounts_uuid=TEST_UUID, account=account)
+        _, raw_key = APIKey.create_key(name="nightly", scopes=["read:schools", "write:cases"])
+        self.headers = {"Authorization": f"Bearer {raw_key}"}
+
+    def test_exhausted_budget_returns_429(self):
+        case = {"subject": "Help", "description": "Something is broken"}
+        with patch(
+            "api.api_v1.Case.objects.create", return_value={**case, "product": None, "feature": None, "issue": None}
+        ):
+            self.assertEqual(self.client.post("/case", json=case, headers=self.headers).status_code, 200)
+            response = self.client.post("/case", json=case, headers=self.headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Expected available in 3600 seconds", response.json()["detail"])
+
+    def test_rate_limited_response_has_retry_after(self):
+        # the ninja TestClient serves routers from a plain NinjaAPI, the header comes from NinjaExtraAPI
+        response = api.on_exception(RequestFactory().get("/api/v1/case"), RateLimited(wait=12.5))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "13")
+
+    def test_cache_hits_are_free(self):
+        with patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user):
+            for _ in range(5):
+                self.assertEqual(self.client.get("/contact").status_code, 200)
+            # forcing a refresh goes to the database and is charged, the earlier hits were not
+            self.assertEqual(self.client.get("/contact?expire=true").status_code, 200)
+            self.assertEqual(self.client.get("/contact?expire=true").status_code, 429)
+
+    def test_batch_is_charged_per_miss(self):
+        ids = ["001000000000001", "001000000000002", "001000000000003"]
+        response = self.client.post("/schools/batch", json={"ids": ids[:2]}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post("/schools/batch", json={"ids": ids}, headers=self.headers).status_code, 429)
+        self.assertEqual(
+            self.client.post("/schools/batch", json={"ids": ids[:2]}, headers=self.headers).status_code, 200
+        )
+
+    def test_api_key_override(self):
+        APIKey.objects.filter(name="nightly").update(rate_limits={"read": "10/hour"})
+        ids = ["001000000000001", "001000000000002", "001000000000003"]
+        response = self.client.post("/schools/batch", json={"ids": ids}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_redis_unavailable_fails_open(self):
+        with (
+            patch("api.ratelimit._token_bucket", side_effect=NotImplementedError),
+            patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user),
+        ):
+            for _ in range(3):
+                self.assertEqual(self.client.get("/contact?expire=true").status_code, 200)
+
+
+class ExportEndpointTest(TestCase):
+    """Test GET /export/{dataset}."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = TestClient(router)
+        Account.objects.create(
+            id="001000000000001", name="Old School", last_modified_date=timezone.now() - timezone.timedelta(days=30)
+        )
+        Account.objects.create(id="001000000000002", name="New School", last_modified_date=timezone.now())
+        Account.objects.create(id="001000000000003", name="Deleted School", is_deleted=True)
+        _, raw_key = APIKey.create_key(name="analytics", scopes=["read:export"])
+        self.headers = {"Authorization": f"Bearer {raw_key}"}
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get("/export/accounts", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response.content.decode().splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Old School", "New School"])
+
+    def test_export_modified_since_and_deleted(self):
+        since = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+        response = self.client.get(f"/export/accounts?{urlencode({'modified_since': since})}", headers=self.headers)
+        self.assertEqual([json.loads(line)["id"] for line in response.content.splitlines()], ["001000000000002"])
+
+        response = self.client.get("/export/accounts?include_deleted=true", headers=self.headers)
+        self.assertEqual(len(response.content.splitlines()), 3)
+
+    def test_export_gzip_negotiation(self):
+        self.assertTrue(export.accepts_gzip("deflate, gzip;q=0.5"))
+        self.assertTrue(export.accepts_gzip("*"))
+        self.assertFalse(export.accepts_gzip("gzip;q=0"))
+        self.assertFalse(export.accepts_gzip("gzip;q=0, *"))
+        self.assertFalse(export.accepts_gzip("x-gzip"))
+        self.assertFalse(export.accepts_gzip(""))
+
+        response = self.client.get("/export/accounts", headers={**self.headers, "Accept-Encoding": "gzip;q=0"})
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_export_gzip(self):
+        response = self.client.get("/export/accounts", headers={**self.headers, "Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(response.content).splitlines()), 2)
+
+    def test_export_requires_api_key_with_scope(self):
+        with patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user):
+            self.assertEqual(self.client.get("/export/accounts").status_code, 401)
+        _, raw_key = APIKey.create_key(name="books-only", scopes=["read:books"])
+        response = self.client.get("/export/accounts", headers={"Authorization": f"Bearer {raw_key}"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_export_unknown_dataset(self):
+        self.assertEqual(self.client.get("/export/books", headers=self.headers).status_code, 404)
+
+
 class AdoptionsEndpointTest(TestCase):
     """Test GET /adoptions endpoint."""
 
     def setUp(self):
+        cache.clear()
         self.client = TestClient(router)
         self.account = Account.objects.create(id="001000000000001", name="Test University")
         self.contact = Contact.objects.create(
@@ -219,6 +626,62 @@ class AdoptionsEndpointTest(TestCase):
         response = self.client.get("/adoptions")
         self.assertEqual(response.status_code, 404)
 
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    def test_get_adoptions_assumed_filter(self, mock_v1, mock_auth):
+        Adoption.objects.create(
+            id="a0A000000000002",
+            contact=self.contact,
+            adoption_number="ADO-000002",
+            created_date=timezone.now(),
+            last_modified_date=timezone.now(),
+            system_modstamp=timezone.now(),
+            opportunity=self.opportunity,
+            base_year=2022,
+            adoption_type="Faculty/Teacher Adoption",
+            school_year="2022-2023",
+            confirmation_type="User Behavior Informed Adoption",
+            students=-1,
+            savings=100,
+        )
+        response = self.client.get("/adoptions?assumed=true")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["total_students"], 0)
+        self.assertEqual(data["first_year_adopting_openstax"], 2022)
+
+        data = self.client.get("/adoptions").json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(data["total_students"], 50)
+        self.assertEqual(data["total_savings"], 5100)
+
+        response = self.client.get("/adoptions?confirmed=true&assumed=true")
+        self.assertEqual(response.status_code, 404)
+
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    def test_get_adoptions_reads_summary(self, mock_v1, mock_auth):
+        # a missing summary is built for the response but not written from the (replica-routed) request
+        self.assertEqual(self.client.get("/adoptions").json()["count"], 1)
+        self.assertFalse(AdoptionSummary.objects.filter(contact=self.contact).exists())
+        refresh_adoption_summaries([self.contact.id])
+        bump_generations("adoptions", [self.contact.id])
+
+        # contact is cached, so a cold adoptions cache costs a single summary read
+        with self.assertNumQueries(1):
+            response = self.client.get("/adoptions?confirmed=true")
+        self.assertEqual(response.json()["count"], 1)
+
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_logged_in_user)
+    def test_get_adoptions_serves_prerendered_response(self, mock_v1, mock_auth):
+        first = self.client.get("/adoptions")
+        with self.assertNumQueries(0), patch("api.api_v1.render_json") as render:
+            second = self.client.get("/adoptions")
+        render.assert_not_called()
+        self.assertEqual(second.json(), first.json())
+
 
 class SchoolsEndpointTest(TestCase):
     """Test GET /schools endpoint."""
@@ -247,12 +710,96 @@ class SchoolsEndpointTest(TestCase):
         response = self.client.get("/schools?name=NonexistentSchool")
         self.assertEqual(response.status_code, 404)
 
+    def test_search_ranks_and_paginates(self):
+        Account.objects.create(id="001000000000003", name="Houston Rice Academy", city="Houston")
+        Account.objects.create(id="001000000000004", name="Riceville High School", city="Riceville")
+
+        response = self.client.get("/schools?name=Rice&limit=2")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["count"], len(data["schools"])), (3, 2))
+        self.assertEqual(data["schools"][-1]["name"], "Houston Rice Academy")
+        self.assertIsNotNone(data["next_cursor"])
+
+        response = self.client.get(f"/schools?name=Rice&limit=2&cursor={data['next_cursor']}")
+        data = response.json()
+        self.assertEqual([s["name"] for s in data["schools"]], ["Riceville High School"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_search_by_city(self):
+        Account.objects.create(id="001000000000003", name="Rice Prep", city="Houston")
+        response = self.client.get("/schools?city=houston")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s["name"] for s in response.json()["schools"]], ["Rice Prep"])
+
+    def test_search_without_limit_returns_every_match(self):
+        for i in range(SCHOOL_SEARCH_DEFAULT_LIMIT + 1):
+            Account.objects.create(id=f"0010000000001{i:02d}", name=f"Rice Campus {i}")
+        data = self.client.get("/schools?name=Rice").json()
+        self.assertEqual((data["count"], len(data["schools"])), (SCHOOL_SEARCH_DEFAULT_LIMIT + 2,) * 2)
+        self.assertIsNone(data["next_cursor"])
+
+    def test_search_invalid_cursor(self):
+        response = self.client.get("/schools?name=Rice&cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        # well-formed, but the rank is not a number
+        response = self.client.get(f"/schools?name=Rice&cursor={encode_cursor({'rank': 'high', 'id': '1'})}")
+        self.assertEqual(response.status_code, 400)
+
+
+class SchoolSuggestEndpointTest(TestCase):
+    """Test GET /schools/suggest and the in-memory typeahead index behind it."""
+
+    def setUp(self):
+        self.client = TestClient(router)
+        cache.clear()
+        typeahead.reset()
+        Account.objects.create(id="001000000000001", name="Rice University")
+        Account.objects.create(id="001000000000002", name="Houston Rice Academy")
+        Account.objects.create(id="001000000000003", name="École Polytechnique")
+
+    def tearDown(self):
+        typeahead.reset()
+
+    def test_suggest_name_prefix_first(self):
+        response = self.client.get("/schools/suggest?q=ric")
+        self.assertEqual(response.status_code, 200)
+        names = [s["name"] for s in response.json()["schools"]]
+        self.assertEqual(names, ["Rice University", "Houston Rice Academy"])
+
+    def test_suggest_matches_every_word_and_ignores_accents(self):
+        self.assertEqual(typeahead.get_index().search("rice hou"), [("001000000000002", "Houston Rice Academy")])
+        self.assertEqual(typeahead.get_index().search("ecole"), [("001000000000003", "École Polytechnique")])
+
+    def test_suggest_does_not_query_database_once_built(self):
+        self.client.get("/schools/suggest?q=ric")
+        with self.assertNumQueries(0):
+            response = self.client.get("/schools/suggest?q=univ")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_sync_signal_rebuilds_index(self):
+        index = typeahead.get_index()
+        Account.objects.create(id="001000000000004", name="Rice Prep")
+        typeahead.signal_rebuild()
+        typeahead._last_check = 0.0
+        with patch("api.typeahead.threading.Thread") as thread:
+            typeahead.get_index()
+        thread.return_value.start.assert_called_once()
+        typeahead._rebuild(typeahead._current_version())
+        self.assertIsNot(typeahead.get_index(), index)
+        self.assertEqual(len(typeahead.get_index()), 4)
+
+    def test_suggest_query_too_short(self):
+        response = self.client.get("/schools/suggest?q=r")
+        self.assertEqual(response.status_code, 422)
+
 
 class BooksEndpointTest(TestCase):
     """Test GET /books endpoint."""
 
     def setUp(self):
         self.client = TestClient(router)
+        cache.clear()
         Book.objects.create(id="a0B000000000001", name="Physics", official_name="College Physics", type="Textbook")
         SuperUser.objects.create(accounts_uuid=SUPER_USER_UUID, name="Test Super")
 
@@ -269,6 +816,102 @@ class BooksEndpointTest(TestCase):
         response = self.client.get("/books")
         self.assertEqual(response.status_code, 401)
 
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_get_books_paginates_by_id(self, mock_v1, mock_auth):
+        Book.objects.create(id="a0B000000000002", name="Biology", official_name="Biology 2e", active_book=True)
+        Book.objects.create(id="a0B000000000003", name="Calculus", official_name="Calculus", active_book=True)
+        first = self.client.get("/books?limit=2").json()
+        self.assertEqual([b["id"] for b in first["books"]], ["a0B000000000001", "a0B000000000002"])
+
+        second = self.client.get(f"/books?limit=2&cursor={first['next_cursor']}").json()
+        self.assertEqual([b["id"] for b in second["books"]], ["a0B000000000003"])
+        self.assertIsNone(second["next_cursor"])
+
+
+class ORJSONRendererTest(TestCase):
+    """The orjson renderer must produce the same values as ninja's stdlib JSONRenderer."""
+
+    def test_matches_stdlib_renderer(self):
+        data = {
+            "when": timezone.now(),
+            "day": datetime.date(2026, 1, 2),
+            "amount": Decimal("12.50"),
+            "counts": {1: "one"},
+            "nested": [{"uuid": uuid.UUID(TEST_UUID)}],
+        }
+        stdlib = JSONRenderer().render(None, data, response_status=200)
+        self.assertEqual(json.loads(ORJSONRenderer().render(None, data, response_status=200)), json.loads(stdlib))
+
+    def test_render_json_validates_against_schema(self):
+        rendered = render_json({"code": 404, "detail": "Missing", "extra": "dropped"}, ErrorSchema)
+        self.assertEqual(json.loads(rendered), {"code": 404, "detail": "Missing"})
+
+
+class TieredCacheTest(TestCase):
+    """Test the in-process LRU + Redis cache used for hot global values."""
+
+    def setUp(self):
+        cache.clear()
+        self.worker_a = TieredCache("test_tier", timeout=60, maxsize=2)
+        self.worker_b = TieredCache("test_tier", timeout=60, maxsize=2)
+
+    def test_local_hit_skips_redis(self):
+        self.worker_a.set("answer", 42)
+        with patch("api.cache.cache.get", wraps=cache.get) as redis_get, self.settings(TIERED_CACHE_CHECK_INTERVAL=60):
+            self.assertEqual(self.worker_a.get("answer"), 42)
+            redis_get.assert_not_called()
+
+    def test_other_worker_reads_through_redis(self):
+        self.worker_a.set("answer", 42)
+        self.assertEqual(self.worker_b.get("answer"), 42)
+        self.assertEqual(self.worker_b.get_or_set("answer", lambda: 0), 42)
+
+    def test_invalidate_reaches_other_workers(self):
+        self.worker_a.set("answer", 42)
+        self.assertEqual(self.worker_b.get("answer"), 42)
+        self.worker_a.invalidate()
+        self.assertIsNone(self.worker_b.get("answer"))
+
+    def test_lru_is_bounded(self):
+        for key in ("a", "b", "c"):
+            self.worker_a.set(key, key)
+        self.assertEqual(list(self.worker_a._local), ["b", "c"])
+
+    def test_book_sync_invalidates_book_list(self):
+        Book.objects.create(id="a0B000000000001", name="Physics", active_book=True)
+        self.assertEqual(len(get_active_books()), 1)
+        Book.objects.create(id="a0B000000000002", name="Biology", active_book=True)
+        self.assertEqual(len(get_active_books()), 1)
+        update_or_create_books([])
+        self.assertEqual(len(get_active_books()), 2)
+
+
+class SuperUserCacheTest(TestCase):
+    """Test cached SuperUser authorization and its signal invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.super_user = SuperUser.objects.create(accounts_uuid=SUPER_USER_UUID, name="Test Super")
+
+    def test_repeat_checks_cost_no_queries(self):
+        self.assertTrue(SuperUser.is_super_user(SUPER_USER_UUID))
+        with self.assertNumQueries(0):
+            self.assertTrue(SuperUser.is_super_user(uuid.UUID(SUPER_USER_UUID)))
+            self.assertFalse(SuperUser.is_super_user(TEST_UUID))
+            self.assertFalse(SuperUser.is_super_user("not-a-uuid"))
+
+    def test_deactivate_invalidates(self):
+        self.assertTrue(SuperUser.is_super_user(SUPER_USER_UUID))
+        self.super_user.is_active = False
+        self.super_user.save()
+        self.assertFalse(SuperUser.is_super_user(SUPER_USER_UUID))
+
+    def test_delete_invalidates(self):
+        self.assertTrue(SuperUser.is_super_user(SUPER_USER_UUID))
+        self.super_user.delete()
+        self.assertFalse(SuperUser.is_super_user(SUPER_USER_UUID))
+
 
 class FormSubmissionTest(TestCase):
     """Test POST /forms/submit endpoint."""
@@ -314,13 +957,14 @@ class FormSubmissionTest(TestCase):
                 "submitted_at": (time.time() - 30) * 1000,
             },
         )
-        # This will fail because we can't connect to SF in tests,
-        # but it should at least get past validation
-        self.assertIn(response.status_code, [200, 500])
+        # queued for the process_form_submissions workers, Salesforce is not called in the request
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "pending")
+        self.assertEqual(FormSubmission.objects.get(pk=response.json()["id"]).status, "pending")
 
 
 class CaseValidationTest(TestCase):
-    """Test POST /case input validation."""
+    """Test POST /case input validation, and POST /case/queue."""
 
     def setUp(self):
         self.client = TestClient(router)
@@ -348,3 +992,16 @@ class CaseValidationTest(TestCase):
             },
         )
         self.assertEqual(response.status_code, 422)
+
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    @patch("api.api_v1.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_case_queue_returns_submission(self, mock_v1, mock_auth):
+        response = self.client.post("/case/queue", json={"subject": "Help", "description": "Test description"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()["form_type"], response.json()["status"]), ("api_case", "pending"))
+        submission = FormSubmission.objects.get(pk=response.json()["id"])
+        self.assertEqual((submission.data["subject"], submission.auth_identifier), ("Help", SUPER_USER_UUID))
+
+    def test_case_queue_requires_auth(self):
+        response = self.client.post("/case/queue", json={"subject": "Help", "description": "Test description"})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,172 @@
+"""
+Per-request time spent in each layer below the view: database queries, Redis, Salesforce and authentication.
+
+ServerTimingMiddleware opens a Timings for each /api/ request and makes it current for the request's context
+(a ContextVar, so sync_to_async threads in ASGI mode see it too). The layers add to whatever Timings is current:
+
+- database: an execute wrapper installed on every connection as it is opened
+- Redis: TimedRedisClient, the django-redis client class in settings.CACHES
+- Salesforce: a response hook on the django-salesforce HTTP session, which every SOQL query and REST call
+  (sf/collections.py, the /limits/ check) goes through; its cursor does not honor execute wrappers
+- auth: measure("auth") around the ninja authenticators, which covers SSO cookie crypto and API key checks
+
+Layers can overlap (authentication reads the cache), so their times need not add up to the total. Work
+outside a request, such as syncs and the audit log flusher thread, is not measured.
+"""
+
+import contextvars
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django_redis.client import DefaultClient
+
+# Server-Timing metric name and description of each layer
+LAYERS = {
+    "db": "Database",
+    "cache": "Redis",
+    "sf": "Salesforce",
+    "auth": "Auth",
+}
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class Timings:
+    """Counts and seconds per layer for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._open = set()
+
+    def add(self, layer, seconds, count=1):
+        self.counts[layer] += count
+        self.seconds[layer] += seconds
+
+    def ms(self, layer):
+        return round(self.seconds[layer] * 1000, 2)
+
+    def header(self):
+        """The Server-Timing header value."""
+        metrics = []
+        for layer, label in LAYERS.items():
+            if layer == "cache":
+                detail = f"{label}: {self.counts['cache_hit']} hits, {self.counts['cache_miss']} misses"
+            elif layer == "auth":
+                detail = label
+            else:
+                detail = f"{label}: {self.counts[layer]} calls"
+            metrics.append(f'{layer};dur={self.ms(layer)};desc="{detail}"')
+        metrics.append(f"total;dur={round((time.perf_counter() - self.started) * 1000, 2)}")
+        return ", ".join(metrics)
+
+    def log_fields(self):
+        """The RequestLog columns."""
+        return {
+            "db_queries": self.counts["db"],
+            "db_ms": self.ms("db"),
+            "cache_hits": self.counts["cache_hit"],
+            "cache_misses": self.counts["cache_miss"],
+            "cache_ms": self.ms("cache"),
+            "sf_calls": self.counts["sf"],
+            "sf_ms": self.ms("sf"),
+            "auth_ms": self.ms("auth"),
+        }
+
+
+def start():
+    """Make a new Timings current. Returns it and the token to pass to stop()."""
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def measure(layer, count=1):
+    """Add the time spent in the block to layer of the current request, if any. Nested blocks count once."""
+    timings = _current.get()
+    if timings is None or layer in timings._open:
+        yield
+        return
+    timings._open.add(layer)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(layer)
+        timings.add(layer, time.perf_counter() - started, count)
+
+
+def _time_query(execute, sql, params, many, context):
+    with measure("db"):
+        return execute(sql, params, many, context)
+
+
+def _time_sf_response(response, *args, **kwargs):
+    timings = _current.get()
+    if timings is not None:
+        timings.add("sf", response.elapsed.total_seconds())
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if connection.vendor == "salesforce":
+        hooks = connection.sf_session.hooks["response"]
+        if _time_sf_response not in hooks:
+            hooks.append(_time_sf_response)
+    elif _time_query not in connection.execute_wrappers:
+        # first, so that popping a wrapper added with connection.execute_wrapper() does not remove this one
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class TimedRedisClient(DefaultClient):
+    """django-redis client that adds its round trips, hits and misses to the current request's timings."""
+
+    def get(self, key, default=None, version=None, client=None):
+        with measure("cache"):
+            value = super().get(key, default=default, version=version, client=client)
+        timings = _current.get()
+        if timings is not None:
+            timings.counts["cache_miss" if value is default else "cache_hit"] += 1
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        with measure("cache"):
+            values = super().get_many(keys, version=version, client=client)
+        timings = _current.get()
+        if timings is not None:
+            timings.counts["cache_hit"] += len(values)
+            timings.counts["cache_miss"] += len(keys) - len(values)
+        return values
+
+    def set(self, *args, **kwargs):
+        with measure("cache"):
+            return super().set(*args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        with measure("cache"):
+            return super().set_many(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with measure("cache"):
+            return super().delete(*args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        with measure("cache"):
+            return super().delete_many(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        with measure("cache"):
+            return super().incr(*args, **kwargs)
@@ -0,0 +1,231 @@
+"""
+In-process school name typeahead for /schools/suggest.
+
+The index is built from db.Account and held entirely in memory, so answering a keystroke never touches
+Postgres. To keep the footprint small it is array-backed rather than one Python object per school: names, ids
+and word tokens live in NUL-separated string blobs with array("I") offsets, searched with binary search.
+
+update_or_create_accounts bumps a version key in the cache when a sync finishes. Each worker compares that
+version at most every VERSION_CHECK_INTERVAL seconds and rebuilds in a background thread, swapping the new
+index in atomically; requests keep using the previous index until then.
+"""
+
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+
+from django.core.cache import cache
+from django.db import connection
+
+from db.models import Account
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "sfapi:typeahead:version"
+VERSION_CHECK_INTERVAL = 30  # seconds
+DEFAULT_VERSION = "0"
+
+# Bounds the work done for very short prefixes that match a large share of all words
+MAX_TOKEN_SCAN = 5000
+
+_SEP = "\x00"
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation so "Saint-Étienne" matches "saint etienne"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+class _Blob:
+    """A sorted or unsorted list of strings packed into one string with an offsets array."""
+
+    def __init__(self, values):
+        self.offsets = array("I", [0])
+        for value in values:
+            self.offsets.append(self.offsets[-1] + len(value) + 1)
+        self.data = _SEP.join(values) + _SEP if values else ""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i] : self.offsets[i + 1] - 1]
+
+    def bisect_left(self, value, lo=0, hi=None):
+        """Leftmost position value could be inserted at, for blobs built from sorted values."""
+        hi = len(self) if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefix_range(self, prefix):
+        lo = self.bisect_left(prefix)
+        return lo, self.bisect_left(prefix + "\uffff", lo)
+
+    def nbytes(self):
+        return sys.getsizeof(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class SchoolIndex:
+    """Immutable typeahead index; build one with SchoolIndex.build() and swap the reference to replace it."""
+
+    build_seconds = 0.0
+
+    def __init__(self, rows, version=DEFAULT_VERSION):
+        # rows: (id, display name) pairs
+        keyed = sorted(((normalize(name), school_id, name) for school_id, name in rows), key=lambda r: r[0])
+        self.version = version
+        self.keys = _Blob([r[0] for r in keyed])
+        self.ids = _Blob([r[1] for r in keyed])
+        self.names = _Blob([r[2] for r in keyed])
+
+        tokens = sorted({(word, row) for row, (key, _, _) in enumerate(keyed) for word in key.split()})
+        self.tokens = _Blob([word for word, _ in tokens])
+        self.token_rows = array("I", (row for _, row in tokens))
+
+    @classmethod
+    def build(cls, version=DEFAULT_VERSION):
+        started = time.perf_counter()
+        index = cls(Account.objects.values_list("id", "name").iterator(chunk_size=5000), version=version)
+        index.build_seconds = time.perf_counter() - started
+        logger.info(
+            f"School typeahead rebuilt: {len(index)} schools, {index.nbytes() / 1024:.0f} KiB "
+            f"in {index.build_seconds * 1000:.0f} ms (version {version})"
+        )
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nbytes(self):
+        return (
+            self.keys.nbytes()
+            + self.ids.nbytes()
+            + self.names.nbytes()
+            + self.tokens.nbytes()
+            + self.token_rows.itemsize * len(self.token_rows)
+        )
+
+    def search(self, query, limit=10):
+        """
+        Schools whose name starts with the query come first (alphabetically), then schools where every query
+        word is a prefix of some word of the name. Returns (id, name) pairs.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        words = query.split()
+
+        rows = []
+        lo, hi = self.keys.prefix_range(query)
+        rows.extend(range(lo, min(hi, lo + limit)))
+
+        if len(rows) < limit:
+            seen = set(rows)
+            # scan the postings of the most selective word in token order, which is alphabetical by matching
+            # word and then by name; stop as soon as the page is full
+            lo, hi = min((self.tokens.prefix_range(w) for w in words), key=lambda r: r[1] - r[0])
+            for i in range(lo, min(hi, lo + MAX_TOKEN_SCAN)):
+                row = self.token_rows[i]
+                if row in seen:
+                    continue
+                seen.add(row)
+                key_words = self.keys[row].split()
+                if all(any(kw.startswith(w) for kw in key_words) for w in words):
+                    rows.append(row)
+                    if len(rows) == limit:
+                        break
+
+        return [(self.ids[row], self.names[row]) for row in rows]
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "schools": len(self),
+            "tokens": len(self.tokens),
+            "memory_bytes": self.nbytes(),
+            "build_ms": round(self.build_seconds * 1000, 1),
+        }
+
+
+_index = None
+_last_check = 0.0
+_rebuild_lock = threading.Lock()
+
+
+def signal_rebuild():
+    """Tell every worker its index is stale; called when an accounts sync finishes."""
+    cache.set(VERSION_CACHE_KEY, f"{time.time_ns():x}", None)
+
+
+def _current_version():
+    return cache.get(VERSION_CACHE_KEY) or DEFAULT_VERSION
+
+
+def _rebuild(version):
+    global _index
+    try:
+        _index = SchoolIndex.build(version)
+    except Exception:
+        logger.exception("School typeahead rebuild failed")
+    finally:
+        _rebuild_lock.release()
+
+
+def _rebuild_in_background(version):
+    try:
+        _rebuild(version)
+    finally:
+        # the rebuild thread got its own database connection, don't leave it open
+        connection.close()
+
+
+def get_index():
+    """
+    The worker's current index. Built synchronously the first time; afterwards a newer version in the cache
+    triggers a background rebuild while the existing index keeps serving.
+    """
+    global _last_check
+    now = time.monotonic()
+    if _index is not None and now - _last_check < VERSION_CHECK_INTERVAL:
+        return _index
+
+    _last_check = now
+    version = _current_version()
+    if _index is None:
+        _build_now(version)
+    elif _index.version != version and _rebuild_lock.acquire(blocking=False):
+        threading.Thread(
+            target=_rebuild_in_background, args=(version,), name="school-typeahead-rebuild", daemon=True
+        ).start()
+    return _index
+
+
+def _build_now(version):
+    global _index
+    with _rebuild_lock:
+        if _index is None:
+            _index = SchoolIndex.build(version)
+
+
+def stats():
+    """Footprint of this worker's index for /info, or None if it has not been built yet."""
+    return _index.stats() if _index is not None else None
+
+
+def reset():
+    """Drop this worker's index; the next lookup rebuilds it. Used by tests."""
+    global _index, _last_check
+    _index = None
+    _last_check = 0.0
@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Account, Adoption, Book, Contact, Opportunity
+from .models import Account, Adoption, AdoptionSummary, Book, Contact, Opportunity, WriteBack
 
 
 class AccountAdmin(admin.ModelAdmin):
@@ -58,3 +59,34 @@ class AdoptionAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Adoption, AdoptionAdmin)
+
+
+class AdoptionSummaryAdmin(admin.ModelAdmin):
+    list_display = ("contact", "refreshed_at")
+    search_fields = ("contact__id", "contact__accounts_uuid")
+    raw_id_fields = ("contact",)
+    readonly_fields = ("adoptions", "totals", "refreshed_at")
+
+
+admin.site.register(AdoptionSummary, AdoptionSummaryAdmin)
+
+
+class WriteBackAdmin(admin.ModelAdmin):
+    list_display = ("record_id", "model_name", "field_name", "status", "attempts", "changed_by", "created_at")
+    search_fields = ("record_id", "changed_by")
+    list_filter = ("model_name", "status")
+    readonly_fields = [f.name for f in WriteBack._meta.fields]
+    actions = ["push_again"]
+
+    @admin.action(description="Push selected failed, conflicting or dead-lettered changes again, overriding Salesforce")
+    def push_again(self, request, queryset):
+        count = queryset.filter(status__in=["failed", "conflict", "dead"]).update(
+            status="pending", attempts=0, base_last_modified=None, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} changes queued to be pushed again.")
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(WriteBack, WriteBackAdmin)
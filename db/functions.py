@@ -1,10 +1,12 @@
 import logging
 
-from django.core.cache import cache
 from django.db import transaction
 from sentry_sdk import capture_exception
 
-from .models import Account, Adoption, Book, Contact, Opportunity
+from api.cache import books_cache, bump_generations, schools_cache
+from api.typeahead import signal_rebuild
+
+from .models import Account, Adoption, AdoptionSummary, Book, Contact, Opportunity, WriteBack
 
 logger = logging.getLogger("openstax")
 
@@ -102,6 +104,15 @@ ADOPTION_SYNC_FIELDS = [
     "savings",
 ]
 
+CONFIRMED_ADOPTION = "OpenStax Confirmed Adoption"
+
+# Filter variants served by /adoptions, precomputed on every AdoptionSummary
+ADOPTION_SUMMARY_VARIANTS = {
+    "all": lambda row: True,
+    "confirmed": lambda row: row["confirmation_type"] == CONFIRMED_ADOPTION,
+    "assumed": lambda row: row["confirmation_type"] != CONFIRMED_ADOPTION,
+}
+
 BOOK_SYNC_FIELDS = [
     "name",
     "official_name",
@@ -111,6 +122,25 @@ BOOK_SYNC_FIELDS = [
 ]
 
 
+def _changed_ids(manager, records, fields):
+    """IDs of the records whose fields differ from their stored rows. Call it before the upsert; new rows are left out."""
+    incoming = {record.pk: tuple(getattr(record, field) for field in fields) for record in records}
+    if not incoming:
+        return set()
+    stored = manager.filter(pk__in=list(incoming)).values_list("pk", *fields)
+    return {pk for pk, *values in stored if tuple(values) != incoming[pk]}
+
+
+def _refresh_summaries_of(adoptions):
+    """
+    Rebuild the summaries of the contacts with these adoptions, after a sync changed something the summaries copy
+    (school and book names). Returns the contact IDs, whose cached /adoptions the caller bumps after committing.
+    """
+    contact_ids = set(adoptions.values_list("contact_id", flat=True))
+    refresh_adoption_summaries(contact_ids)
+    return contact_ids
+
+
 def update_or_create_accounts(salesforce_accounts, full_sync=False):
     """
     Bulk upsert accounts into the local database using ON CONFLICT DO UPDATE.
@@ -146,6 +176,7 @@ def update_or_create_accounts(salesforce_accounts, full_sync=False):
             )
         )
 
+    renamed_ids = _changed_ids(Account.all_objects, records, ["name"])
     with transaction.atomic():
         Account.all_objects.bulk_create(
             records,
@@ -154,11 +185,28 @@ def update_or_create_accounts(salesforce_accounts, full_sync=False):
             update_fields=ACCOUNT_SYNC_FIELDS + ["is_deleted"],
             batch_size=500,
         )
+        stale_ids = set(synced_ids)
         if full_sync:
-            Account.all_objects.exclude(id__in=synced_ids).update(is_deleted=True)
+            newly_deleted = Account.all_objects.exclude(id__in=synced_ids).filter(is_deleted=False)
+            stale_ids.update(newly_deleted.values_list("id", flat=True))
+            newly_deleted.update(is_deleted=True)
+        # Adoption summaries show the school name of each adoption's opportunity
+        summary_contact_ids = _refresh_summaries_of(Adoption.objects.filter(opportunity__account_id__in=renamed_ids))
+        # and /contact payloads the school name of the contact's account
+        renamed_uuids = set(
+            Contact.all_objects.filter(account_id__in=renamed_ids).values_list("accounts_uuid", flat=True)
+        )
 
-    cache.delete("sfapi:school_count")
-    logger.info(f"Accounts sync: {len(records)} upserted (full_sync={full_sync})")
+    # Cached /schools/{school_id} payloads are keyed by account ID
+    bump_generations("school", stale_ids)
+    bump_generations("contact", renamed_uuids)
+    bump_generations("adoptions", summary_contact_ids)
+    schools_cache.invalidate()
+    signal_rebuild()
+    logger.info(
+        f"Accounts sync: {len(records)} upserted, {len(summary_contact_ids)} adoption summaries refreshed "
+        f"(full_sync={full_sync})"
+    )
     return len(records)
 
 
@@ -177,12 +225,25 @@ def update_or_create_contacts(salesforce_contacts, full_sync=False):
     else:
         valid_account_ids = set()
 
+    # local API edits that are not in Salesforce yet (sf/write_back.py) must not be overwritten by the older version
+    unsent = set(
+        WriteBack.objects.filter(
+            model_name="Contact",
+            record_id__in=[c.id for c in salesforce_contacts],
+            status__in=WriteBack.UNSENT_STATUSES,
+        ).values_list("record_id", flat=True)
+    )
+
     records = []
     synced_ids = []
     skipped = 0
 
     for contact in salesforce_contacts:
         account_id = contact.account_id
+        if contact.id in unsent:
+            synced_ids.append(contact.id)
+            skipped += 1
+            continue
         if account_id and account_id not in valid_account_ids:
             capture_exception(Exception(f"Account with id {account_id} does not exist"))
             skipped += 1
@@ -221,9 +282,14 @@ def update_or_create_contacts(salesforce_contacts, full_sync=False):
             update_fields=CONTACT_SYNC_FIELDS + ["is_deleted"],
             batch_size=500,
         )
+        stale_uuids = {record.accounts_uuid for record in records}
         if full_sync:
-            Contact.all_objects.exclude(id__in=synced_ids).update(is_deleted=True)
+            newly_deleted = Contact.all_objects.exclude(id__in=synced_ids).filter(is_deleted=False)
+            stale_uuids.update(newly_deleted.values_list("accounts_uuid", flat=True))
+            newly_deleted.update(is_deleted=True)
 
+    # Cached /contact payloads are keyed by accounts UUID
+    bump_generations("contact", stale_uuids)
     logger.info(f"Contacts sync: {len(records)} upserted, {skipped} skipped (full_sync={full_sync})")
     return len(records)
 
@@ -312,6 +378,8 @@ def update_or_create_opportunities(salesforce_opportunities, full_sync=False):
             )
         )
 
+    # Adoption summaries show the school and book of each adoption's opportunity
+    moved_ids = _changed_ids(Opportunity.objects, records, ["account_id", "book_id"])
     with transaction.atomic():
         Opportunity.objects.bulk_create(
             records,
@@ -320,8 +388,13 @@ def update_or_create_opportunities(salesforce_opportunities, full_sync=False):
             update_fields=OPPORTUNITY_SYNC_FIELDS,
             batch_size=500,
         )
+        summary_contact_ids = _refresh_summaries_of(Adoption.objects.filter(opportunity_id__in=moved_ids))
 
-    logger.info(f"Opportunities sync: {len(records)} upserted, {skipped} skipped (full_sync={full_sync})")
+    bump_generations("adoptions", summary_contact_ids)
+    logger.info(
+        f"Opportunities sync: {len(records)} upserted, {skipped} skipped, "
+        f"{len(summary_contact_ids)} adoption summaries refreshed (full_sync={full_sync})"
+    )
     return len(records)
 
 
@@ -392,6 +465,8 @@ def update_or_create_adoptions(salesforce_adoptions, full_sync=False):
             )
         )
 
+    # An adoption moved to another contact must also leave the summary of the contact it had
+    previous_contact_ids = set(Adoption.objects.filter(id__in=synced_ids).values_list("contact_id", flat=True))
     with transaction.atomic():
         Adoption.objects.bulk_create(
             records,
@@ -400,11 +475,124 @@ def update_or_create_adoptions(salesforce_adoptions, full_sync=False):
             update_fields=ADOPTION_SYNC_FIELDS,
             batch_size=500,
         )
-
-    logger.info(f"Adoptions sync: {len(records)} upserted, {skipped} skipped (full_sync={full_sync})")
+        # Only the contacts touched by this batch need their summary rebuilt
+        touched_contact_ids = {record.contact_id for record in records} | previous_contact_ids
+        summary_count = refresh_adoption_summaries(touched_contact_ids)
+
+    # Cached /adoptions payloads are keyed by contact ID
+    bump_generations("adoptions", touched_contact_ids)
+    logger.info(
+        f"Adoptions sync: {len(records)} upserted, {skipped} skipped, "
+        f"{summary_count} summaries refreshed (full_sync={full_sync})"
+    )
     return len(records)
 
 
+def _summarize_adoptions(rows):
+    """Totals for a list of compact adoption rows. Null or negative students/savings are not counted."""
+    base_years = [row["base_year"] for row in rows if row["base_year"] is not None]
+    return {
+        "count": len(rows),
+        "first_year_adopting_openstax": min(base_years) if base_years else None,
+        "total_students": sum(row["students"] for row in rows if row["students"] and row["students"] > 0),
+        "total_savings": sum(row["savings"] for row in rows if row["savings"] and row["savings"] > 0),
+    }
+
+
+def build_adoption_summaries(contact_ids):
+    """
+    The adoptions and totals of the given contacts, from the local adoption tables, as
+    {contact_id: {"adoptions": rows, "totals": totals}}. Contacts with no adoptions get an empty summary.
+    """
+    contact_ids = {contact_id for contact_id in contact_ids if contact_id}
+    if not contact_ids:
+        return {}
+
+    rows_by_contact = {contact_id: [] for contact_id in contact_ids}
+    adoptions = (
+        Adoption.objects.filter(contact_id__in=contact_ids, opportunity__book__isnull=False)
+        .order_by("base_year", "id")
+        .values(
+            "id",
+            "contact_id",
+            "base_year",
+            "school_year",
+            "confirmation_type",
+            "students",
+            "savings",
+            "how_using",
+            "confirmation_date",
+            "opportunity__account__name",
+            "opportunity__book__id",
+            "opportunity__book__name",
+            "opportunity__book__official_name",
+            "opportunity__book__type",
+            "opportunity__book__subject_areas",
+            "opportunity__book__active_book",
+            "opportunity__book__website_url",
+        )
+    )
+    # you must update this if you change the AdoptionSchema or anything it depends on!
+    for adoption in adoptions.iterator(chunk_size=2000):
+        rows_by_contact[adoption["contact_id"]].append(
+            {
+                "id": adoption["id"],
+                "book": {
+                    "id": adoption["opportunity__book__id"],
+                    "name": adoption["opportunity__book__name"],
+                    "official_name": adoption["opportunity__book__official_name"],
+                    "type": adoption["opportunity__book__type"],
+                    "subject_areas": adoption["opportunity__book__subject_areas"],
+                    "active_book": adoption["opportunity__book__active_book"],
+                    "website_url": adoption["opportunity__book__website_url"],
+                },
+                "base_year": int(adoption["base_year"]) if adoption["base_year"] is not None else None,
+                "school_year": adoption["school_year"],
+                "school": adoption["opportunity__account__name"] or "",
+                "confirmation_type": adoption["confirmation_type"],
+                "students": int(adoption["students"]) if adoption["students"] is not None else None,
+                "savings": float(adoption["savings"]) if adoption["savings"] is not None else None,
+                "how_using": adoption["how_using"],
+                "confirmation_date": adoption["confirmation_date"].strftime("%Y-%m-%d")
+                if adoption["confirmation_date"]
+                else None,
+            }
+        )
+
+    return {
+        contact_id: {
+            "adoptions": rows,
+            "totals": {
+                variant: _summarize_adoptions([row for row in rows if matches(row)])
+                for variant, matches in ADOPTION_SUMMARY_VARIANTS.items()
+            },
+        }
+        for contact_id, rows in rows_by_contact.items()
+    }
+
+
+def refresh_adoption_summaries(contact_ids):
+    """
+    Rebuild the AdoptionSummary rows for the given contacts from the local adoption tables.
+    Contacts with no adoptions get an empty summary, so a missing adoption list is also a single-row read.
+    Returns the number of summaries written.
+    """
+    summaries = [
+        AdoptionSummary(contact_id=contact_id, **summary)
+        for contact_id, summary in build_adoption_summaries(contact_ids).items()
+    ]
+    if not summaries:
+        return 0
+    AdoptionSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["contact"],
+        update_fields=["adoptions", "totals", "refreshed_at"],
+        batch_size=500,
+    )
+    return len(summaries)
+
+
 def update_or_create_books(salesforce_books, full_sync=False):
     """
     Bulk upsert books into the local database using ON CONFLICT DO UPDATE.
@@ -426,6 +614,7 @@ def update_or_create_books(salesforce_books, full_sync=False):
             )
         )
 
+    changed_ids = _changed_ids(Book.all_objects, records, BOOK_SYNC_FIELDS)
     with transaction.atomic():
         Book.all_objects.bulk_create(
             records,
@@ -436,6 +625,13 @@ def update_or_create_books(salesforce_books, full_sync=False):
         )
         if full_sync:
             Book.all_objects.exclude(id__in=synced_ids).update(is_deleted=True)
-
-    logger.info(f"Books sync: {len(records)} upserted (full_sync={full_sync})")
+        # Adoption summaries copy the book of each adoption's opportunity
+        summary_contact_ids = _refresh_summaries_of(Adoption.objects.filter(opportunity__book_id__in=changed_ids))
+
+    books_cache.invalidate()
+    bump_generations("adoptions", summary_contact_ids)
+    logger.info(
+        f"Books sync: {len(records)} upserted, {len(summary_contact_ids)} adoption summaries refreshed "
+        f"(full_sync={full_sync})"
+    )
     return len(records)
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0014_account_assignable_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdoptionSummary",
+            fields=[
+                (
+                    "contact",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="adoption_summary",
+                        serialize=False,
+                        to="db.contact",
+                    ),
+                ),
+                (
+                    "adoptions",
+                    models.JSONField(default=list, help_text="Compact adoption rows, already shaped for the API."),
+                ),
+                (
+                    "totals",
+                    models.JSONField(
+                        default=dict, help_text="Count, students, savings and first year per filter variant."
+                    ),
+                ),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Adoption Summary",
+                "verbose_name_plural": "Adoption Summaries",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0016_account_search_trgm"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(fields=["last_modified_date"], name="idx_opp_last_mod"),
+        ),
+        migrations.AddIndex(
+            model_name="adoption",
+            index=models.Index(fields=["last_modified_date"], name="idx_adoption_last_mod"),
+        ),
+    ]
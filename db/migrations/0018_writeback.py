@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0017_export_last_modified_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WriteBack",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model_name", models.CharField(max_length=100)),
+                ("record_id", models.CharField(max_length=18)),
+                ("field_name", models.CharField(max_length=100)),
+                ("value", models.TextField(blank=True, null=True)),
+                (
+                    "base_last_modified",
+                    models.DateTimeField(
+                        blank=True, help_text="Salesforce LastModifiedDate of the version that was edited.", null=True
+                    ),
+                ),
+                ("changed_by", models.CharField(blank=True, max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                            ("superseded", "Superseded"),
+                            ("conflict", "Conflict"),
+                            ("dead", "Dead letter"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error_message", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("next_attempt_at", models.DateTimeField(blank=True, null=True)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Salesforce Write-back",
+                "verbose_name_plural": "Salesforce Write-backs",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status__in", ["pending", "processing", "failed"])),
+                        fields=["status", "next_attempt_at"],
+                        name="idx_writeback_queue",
+                    ),
+                    models.Index(fields=["record_id"], name="idx_writeback_record"),
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 from .tracking import ChangeTrackingMixin
 
@@ -87,6 +89,13 @@ class Account(ChangeTrackingMixin, models.Model):
         indexes = [
             models.Index(fields=["name"], name="idx_account_name"),
             models.Index(fields=["last_modified_date"], name="idx_account_last_mod"),
+            # Serves the case-insensitive substring matches of /schools (UPPER(col) LIKE UPPER('%term%'))
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                OpClass(Upper("city"), name="gin_trgm_ops"),
+                OpClass(Upper("sheer_id_school_name"), name="gin_trgm_ops"),
+                name="idx_account_search_trgm",
+            ),
         ]
 
     def __str__(self):
@@ -146,6 +155,9 @@ class Contact(ChangeTrackingMixin, models.Model):
     objects = ActiveManager()
     all_objects = models.Manager()
 
+    # what PUT /contact can change, pushed to Salesforce by push_write_backs
+    _write_back_fields = ("first_name", "last_name", "role", "subject_interest", "lms")
+
     class Meta:
         verbose_name = "Contact"
         verbose_name_plural = "Contacts"
@@ -274,6 +286,7 @@ class Opportunity(ChangeTrackingMixin, models.Model):
             models.Index(fields=["contact"], name="idx_opp_contact"),
             models.Index(fields=["book"], name="idx_opp_book"),
             models.Index(fields=["account"], name="idx_opp_account"),
+            models.Index(fields=["last_modified_date"], name="idx_opp_last_mod"),
         ]
 
     def __str__(self):
@@ -346,7 +359,88 @@ class Adoption(ChangeTrackingMixin, models.Model):
         get_latest_by = "last_modified_date"
         indexes = [
             models.Index(fields=["contact"], name="idx_adoption_contact"),
+            models.Index(fields=["last_modified_date"], name="idx_adoption_last_mod"),
         ]
 
     def __str__(self):
         return self.name
+
+
+class AdoptionSummary(models.Model):
+    """Denormalized per-contact view of adoptions, rebuilt by the syncs so /adoptions is a single-row read."""
+
+    contact = models.OneToOneField(Contact, on_delete=models.CASCADE, primary_key=True, related_name="adoption_summary")
+    adoptions = models.JSONField(default=list, help_text="Compact adoption rows, already shaped for the API.")
+    totals = models.JSONField(default=dict, help_text="Count, students, savings and first year per filter variant.")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Adoption Summary"
+        verbose_name_plural = "Adoption Summaries"
+
+    def __str__(self):
+        return f"Adoption summary for {self.contact_id}"
+
+
+class WriteBack(models.Model):
+    """
+    A field changed locally through the API, waiting to be pushed to the Salesforce record it came from.
+    Queued by ChangeTrackingMixin for models with _write_back_fields and drained by push_write_backs (sf/write_back.py).
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),  # the last push failed, retried at next_attempt_at
+        ("superseded", "Superseded"),  # a later change to the same field was sent instead
+        ("conflict", "Conflict"),  # the record changed in Salesforce after the local edit, Salesforce won
+        ("dead", "Dead letter"),
+    ]
+    UNSENT_STATUSES = ["pending", "processing", "failed"]
+
+    model_name = models.CharField(max_length=100)
+    record_id = models.CharField(max_length=18)
+    field_name = models.CharField(max_length=100)
+    value = models.TextField(null=True, blank=True)
+    base_last_modified = models.DateTimeField(
+        null=True, blank=True, help_text="Salesforce LastModifiedDate of the version that was edited."
+    )
+    changed_by = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Salesforce Write-back"
+        verbose_name_plural = "Salesforce Write-backs"
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="idx_writeback_queue",
+                condition=models.Q(status__in=["pending", "processing", "failed"]),
+            ),
+            models.Index(fields=["record_id"], name="idx_writeback_record"),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name}.{self.field_name} ({self.record_id}) {self.status}"
+
+
+class SyncWatermark(models.Model):
+    """
+    The newest Salesforce LastModifiedDate a sync command has fetched, where its next incremental run starts.
+    Kept apart from the synced rows, whose last_modified_date also moves when push_write_backs sends local edits.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    last_modified_date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} through {self.last_modified_date.isoformat()}"
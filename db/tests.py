@@ -4,14 +4,16 @@ from unittest.mock import patch
 from django.test import TestCase
 from django.utils import timezone
 
+from api.cache import get_generation
 from db.functions import (
+    ACCOUNT_SYNC_FIELDS,
     update_or_create_accounts,
     update_or_create_adoptions,
     update_or_create_books,
     update_or_create_contacts,
     update_or_create_opportunities,
 )
-from db.models import Account, Adoption, Book, Contact, Opportunity
+from db.models import Account, Adoption, AdoptionSummary, Book, Contact, Opportunity, WriteBack
 
 
 def _make_account(id="001000000000001", name="Test U", **kwargs):
@@ -237,6 +239,40 @@ class ContactSyncTest(TestCase):
         update_or_create_contacts(contacts[:1], full_sync=True)
         self.assertTrue(Contact.all_objects.get(id="003000000000002").is_deleted)
 
+    @patch("db.functions.capture_exception")
+    def test_unsent_local_edits_are_not_overwritten(self, mock_sentry):
+        contact = _make_contact("003000000000001", first_name="Edited")
+        WriteBack.objects.create(model_name="Contact", record_id=contact.id, field_name="first_name", value="Edited")
+        count = update_or_create_contacts([_mock_sf_contact("003000000000001")], full_sync=True)
+        self.assertEqual(count, 0)
+        contact = Contact.all_objects.get(id="003000000000001")
+        self.assertEqual(contact.first_name, "Edited")
+        self.assertFalse(contact.is_deleted)
+
+    @patch("db.functions.capture_exception")
+    def test_upsert_bumps_cache_generations(self, mock_sentry):
+        _make_contact("003000000000002", accounts_uuid="deleted-uuid")
+        before = get_generation("contact", "test-uuid"), get_generation("contact", "deleted-uuid")
+        update_or_create_contacts([_mock_sf_contact("003000000000001")], full_sync=True)
+        after = get_generation("contact", "test-uuid"), get_generation("contact", "deleted-uuid")
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+
+class AccountSyncTest(TestCase):
+    def test_rename_bumps_cached_contacts(self):
+        acct = _make_account("001000000000001", name="Rice")
+        _make_contact("003000000000001", account=acct, accounts_uuid="rice-uuid")
+        _make_contact("003000000000002", accounts_uuid="other-uuid")
+        fields = {field: getattr(acct, field) for field in ACCOUNT_SYNC_FIELDS}
+        update_or_create_accounts([SimpleNamespace(id=acct.id, **fields)])
+        before = get_generation("contact", "rice-uuid"), get_generation("contact", "other-uuid")
+
+        update_or_create_accounts([SimpleNamespace(id=acct.id, **{**fields, "name": "Rice University"})])
+        after = get_generation("contact", "rice-uuid"), get_generation("contact", "other-uuid")
+        self.assertNotEqual(before[0], after[0])
+        self.assertEqual(before[1], after[1])
+
 
 class OpportunitySyncTest(TestCase):
     @patch("db.functions.capture_exception")
@@ -285,6 +321,73 @@ class AdoptionSyncTest(TestCase):
         count = update_or_create_adoptions(adoptions)
         self.assertEqual(count, 1)
 
+    @patch("db.functions.capture_exception")
+    def test_upsert_refreshes_summary(self, mock_sentry):
+        acct = _make_account("001000000000001", name="Rice")
+        contact = _make_contact("003000000000001", account=acct)
+        book = _make_book("a0B000000000001")
+        _make_opportunity("006000000000001", account=acct, contact=contact, book=book)
+        update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", "003000000000001", "006000000000001")])
+
+        summary = AdoptionSummary.objects.get(contact=contact)
+        self.assertEqual(summary.adoptions[0]["school"], "Rice")
+        self.assertEqual(summary.adoptions[0]["book"]["id"], "a0B000000000001")
+        self.assertEqual(summary.totals["all"]["total_students"], 50)
+        self.assertEqual(summary.totals["confirmed"]["count"], 1)
+        self.assertEqual(summary.totals["assumed"]["count"], 0)
+
+    @patch("db.functions.capture_exception")
+    def test_adoption_moved_to_another_contact_leaves_its_summary(self, mock_sentry):
+        acct = _make_account("001000000000001")
+        first = _make_contact("003000000000001", account=acct)
+        second = _make_contact("003000000000002", account=acct, accounts_uuid="uuid-2")
+        _make_opportunity("006000000000001", account=acct, contact=first, book=_make_book("a0B000000000001"))
+        update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", "003000000000001", "006000000000001")])
+        generation = get_generation("adoptions", first.id)
+
+        update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", "003000000000002", "006000000000001")])
+        self.assertEqual(AdoptionSummary.objects.get(contact=first).adoptions, [])
+        self.assertEqual(len(AdoptionSummary.objects.get(contact=second).adoptions), 1)
+        self.assertNotEqual(get_generation("adoptions", first.id), generation)
+
+    @patch("db.functions.capture_exception")
+    def test_account_book_and_opportunity_syncs_refresh_summaries(self, mock_sentry):
+        acct = _make_account("001000000000001", name="Rice")
+        contact = _make_contact("003000000000001", account=acct)
+        _make_book("a0B000000000001")
+        _make_book("a0B000000000002", name="Biology")
+        _make_opportunity("006000000000001", account=acct, contact=contact, book=Book.objects.get(pk="a0B000000000001"))
+        update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", "003000000000001", "006000000000001")])
+
+        def summary_row():
+            return AdoptionSummary.objects.get(contact=contact).adoptions[0]
+
+        generation = get_generation("adoptions", contact.id)
+        fields = {field: getattr(acct, field) for field in ACCOUNT_SYNC_FIELDS}
+        update_or_create_accounts([SimpleNamespace(id=acct.id, **{**fields, "name": "Rice University"})])
+        self.assertEqual(summary_row()["school"], "Rice University")
+        self.assertNotEqual(get_generation("adoptions", contact.id), generation)
+
+        update_or_create_books([_mock_sf_book("a0B000000000001", name="University Physics")])
+        self.assertEqual(summary_row()["book"]["name"], "University Physics")
+
+        update_or_create_opportunities(
+            [_mock_sf_opportunity("006000000000001", "001000000000001", "003000000000001", "a0B000000000002")]
+        )
+        self.assertEqual(summary_row()["book"]["id"], "a0B000000000002")
+
+    @patch("db.functions.capture_exception")
+    def test_unchanged_records_do_not_refresh_summaries(self, mock_sentry):
+        acct = _make_account("001000000000001", name="Rice")
+        contact = _make_contact("003000000000001", account=acct)
+        _make_opportunity("006000000000001", account=acct, contact=contact, book=_make_book("a0B000000000001"))
+        update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", "003000000000001", "006000000000001")])
+        generation = get_generation("adoptions", contact.id)
+
+        fields = {field: getattr(acct, field) for field in ACCOUNT_SYNC_FIELDS}
+        update_or_create_accounts([SimpleNamespace(id=acct.id, **fields)])
+        self.assertEqual(get_generation("adoptions", contact.id), generation)
+
     @patch("db.functions.capture_exception")
     def test_skip_invalid_contact_fk(self, mock_sentry):
         count = update_or_create_adoptions([_mock_sf_adoption("a0A000000000001", contact_id="003BAD")])
@@ -1,11 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class ChangeTrackingMixin(models.Model):
-    """Mixin that tracks field-level changes on save() and creates FieldChangeLog entries."""
+    """
+    Mixin that tracks field-level changes on save() and creates FieldChangeLog entries.
+    API changes to _write_back_fields are also queued as WriteBack rows, to be pushed to Salesforce.
+    """
 
     # Fields to track — override in subclass if needed
     _tracked_fields = None
+    # Fields whose API changes are written back to Salesforce — override in subclass if needed
+    _write_back_fields = ()
     # Default change source — can be overridden per-save via _change_source attribute
     _change_source = "api"
     _changed_by = ""
@@ -17,6 +22,7 @@ class ChangeTrackingMixin(models.Model):
         change_source = getattr(self, "_change_source", "api")
         changed_by = getattr(self, "_changed_by", "")
 
+        changes, old_instance = [], None
         if self.pk:
             try:
                 old_instance = type(self).objects.get(pk=self.pk)
@@ -26,7 +32,13 @@ class ChangeTrackingMixin(models.Model):
             except type(self).DoesNotExist:
                 pass  # New record, no changes to track
 
-        super().save(*args, **kwargs)
+        write_backs = [change for change in changes if change[0] in self._write_back_fields]
+        if change_source != "api" or not write_backs:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._queue_write_backs(write_backs, old_instance, changed_by)
 
     def _get_tracked_fields(self):
         if self._tracked_fields is not None:
@@ -66,3 +78,18 @@ class ChangeTrackingMixin(models.Model):
             for field_name, old_val, new_val in changes
         ]
         FieldChangeLog.objects.bulk_create(logs)
+
+    def _queue_write_backs(self, changes, old_instance, changed_by):
+        from db.models import WriteBack
+
+        WriteBack.objects.bulk_create(
+            WriteBack(
+                model_name=type(self).__name__,
+                record_id=str(self.pk),
+                field_name=field_name,
+                value=new_val,
+                base_last_modified=getattr(old_instance, "last_modified_date", None),
+                changed_by=changed_by,
+            )
+            for field_name, old_val, new_val in changes
+        )
@@ -1,36 +1,32 @@
 """
 Centralized configuration — reads from DB with hardcoded fallbacks.
-30-second TTL cache so the DB isn't hit on every request.
+Values live in a two-tier cache (30-second in-process TTL in front of Redis) so neither the DB nor Redis
+is hit on every request; admin writes invalidate every worker.
 """
 
 import logging
-import time
+import math
 from datetime import date
 
+from api.cache import TieredCache
 from pardot.db_compat import get_cursor
 
 log = logging.getLogger("config")
 
 # ── Cache ─────────────────────────────────────────────────────────
 
-_cache = {}
 _CACHE_TTL = 30  # seconds
+_cache = TieredCache("pardot_config", timeout=math.prod([60, 60]), local_ttl=_CACHE_TTL)  # 1 hour in Redis
 
 
 def _cached(key, loader):
     """Return cached value or call loader to refresh."""
-    now = time.time()
-    entry = _cache.get(key)
-    if entry and now - entry["t"] < _CACHE_TTL:
-        return entry["v"]
-    value = loader()
-    _cache[key] = {"v": value, "t": now}
-    return value
+    return _cache.get_or_set(key, loader)
 
 
 def invalidate_cache():
-    """Clear all cached config — call after admin writes."""
-    _cache.clear()
+    """Clear all cached config in every worker — call after admin writes."""
+    _cache.invalidate()
 
 
 # ── Defaults (moved from hardcoded locations) ─────────────────────
@@ -405,3 +401,11 @@ def get_all_config(conn) -> dict:
         "cleanup_tag_prefix": get_cleanup_config(conn)["prefix"],
         "cleanup_actions": get_cleanup_config(conn)["actions"],
     }
+
+
+def _warm():
+    get_team(None)
+    get_all_config(None)
+
+
+_cache.register_warmer(_warm)
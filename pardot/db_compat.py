@@ -10,7 +10,9 @@ The `conn` parameter is accepted but ignored — Django manages connections.
 import re
 from contextlib import contextmanager
 
-from django.db import connection
+from django.db import connection, connections
+
+from api.db_router import read_alias
 
 # Re-export field maps from the original db.py — these are pure data, no DB dependency.
 
@@ -160,9 +162,10 @@ def get_cursor(conn=None):
     """Context manager yielding a dict cursor using Django's DB connection.
 
     The `conn` parameter is accepted for API compatibility but ignored.
-    Django handles connection lifecycle automatically.
+    Django handles connection lifecycle automatically. Read-only dashboard requests get the read replica
+    when one is configured (api.db_router); everything else uses the primary.
     """
-    cursor = connection.cursor()
+    cursor = connections[read_alias()].cursor()
     wrapped = _DictCursorWrapper(cursor)
     try:
         yield wrapped
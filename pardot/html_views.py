@@ -4,9 +4,9 @@ Serves the dashboard templates, requiring SuperUser auth via SSO.
 """
 
 from django.shortcuts import render
-from openstax_accounts.functions import get_logged_in_user_uuid
 
 from api.models import SuperUser
+from api.sso import get_logged_in_user_uuid
 
 
 def _check_super_user(request):
@@ -0,0 +1,25 @@
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pardot", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                models.Case(
+                    models.When(priority="high", then=models.Value(0)),
+                    models.When(priority="normal", then=models.Value(1)),
+                    models.When(priority="low", then=models.Value(2)),
+                    default=models.Value(3),
+                ),
+                django.db.models.expressions.OrderBy(models.F("created_at"), descending=True),
+                django.db.models.expressions.OrderBy(models.F("id"), descending=True),
+                name="pardot_idx_task_list_order",
+            ),
+        ),
+    ]
@@ -305,6 +305,15 @@ class DailySnapshot(models.Model):
         return f"Snapshot {self.snapshot_date}"
 
 
+# Sort key of the task list (high, normal, low). The list query and its index must use this same expression.
+TASK_PRIORITY_RANK = models.Case(
+    models.When(priority="high", then=models.Value(0)),
+    models.When(priority="normal", then=models.Value(1)),
+    models.When(priority="low", then=models.Value(2)),
+    default=models.Value(3),
+)
+
+
 class Task(models.Model):
     PRIORITY_CHOICES = [("high", "High"), ("normal", "Normal"), ("low", "Low")]
     STATUS_CHOICES = [("open", "Open"), ("done", "Done")]
@@ -328,6 +337,12 @@ class Task(models.Model):
         indexes = [
             models.Index(fields=["assignee"], name="pardot_idx_task_assignee"),
             models.Index(fields=["status"], name="pardot_idx_task_status"),
+            models.Index(
+                TASK_PRIORITY_RANK,
+                models.F("created_at").desc(),
+                models.F("id").desc(),
+                name="pardot_idx_task_list_order",
+            ),
         ]
 
     def __str__(self):
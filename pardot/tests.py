@@ -7,6 +7,7 @@ from django.test import TestCase
 from ninja.testing import TestClient
 
 from api.models import SuperUser
+from api.pagination import encode_cursor
 from pardot import config
 from pardot.db_compat import (
     _remap_tables,
@@ -315,9 +316,9 @@ class ConfigTests(TestCase):
     def test_cache_invalidation(self):
         """Config cache should be cleared after invalidate_cache()."""
         config.get_team(None)  # populate cache
-        self.assertIn("team", config._cache)
+        self.assertIsNotNone(config._cache.get("team"))
         config.invalidate_cache()
-        self.assertEqual(len(config._cache), 0)
+        self.assertIsNone(config._cache.get("team"))
 
 
 # ══════════════════════════════════════════════════════════════
@@ -465,6 +466,18 @@ class TaskEndpointTests(PardotAPIBaseTest):
         response = self.client.post("/tasks", json={"assignee": "Alice"})
         self.assertEqual(response.status_code, 400)
 
+    @patch("pardot.views.stick_to_primary")
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_writes_send_the_next_reads_to_the_primary(self, mock_auth, mock_stick):
+        # the dashboard reloads tasks right after a write; a lagging replica would not have it yet
+        task = Task.objects.create(assignee="Alice", title="Fix it", status="open")
+        self.client.patch(f"/tasks/{task.id}", json={"status": "done"})
+        self.client.delete(f"/tasks/{task.id}")
+        self.client.put("/admin/config/camp_end", json={"value": "2026-08-01"})
+        self.assertEqual(mock_stick.call_count, 3)
+        self.client.get("/tasks")
+        self.assertEqual(mock_stick.call_count, 3)
+
     @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
     def test_update_task(self, mock_auth):
         task = Task.objects.create(assignee="Alice", title="Fix it", status="open")
@@ -512,6 +525,28 @@ class TaskEndpointTests(PardotAPIBaseTest):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["assignee"], "Alice")
 
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_list_tasks_paginates_in_priority_order(self, mock_auth):
+        low = Task.objects.create(assignee="Alice", title="Low", priority="low")
+        old = Task.objects.create(assignee="Alice", title="Old high", priority="high")
+        new = Task.objects.create(assignee="Alice", title="New high", priority="high")
+
+        response = self.client.get("/tasks?limit=2")
+        self.assertEqual([t["id"] for t in response.json()], [new.id, old.id])
+        self.assertNotIn("priority_rank", response.json()[0])
+
+        response = self.client.get(f"/tasks?limit=2&cursor={response.headers['X-Next-Cursor']}")
+        self.assertEqual([t["id"] for t in response.json()], [low.id])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_list_tasks_invalid_cursor(self, mock_auth):
+        response = self.client.get("/tasks?cursor=garbage")
+        self.assertEqual(response.status_code, 400)
+        # well-formed, but the rank is not a number
+        cursor = encode_cursor({"rank": "high", "created_at": "2026-01-01T00:00:00+00:00", "id": 1})
+        self.assertEqual(self.client.get(f"/tasks?cursor={cursor}").status_code, 400)
+
 
 class TrailEndpointTests(PardotAPIBaseTest):
     @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
@@ -529,6 +564,21 @@ class TrailEndpointTests(PardotAPIBaseTest):
         data = response.json()
         self.assertEqual(len(data), 2)
 
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_trail_paginates_by_date(self, mock_auth):
+        for days_ago in (2, 1, 0):
+            DailySnapshot.objects.create(snapshot_date=date.today() - timedelta(days=days_ago))
+        response = self.client.get("/trail?limit=2")
+        self.assertEqual(len(response.json()), 2)
+
+        response = self.client.get(f"/trail?limit=2&cursor={response.headers['X-Next-Cursor']}")
+        self.assertEqual([s["snapshot_date"] for s in response.json()], [date.today().isoformat()])
+
+    @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
+    def test_trail_invalid_cursor(self, mock_auth):
+        response = self.client.get(f"/trail?cursor={encode_cursor({'snapshot_date': 20260101})}")
+        self.assertEqual(response.status_code, 400)
+
 
 class OrphansEndpointTests(PardotAPIBaseTest):
     @patch("api.auth.get_logged_in_user_uuid", side_effect=mock_super_user)
@@ -5,13 +5,16 @@ All endpoints require SuperUser auth (SSO + is_super_user check).
 
 import json
 import logging
-from datetime import date
+from datetime import date, datetime
 
+from django.db.models import Q
 from django.http import HttpResponse, JsonResponse
 from ninja import Router
 
 from api.auth import combined_auth
+from api.db_router import stick_to_primary
 from api.models import SuperUser
+from api.pagination import InvalidCursor, clamp_limit, decode_cursor, paginate
 from pardot import config
 from pardot.assets import (
     get_asset_detail,
@@ -34,6 +37,7 @@ from pardot.engagement import (
     get_scoring_categories,
     get_top_engaged,
 )
+from pardot.models import TASK_PRIORITY_RANK, Task
 from pardot.pardot_client import _get_sf_instance_url as _sf_instance_url
 from pardot.scorecard import compute_health_score, generate_issues
 from pardot.sync import SyncEngine
@@ -42,6 +46,15 @@ log = logging.getLogger("camp.views")
 
 router = Router(tags=["camp"])
 
+# List endpoints are keyset paginated; the defaults cover a whole camp so existing dashboards see everything
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TASKS_DEFAULT_LIMIT = 200
+TASKS_MAX_LIMIT = 500
+TRAIL_DEFAULT_LIMIT = 366
+TRAIL_MAX_LIMIT = 1000
+
+TASK_COLUMNS = [field.attname for field in Task._meta.concrete_fields]
+
 
 def _is_super_user(request):
     """Check if the authenticated user is a SuperUser."""
@@ -56,6 +69,16 @@ def _require_super(request):
     return None
 
 
+def _invalid_cursor():
+    return JsonResponse({"error": "invalid cursor"}, status=400)
+
+
+def _set_next_cursor(response, next_cursor):
+    """List endpoints keep returning a bare array; the cursor of the next page, if any, goes in a header."""
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+
+
 def _conn():
     """Compatibility shim — returns None since Django manages connections."""
     return None
@@ -320,13 +343,28 @@ def api_orphans_history(request):
 
 
 @router.get("/trail", auth=combined_auth)
-def api_trail(request):
+def api_trail(request, response: HttpResponse, limit: int = TRAIL_DEFAULT_LIMIT, cursor: str = None):
     denied = _require_super(request)
     if denied:
         return denied
+    sql = "SELECT * FROM daily_snapshots"
+    params = []
+    if cursor:
+        try:
+            params.append(decode_cursor(cursor, {"snapshot_date": date.fromisoformat})["snapshot_date"])
+        except InvalidCursor:
+            return _invalid_cursor()
+        sql += " WHERE snapshot_date > %s"
+    # keyset on the unique snapshot_date index
+    limit = clamp_limit(limit, TRAIL_MAX_LIMIT)
+    sql += " ORDER BY snapshot_date ASC LIMIT %s"
+    params.append(limit + 1)
     with get_cursor() as cur:
-        cur.execute("SELECT * FROM daily_snapshots ORDER BY snapshot_date ASC")
-        return [dict(r) for r in cur.fetchall()]
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    rows, next_cursor = paginate(rows, limit, lambda row: {"snapshot_date": row["snapshot_date"].isoformat()})
+    _set_next_cursor(response, next_cursor)
+    return rows
 
 
 # ── Digest ──
@@ -367,22 +405,45 @@ def api_sync_status(request):
 
 
 @router.get("/tasks", auth=combined_auth)
-def api_tasks(request, assignee: str = None, status: str = None):
-    denied = _require_super(request)
-    if denied:
-        return denied
-    with get_cursor() as cur:
-        sql = "SELECT * FROM tasks WHERE 1=1"
-        params = []
-        if assignee:
-            sql += " AND assignee = %s"
-            params.append(assignee)
-        if status:
-            sql += " AND status = %s"
-            params.append(status)
-        sql += " ORDER BY CASE priority WHEN 'high' THEN 0 WHEN 'normal' THEN 1 WHEN 'low' THEN 2 END, created_at DESC"
-        cur.execute(sql, params)
-        return [dict(r) for r in cur.fetchall()]
+def api_tasks(
+    request,
+    response: HttpResponse,
+    assignee: str = None,
+    status: str = None,
+    limit: int = TASKS_DEFAULT_LIMIT,
+    cursor: str = None,
+):
+    denied = _require_super(request)
+    if denied:
+        return denied
+    # high, normal, low priority, newest first within each; served by pardot_idx_task_list_order
+    tasks = Task.objects.annotate(priority_rank=TASK_PRIORITY_RANK).order_by("priority_rank", "-created_at", "-id")
+    if assignee:
+        tasks = tasks.filter(assignee=assignee)
+    if status:
+        tasks = tasks.filter(status=status)
+    if cursor:
+        try:
+            after = decode_cursor(cursor, {"rank": int, "created_at": datetime.fromisoformat, "id": int})
+        except InvalidCursor:
+            return _invalid_cursor()
+        rank, created_at, task_id = after["rank"], after["created_at"], after["id"]
+        tasks = tasks.filter(
+            Q(priority_rank__gt=rank)
+            | Q(priority_rank=rank, created_at__lt=created_at)
+            | Q(priority_rank=rank, created_at=created_at, id__lt=task_id)
+        )
+
+    limit = clamp_limit(limit, TASKS_MAX_LIMIT)
+    rows, next_cursor = paginate(
+        list(tasks.values(*TASK_COLUMNS, "priority_rank")[: limit + 1]),
+        limit,
+        lambda task: {"rank": task["priority_rank"], "created_at": task["created_at"].isoformat(), "id": task["id"]},
+    )
+    for row in rows:
+        del row["priority_rank"]
+    _set_next_cursor(response, next_cursor)
+    return rows
 
 
 @router.post("/tasks", auth=combined_auth)
@@ -390,6 +451,7 @@ def api_tasks_create(request):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     data = json.loads(request.body)
     if not data.get("assignee") or not data.get("title"):
         return JsonResponse({"error": "assignee and title are required"}, status=400)
@@ -420,6 +482,7 @@ def api_tasks_update(request, task_id: int):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     data = json.loads(request.body)
     allowed = {"status", "priority", "title", "description", "assignee", "area", "asset_type", "asset_id", "asset_name"}
     sets = []
@@ -447,6 +510,7 @@ def api_tasks_delete(request, task_id: int):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     with get_cursor() as cur:
         cur.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
     return {"ok": True}
@@ -478,6 +542,7 @@ def api_issue_create_task(request, key: str):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     conn = _conn()
     team = config.get_team(conn)
     issues = generate_issues(conn, team=team)
@@ -534,6 +599,7 @@ def api_cleanup_setup(request):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     conn = _conn()
     cleanup_cfg = config.get_cleanup_config(conn)
     prefix = cleanup_cfg["prefix"]
@@ -577,6 +643,7 @@ def api_admin_team_put(request):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     data = json.loads(request.body)
     if not isinstance(data, list):
         return JsonResponse({"error": "expected a JSON array of team members"}, status=400)
@@ -610,6 +677,7 @@ def api_admin_config_put(request, key: str):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     valid_keys = {
         "demerits",
         "issue_templates",
@@ -644,6 +712,7 @@ def api_admin_config_delete(request, key: str):
     denied = _require_super(request)
     if denied:
         return denied
+    stick_to_primary(request)
     with get_cursor() as cur:
         cur.execute("DELETE FROM config WHERE key = %s", (key,))
     config.invalidate_cache()
@@ -0,0 +1,48 @@
+"""
+sObject Collections requests: create or update up to 200 Salesforce records with one API call.
+
+Requests are sent with allOrNone=false, so a record Salesforce rejects fails on its own while the rest are saved.
+"""
+
+from django.db import connections
+
+BATCH_SIZE = 200  # the most records one sObject Collections request takes
+REQUEST_TIMEOUT = 60
+
+
+def sobject(instance, fields=None):
+    """The sObject Collections record for a django-salesforce model instance, with the given fields or all set ones."""
+    record = {"attributes": {"type": instance._meta.db_table}}
+    if instance.pk:
+        record["id"] = instance.pk
+    for field in instance._meta.concrete_fields:
+        if field.primary_key or (fields is not None and field.name not in fields):
+            continue
+        value = getattr(instance, field.attname)
+        if value is not None or fields is not None:
+            record[field.column] = value
+    return record
+
+
+def _errors(result):
+    return "; ".join(f"{error['statusCode']}: {error['message']}" for error in result["errors"])
+
+
+def sobject_collections(method, records, usage_source):
+    """
+    POST (create) or PATCH (update) up to BATCH_SIZE records with one request, counted as one call of usage_source.
+    Returns an (id, error) pair per record, in order, with error None for each record that was saved.
+    Raises if the request as a whole failed.
+    """
+    from salesforce.auth import API_VERSION
+
+    from api.models import SFAPIUsageLog
+
+    db = connections["salesforce"]
+    db.ensure_connection()
+    session = db.sf_session
+    url = f"{session.auth.instance_url}/services/data/v{API_VERSION}/composite/sobjects"
+    response = session.request(method, url, json={"allOrNone": False, "records": records}, timeout=REQUEST_TIMEOUT)
+    SFAPIUsageLog.increment(usage_source)
+    response.raise_for_status()
+    return [(result.get("id"), None if result["success"] else _errors(result)) for result in response.json()]
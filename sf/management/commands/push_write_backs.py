@@ -0,0 +1,47 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sf import write_back
+from sf.collections import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Push local API edits (the write-back outbox) to Salesforce, coalesced per record and batched. Runs until "
+        "stopped (SIGTERM/SIGINT finish the current batch first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help=f"Records pushed at a time (default: {BATCH_SIZE})"
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=5, help="Seconds to wait when the outbox is empty (default: 5)"
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once the outbox is drained, e.g. from cron")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self._stop)
+            signal.signal(signal.SIGINT, self._stop)
+
+        pushed = 0
+        while not self._stopping:
+            changes = write_back.claim(options["batch_size"])
+            if changes:
+                write_back.flush(changes)
+                pushed += len(changes)
+                continue
+            if options["once"]:
+                break
+            close_old_connections()  # drop a connection that went bad while the outbox was idle
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {pushed} write-back changes"))
+
+    def _stop(self, signum, frame):
+        self._stopping = True
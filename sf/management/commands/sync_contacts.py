@@ -4,7 +4,7 @@ import time
 from django.core.management.base import BaseCommand
 
 from db.functions import update_or_create_contacts
-from db.models import Contact
+from db.models import Contact, SyncWatermark, WriteBack
 from sf.api_usage import should_sync, track_sf_calls
 from sf.models.contact import Contact as SFContact
 
@@ -30,6 +30,7 @@ SF_ONLY_FIELDS = [
     "last_modified_date",
     "subject_interest",
 ]
+WATERMARK = "sync_contacts"
 
 
 class Command(BaseCommand):
@@ -61,9 +62,8 @@ class Command(BaseCommand):
                 Contact.all_objects.all().delete()
                 self.stdout.write("Deleted all local contacts")
         else:
-            last_sync_object = Contact.all_objects.latest("last_modified_date")
             # Use 2-hour lookback buffer to avoid missing records due to clock skew
-            delta = last_sync_object.last_modified_date - datetime.timedelta(hours=2)
+            delta = self.last_synced() - datetime.timedelta(hours=2)
             salesforce_contacts = (
                 SFContact.objects.only(*SF_ONLY_FIELDS)
                 .order_by("last_modified_date")
@@ -72,7 +72,11 @@ class Command(BaseCommand):
             self.stdout.write(f"Incremental sync from {delta.isoformat()}")
 
         with track_sf_calls("sync_contacts") as counter:
+            salesforce_contacts = list(salesforce_contacts)
             count = update_or_create_contacts(salesforce_contacts, full_sync=full_sync)
+        fetched = [contact.last_modified_date for contact in salesforce_contacts if contact.last_modified_date]
+        if fetched:
+            self.advance_watermark(max(fetched))
         duration = time.time() - start_time
 
         self.stdout.write(
@@ -80,3 +84,23 @@ class Command(BaseCommand):
                 f"Contacts synced successfully! {count} upserted, {counter[0]} SF API calls. Duration: {duration:.1f}s"
             )
         )
+
+    def last_synced(self):
+        """
+        The newest LastModifiedDate fetched by an earlier sync. Not the newest local contact: pushing a local edit
+        (sf/write_back.py) gives the contact Salesforce's new LastModifiedDate without syncing anything else.
+        """
+        watermark = SyncWatermark.objects.filter(name=WATERMARK).first()
+        if watermark:
+            return watermark.last_modified_date
+        # before the first sync that records a watermark, leave out the contacts that were pushed
+        pushed = WriteBack.objects.filter(model_name="Contact", status="sent").values("record_id")
+        return Contact.all_objects.exclude(id__in=pushed).latest("last_modified_date").last_modified_date
+
+    def advance_watermark(self, last_modified_date):
+        watermark, created = SyncWatermark.objects.get_or_create(
+            name=WATERMARK, defaults={"last_modified_date": last_modified_date}
+        )
+        if not created and last_modified_date > watermark.last_modified_date:
+            watermark.last_modified_date = last_modified_date
+            watermark.save(update_fields=["last_modified_date", "updated_at"])
@@ -1,11 +1,18 @@
+import datetime
 import logging
 import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
 from db.functions import update_or_create_accounts
 from db.models import Account as DBAccount
+from db.models import Contact as DBContact
+from db.models import SyncWatermark, WriteBack
+from sf import write_back
 from sf.models.account import Account
 from sf.models.contact import Contact
 
@@ -104,3 +111,196 @@ class BulkSyncTest(TestCase):
         count = update_or_create_accounts(accounts)
         self.assertEqual(count, 5)
         self.assertEqual(DBAccount.objects.count(), 5)
+
+
+class WriteBackTest(TestCase):
+    """Test the write-back outbox in sf/write_back.py."""
+
+    def setUp(self):
+        self.edited_at = timezone.now() - datetime.timedelta(hours=1)
+        self.contacts = [
+            DBContact.all_objects.create(
+                id=f"00300000000000{i}",
+                first_name="Test",
+                last_name="User",
+                full_name="Test User",
+                email="test@example.com",
+                verification_status="confirmed",
+                accounts_uuid=f"uuid-{i}",
+                last_modified_date=self.edited_at,
+            )
+            for i in (1, 2)
+        ]
+
+    def _edit(self, contact, source="api", **fields):
+        for name, value in fields.items():
+            setattr(contact, name, value)
+        contact._change_source = source
+        contact.save()
+
+    def _salesforce(self, modified_at):
+        """Patch the Salesforce Contact manager to report modified_at as every record's LastModifiedDate."""
+        objects = MagicMock()
+        objects.filter.side_effect = lambda pk__in: MagicMock(
+            values_list=MagicMock(return_value=[(pk, modified_at) for pk in pk__in])
+        )
+        return patch.object(Contact, "objects", objects)
+
+    def test_api_edits_are_queued(self):
+        self._edit(self.contacts[0], first_name="Ada", email="ada@example.com")
+        self._edit(self.contacts[1], source="sync", first_name="Sync")
+        change = WriteBack.objects.get()
+        self.assertEqual((change.record_id, change.field_name, change.value), ("003000000000001", "first_name", "Ada"))
+        self.assertEqual(change.base_last_modified, self.edited_at)
+
+    def test_claim_skips_records_with_a_push_in_flight(self):
+        self._edit(self.contacts[0], first_name="Ada")
+        self.assertEqual(len(write_back.claim(10)), 1)
+        self._edit(self.contacts[0], last_name="Lovelace")
+        self._edit(self.contacts[1], first_name="Grace")
+        self.assertEqual([change.record_id for change in write_back.claim(10)], ["003000000000002"])
+
+    @patch("sf.write_back.sobject_collections", return_value=[("003000000000001", None), (None, "INVALID: bad")])
+    def test_edits_are_coalesced_and_batched(self, mock_collections):
+        self._edit(self.contacts[0], first_name="Ada")
+        self._edit(self.contacts[0], first_name="Augusta", lms="Canvas")
+        self._edit(self.contacts[1], first_name="Grace")
+        pushed_at = timezone.now()
+        with self._salesforce(self.edited_at):
+            write_back.flush(write_back.claim(10))
+
+        method, records, usage_source = mock_collections.call_args.args
+        self.assertEqual((method, usage_source, len(records)), ("PATCH", "write_back_Contact", 2))
+        self.assertEqual(
+            records[0],
+            {"attributes": {"type": "Contact"}, "id": "003000000000001", "FirstName": "Augusta", "LMS__c": "Canvas"},
+        )
+        statuses = WriteBack.objects.order_by("created_at").values_list("status", flat=True)
+        self.assertEqual(list(statuses), ["superseded", "sent", "sent", "failed"])
+        failed = WriteBack.objects.get(status="failed")
+        self.assertEqual((failed.error_message, failed.attempts), ("INVALID: bad", 1))
+        self.assertGreater(failed.next_attempt_at, pushed_at)
+
+    @patch("sf.write_back.sobject_collections")
+    def test_conflict_lets_salesforce_win(self, mock_collections):
+        self._edit(self.contacts[0], first_name="Ada")
+        reload = MagicMock()
+        with (
+            self._salesforce(timezone.now()),
+            patch.dict(write_back.MODELS, {"Contact": (DBContact, Contact, reload)}),
+        ):
+            write_back.flush(write_back.claim(10))
+        mock_collections.assert_not_called()
+        self.assertEqual(WriteBack.objects.get().status, "conflict")
+        reload.assert_called_once()
+
+    @patch("sf.write_back.logger")
+    @patch("sf.write_back.sobject_collections", return_value=[("003000000000001", None)])
+    def test_refresh_error_after_push_is_logged(self, mock_collections, mock_logger):
+        self._edit(self.contacts[0], first_name="Ada")
+        objects = MagicMock()
+        objects.filter.side_effect = [
+            MagicMock(values_list=MagicMock(return_value=[("003000000000001", self.edited_at)])),
+            ConnectionError("Salesforce unavailable"),  # reading the new LastModifiedDate after the push
+        ]
+        with patch.object(Contact, "objects", objects):
+            write_back.flush(write_back.claim(10))
+        self.assertEqual(WriteBack.objects.get().status, "sent")
+        mock_logger.error.assert_called_once_with(
+            "Salesforce write-back could not refresh local Contact rows: Salesforce unavailable"
+        )
+
+    @patch("sf.write_back.sobject_collections")
+    def test_edit_during_push_is_pushed_not_reverted(self, mock_collections):
+        pushed_at = timezone.now()
+        modified = {"at": self.edited_at}
+
+        def push(method, records, usage_source):
+            # the user edits again while the first push is in flight, and the push moves LastModifiedDate
+            self._edit(DBContact.all_objects.get(pk="003000000000001"), last_name="Lovelace")
+            modified["at"] = pushed_at
+            return [(record["id"], None) for record in records]
+
+        mock_collections.side_effect = push
+        objects = MagicMock()
+        objects.filter.side_effect = lambda pk__in: MagicMock(
+            values_list=MagicMock(side_effect=lambda *fields: [(pk, modified["at"]) for pk in pk__in])
+        )
+        reload = MagicMock()
+        self._edit(self.contacts[0], first_name="Ada")
+        with (
+            patch.object(Contact, "objects", objects),
+            patch.dict(write_back.MODELS, {"Contact": (DBContact, Contact, reload)}),
+        ):
+            write_back.flush(write_back.claim(10))
+            mock_collections.side_effect = None
+            mock_collections.return_value = [("003000000000001", None)]
+            write_back.flush(write_back.claim(10))
+
+        reload.assert_not_called()
+        self.assertEqual(mock_collections.call_args.args[1][0]["LastName"], "Lovelace")
+        statuses = WriteBack.objects.order_by("created_at").values_list("field_name", "status")
+        self.assertEqual(list(statuses), [("first_name", "sent"), ("last_name", "sent")])
+
+    @patch("sf.write_back.sobject_collections")
+    def test_push_does_not_move_the_contact_sync_start(self, mock_collections):
+        synced_at = timezone.now() - datetime.timedelta(hours=5)
+        DBContact.all_objects.update(last_modified_date=synced_at)
+        DBContact.all_objects.bulk_create(
+            DBContact(
+                id=f"0030000000001{i:02d}",
+                first_name="Test",
+                last_name="User",
+                full_name="Test User",
+                email="test@example.com",
+                verification_status="confirmed",
+                accounts_uuid=f"uuid-1{i:02d}",
+                last_modified_date=synced_at,
+            )
+            for i in range(98)
+        )
+        in_salesforce = {
+            contact.id: SimpleNamespace(
+                **{field: getattr(contact, field) for field in ["id", "first_name", "last_name", "full_name"]},
+                **{field: getattr(contact, field) for field in ["email", "role", "position", "title", "account_id"]},
+                **{field: getattr(contact, field) for field in ["adoption_status", "verification_status", "lms"]},
+                **{field: getattr(contact, field) for field in ["accounts_uuid", "accounts_id", "signup_date"]},
+                lead_source=None,
+                subject_interest=None,
+                last_modified_date=synced_at,
+            )
+            for contact in DBContact.all_objects.all()
+        }
+        objects = MagicMock()
+        objects.only.return_value.order_by.return_value.filter.side_effect = lambda last_modified_date__gte, **_: [
+            contact for contact in in_salesforce.values() if contact.last_modified_date >= last_modified_date__gte
+        ]
+        objects.filter.side_effect = lambda pk__in: MagicMock(
+            values_list=MagicMock(
+                side_effect=lambda *fields: [(pk, in_salesforce[pk].last_modified_date) for pk in pk__in]
+            )
+        )
+        pushed_at = timezone.now()
+
+        def push(method, records, usage_source):
+            for record in records:
+                in_salesforce[record["id"]].first_name = record["FirstName"]
+                in_salesforce[record["id"]].last_modified_date = pushed_at
+            return [(record["id"], None) for record in records]
+
+        mock_collections.side_effect = push
+
+        with patch.object(Contact, "objects", objects):
+            call_command("sync_contacts", skip_usage_check=True, stdout=MagicMock())
+            self.assertEqual(SyncWatermark.objects.get(name="sync_contacts").last_modified_date, synced_at)
+
+            # another contact changes in Salesforce, then an API edit is pushed well after that
+            other = in_salesforce["003000000000002"]
+            other.first_name, other.last_modified_date = "Changed", synced_at + datetime.timedelta(hours=1)
+            self._edit(DBContact.all_objects.get(pk="003000000000001"), first_name="Ada")
+            write_back.flush(write_back.claim(10))
+            self.assertEqual(DBContact.all_objects.get(pk="003000000000001").last_modified_date, pushed_at)
+
+            call_command("sync_contacts", skip_usage_check=True, stdout=MagicMock())
+        self.assertEqual(DBContact.all_objects.get(pk="003000000000002").first_name, "Changed")
+        self.assertEqual(SyncWatermark.objects.get(name="sync_contacts").last_modified_date, pushed_at)
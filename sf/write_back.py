@@ -0,0 +1,188 @@
+"""
+Write-back outbox: pushes local API edits (db.WriteBack rows, queued by ChangeTrackingMixin) to Salesforce.
+
+- claim() takes every unsent change of up to `limit` records. Records with a push in flight are left alone, and
+  claims are serialized with a transaction-level advisory lock, so a record's changes are never pushed out of order.
+- Changes are coalesced per record: the latest value of each field is sent, earlier ones are marked superseded.
+- Before pushing, the records' LastModifiedDate is read from Salesforce (one query per batch). A record changed in
+  Salesforce after the version that was edited locally is a conflict: Salesforce wins, nothing is pushed and the
+  local row is reloaded from Salesforce.
+- The rest go out as sObject Collections PATCH requests of up to 200 records; a failed record is retried with the
+  form queue's backoff and dead-lettered after MAX_ATTEMPTS.
+- Until its changes are sent, sync_contacts does not overwrite the local row with the older Salesforce version.
+- A sent record gets Salesforce's new LastModifiedDate locally. That is why sync_contacts starts its incremental
+  runs from db.SyncWatermark, the newest LastModifiedDate it fetched itself, and not from the newest local row.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from api.forms.queue import LEASE, MAX_ATTEMPTS, retry_delay
+from db.functions import update_or_create_contacts
+from db.models import Contact, WriteBack
+from sf.api_usage import track_sf_calls
+from sf.collections import BATCH_SIZE, sobject, sobject_collections
+from sf.models.contact import Contact as SFContact
+
+logger = logging.getLogger("openstax")
+
+# model_name: (local model, Salesforce model, function reloading local rows from a Salesforce queryset)
+MODELS = {
+    "Contact": (Contact, SFContact, update_or_create_contacts),
+}
+
+ATTEMPT_FIELDS = ["status", "attempts", "error_message", "next_attempt_at", "claimed_at", "sent_at"]
+
+
+def _ready(now):
+    return Q(status="pending") | Q(status="failed", next_attempt_at__lte=now)
+
+
+def claim(limit):
+    """Claim the unsent changes of up to limit records, oldest first. Returns them marked processing."""
+    now = timezone.now()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", ["write_back"])
+        in_flight = WriteBack.objects.filter(status="processing", claimed_at__gt=now - LEASE).values("record_id")
+        stale = Q(status="processing", claimed_at__lte=now - LEASE)
+        record_ids = []
+        for record_id in (
+            WriteBack.objects.filter(_ready(now) | stale)
+            .exclude(record_id__in=in_flight)
+            .order_by("created_at")
+            .values_list("record_id", flat=True)
+            .iterator()
+        ):
+            if record_id not in record_ids:
+                record_ids.append(record_id)
+            if len(record_ids) >= limit:
+                break
+        # a failed change waiting for its retry holds back the later changes of its record too
+        changes = list(
+            WriteBack.objects.filter(record_id__in=record_ids, status__in=WriteBack.UNSENT_STATUSES).order_by(
+                "created_at"
+            )
+        )
+        WriteBack.objects.filter(pk__in=[change.pk for change in changes]).update(status="processing", claimed_at=now)
+    for change in changes:
+        change.status, change.claimed_at = "processing", now
+    return changes
+
+
+def _record_failure(changes, error, now):
+    logger.error(f"Salesforce write-back failed for {changes[0].record_id}: {error}")
+    for change in changes:
+        change.attempts += 1
+        change.error_message = str(error)[:1000]
+        if change.attempts >= MAX_ATTEMPTS:
+            change.status = "dead"
+        else:
+            change.status = "failed"
+            change.next_attempt_at = now + datetime.timedelta(seconds=retry_delay(change.attempts))
+
+
+def _is_conflict(changes, sf_modified):
+    edited = [change.base_last_modified for change in changes if change.base_last_modified]
+    return bool(edited and sf_modified and sf_modified > min(edited))
+
+
+def _push(model_name, by_record, now):
+    """Push one model's claimed changes. Returns the ids of the records sent and of those in conflict."""
+    sf_model = MODELS[model_name][1]
+    with track_sf_calls("write_back"):
+        modified = dict(sf_model.objects.filter(pk__in=list(by_record)).values_list("pk", "last_modified_date"))
+
+    updates, conflicts = [], []
+    for record_id, changes in by_record.items():
+        if record_id not in modified:
+            _record_failure(changes, f"{model_name} {record_id} not found in Salesforce", now)
+        elif _is_conflict(changes, modified[record_id]):
+            conflicts.append(record_id)
+            for change in changes:
+                change.status = "conflict"
+                change.error_message = f"Changed in Salesforce at {modified[record_id].isoformat()}"
+        else:
+            latest = {change.field_name: change.value for change in changes}  # the last change of each field wins
+            instance = sf_model(pk=record_id, **latest)
+            updates.append((record_id, sobject(instance, fields=list(latest)), changes))
+
+    sent = []
+    for start in range(0, len(updates), BATCH_SIZE):
+        batch = updates[start : start + BATCH_SIZE]
+        try:
+            results = sobject_collections("PATCH", [record for _, record, _ in batch], f"write_back_{model_name}")
+        except Exception as e:
+            results = [(None, e)] * len(batch)
+        for (record_id, _, changes), (_, error) in zip(batch, results, strict=True):
+            if error is not None:
+                _record_failure(changes, error, now)
+                continue
+            sent.append(record_id)
+            latest = {change.field_name: change for change in changes}
+            for change in changes:
+                change.status = "sent" if latest[change.field_name] is change else "superseded"
+                change.sent_at = now
+    return sent, conflicts
+
+
+def _sync_local(model_name, sent, conflicts):
+    """
+    Give sent records Salesforce's new LastModifiedDate, and reload conflicting ones from Salesforce.
+
+    Changes made while the push was in flight were based on the LastModifiedDate from before it; they move up to
+    the new one, otherwise our own push would make them look like a conflict.
+    """
+    local_model, sf_model, reload = MODELS[model_name]
+    with track_sf_calls("write_back"):
+        if sent:
+            refreshed = dict(sf_model.objects.filter(pk__in=sent).values_list("pk", "last_modified_date"))
+            local_model.all_objects.bulk_update(
+                [local_model(pk=pk, last_modified_date=last_modified) for pk, last_modified in refreshed.items()],
+                ["last_modified_date"],
+            )
+            pushed = {pk: last_modified for pk, last_modified in refreshed.items() if last_modified}
+            if pushed:
+                WriteBack.objects.filter(
+                    model_name=model_name, record_id__in=list(pushed), status__in=WriteBack.UNSENT_STATUSES
+                ).update(
+                    base_last_modified=Greatest(
+                        "base_last_modified",
+                        Case(*[When(record_id=pk, then=Value(last_modified)) for pk, last_modified in pushed.items()]),
+                    )
+                )
+        if conflicts:
+            reload(sf_model.objects.filter(pk__in=conflicts))
+
+
+def flush(changes):
+    """Push these claimed changes to Salesforce and record each one's outcome."""
+    now = timezone.now()
+    by_model = defaultdict(lambda: defaultdict(list))
+    for change in changes:
+        by_model[change.model_name][change.record_id].append(change)
+
+    outcomes = {}
+    for model_name, by_record in by_model.items():
+        try:
+            outcomes[model_name] = _push(model_name, by_record, now)
+        except Exception as e:
+            unsettled = [change for group in by_record.values() for change in group if change.status == "processing"]
+            _record_failure(unsettled, e, now)
+    for change in changes:
+        change.claimed_at = None
+    WriteBack.objects.bulk_update(changes, ATTEMPT_FIELDS)
+
+    # after the outcomes are saved, so the reload of a conflicting record is no longer held back as unsent
+    for model_name, (sent, conflicts) in outcomes.items():
+        try:
+            _sync_local(model_name, sent, conflicts)
+        except Exception as e:
+            # the outcomes stand; the next sync_contacts brings these rows up to date
+            logger.error(f"Salesforce write-back could not refresh local {model_name} rows: {e}")
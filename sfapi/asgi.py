@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from api.cache import warm_tiered_caches
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sfapi.settings")
 
 application = get_asgi_application()
+
+# Fill the hot in-process caches (school count, books, pardot config) before the worker takes traffic
+warm_tiered_caches()
@@ -24,6 +24,8 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "test" if TEST else "local")
 RELEASE_VERSION = os.getenv("RELEASE_VERSION")
 DEPLOYMENT_VERSION = os.getenv("DEPLOYMENT_VERSION")
 IS_TESTING = os.getenv("IS_TESTING", "").lower() in ("true", "1")
+# Serve /me, /info and /case with their async views; set when running under ASGI (see README, Deployment)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "").lower() in ("true", "1")
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
@@ -82,6 +84,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # trigram search support and GIN index opclasses
     # contrib
     "corsheaders",  # for allowing cross-origin requests
     "django_crontab",  # for running cron jobs
@@ -125,6 +128,21 @@ CRONJOBS = [
         "django.core.management.call_command",
         ["sync_pardot", "--survey", "--full"],
     ),  # pardot tier 3 (full sync, ~2500+ calls) monthly 1st at 7am
+    (
+        "* * * * *",
+        "django.core.management.call_command",
+        ["process_form_submissions", "--once"],
+    ),  # drain the form queue every minute, a backstop for the long-running workers
+    (
+        "* * * * *",
+        "django.core.management.call_command",
+        ["push_write_backs", "--once"],
+    ),  # push local contact edits to Salesforce every minute
+    (
+        "*/5 * * * *",
+        "django.core.management.call_command",
+        ["rollup_request_logs"],
+    ),  # fold new request logs into the latency rollups every 5 minutes
 ]
 
 CORS_ALLOWED_ORIGIN_REGEXES = [
@@ -149,6 +167,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.ProfilerMiddleware",
+    "api.db_router.ReadReplicaMiddleware",
+    "api.middleware.ServerTimingMiddleware",
     "api.middleware.AuditLogMiddleware",
 ]
 if ENVIRONMENT not in ("local", "test"):
@@ -183,6 +204,7 @@ DATABASES = {
         "PASSWORD": os.getenv("DATABASE_PASSWORD", "postgres"),
         "HOST": os.getenv("DATABASE_HOST", "localhost"),
         "PORT": os.getenv("DATABASE_PORT", "5432"),
+        "OPTIONS": {},
     },
     "salesforce": {
         "ENGINE": "salesforce.backend",
@@ -195,6 +217,30 @@ DATABASES = {
     },
 }
 
+# Connection pooling: each worker process keeps a psycopg pool per database instead of connecting on every
+# request (see api/db_pool.py for its metrics). Set DATABASE_POOL=false when PgBouncer or similar pools in front.
+if os.getenv("DATABASE_POOL", "true").lower() == "true":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),  # seconds to wait for a free connection
+        "max_idle": 60 * 5,  # 5 minutes; idle connections above min_size are closed after this
+        "check": ConnectionPool.check_connection,  # health check on checkout, a dead connection is replaced
+    }
+
+# Optional streaming replica of "default" for the read-only traffic of the API and the Pardot dashboard
+# (see api/db_router.py); without DATABASE_REPLICA_HOST everything reads from the primary
+if os.getenv("DATABASE_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DATABASE_REPLICA_HOST"),
+        "PORT": os.getenv("DATABASE_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICA_MAX_LAG = float(os.getenv("DATABASE_REPLICA_MAX_LAG", 5))  # seconds, read the primary above this
+
 # Set Salesforce environment based on the host for /info/
 # username, accounting for email period, then env. if the connecting user has a period in their email, this will fail
 SALESFORCE_ENVIRONMENT = None
@@ -205,6 +251,40 @@ except IndexError:
 
 # Salesforce API rate limiting
 SALESFORCE_API_RATE_LIMIT = os.getenv("SALESFORCE_API_RATE_LIMIT", "20/min")  # x/sec x/min x/hour
+
+# Salesforce requests in flight per form type, across all process_form_submissions workers (default 4): one per
+# submission, or one per batch of up to 200 for forms that create Cases; keeps a burst of one form from using
+# every worker and the Salesforce API budget
+FORM_QUEUE_CONCURRENCY = {
+    "web_to_case": int(os.getenv("FORM_QUEUE_CONCURRENCY_WEB_TO_CASE", 4)),
+    "contact_us": int(os.getenv("FORM_QUEUE_CONCURRENCY_CONTACT_US", 2)),
+}
+
+# Request audit log (api/audit.py): rows are buffered per worker and written in batches off the request path
+AUDIT_LOG_BUFFERED = True
+AUDIT_LOG_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_SIZE", 10000))  # rows; beyond this they are dropped
+AUDIT_LOG_FLUSH_SIZE = int(os.getenv("AUDIT_LOG_FLUSH_SIZE", 500))
+AUDIT_LOG_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_LOG_FLUSH_INTERVAL_MS", 1000))
+# (path prefix, statuses, share of requests logged), first match wins; statuses are codes or classes like "2xx".
+# Responses with status 400 and above are always logged.
+AUDIT_LOG_READ_SAMPLE_RATE = float(os.getenv("AUDIT_LOG_READ_SAMPLE_RATE", 0.1))
+AUDIT_LOG_SAMPLING = [
+    ("/api/v1/schools", ["2xx", "304"], AUDIT_LOG_READ_SAMPLE_RATE),
+    ("/api/v1/books", ["2xx", "304"], AUDIT_LOG_READ_SAMPLE_RATE),
+]
+
+# Server-Timing header (db, cache, sf and auth time, see api/timing.py) on every API response; super users
+# always get it. The same numbers are logged to RequestLog either way.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "").lower() in ("true", "1")
+
+# Token buckets per caller (see api/ratelimit.py), charged only for work that is not served from the cache.
+# An API key can override any of these with its rate_limits field.
+RATE_LIMITS = {
+    "read": os.getenv("RATE_LIMIT_READ", "600/min"),  # cache misses that query Postgres
+    "salesforce": SALESFORCE_API_RATE_LIMIT,  # writes to Salesforce, e.g. POST /case
+    "forms": os.getenv("RATE_LIMIT_FORMS", "10/min"),
+    "export": os.getenv("RATE_LIMIT_EXPORT", "30/hour"),
+}
 SALESFORCE_API_USE_ALERT_THRESHOLD = os.getenv("SALESFORCE_API_USE_ALERT_THRESHOLD", 0.5)  # 50% of the limit
 
 # Make sure to have sfdx/sf cli installed, you will be prompted to authenticate if you aren't
@@ -214,7 +294,7 @@ if USE_SFDX_AUTH:
     DATABASES["salesforce"].pop("CONSUMER_SECRET")
     DATABASES["salesforce"].pop("PASSWORD")
 
-DATABASE_ROUTERS = ["salesforce.router.ModelRouter"]
+DATABASE_ROUTERS = ["api.db_router.ReplicaRouter", "salesforce.router.ModelRouter"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -231,7 +311,7 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": REDIS_URL,
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CLIENT_CLASS": "api.timing.TimedRedisClient",  # django-redis DefaultClient, timed per request
             "PASSWORD": REDIS_PASSWORD,
             "IGNORE_EXCEPTIONS": True,  # this works without redis, so don't kill app if redis is down
         },
@@ -240,6 +320,9 @@ CACHES = {
     }
 }
 
+# How often (seconds) each worker checks Redis for invalidations of its in-process tier (api.cache.TieredCache)
+TIERED_CACHE_CHECK_INTERVAL = int(os.getenv("TIERED_CACHE_CHECK_INTERVAL", 5))
+
 # If running locally, use a dummy cache to avoid having to spin up a redis server
 if LOCAL:
     CACHES = {
@@ -20,12 +20,19 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://127.0.0.1:6379/",
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CLIENT_CLASS": "api.timing.TimedRedisClient",
         },
     }
 }
 
 SALESFORCE_DB_ALIAS = "default"
 
+# Write audit log rows inside the request, where the test's transaction can see them
+AUDIT_LOG_BUFFERED = False
+AUDIT_LOG_SAMPLING = []
+
+# Tests clear Redis between cases; always notice it so in-process tiers never leak between tests
+TIERED_CACHE_CHECK_INTERVAL = 0
+
 # Disable production security settings for tests
 SECURE_SSL_REDIRECT = False
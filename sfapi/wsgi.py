@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from api.cache import warm_tiered_caches
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sfapi.settings")
 
 application = get_wsgi_application()
+
+# Fill the hot in-process caches (school count, books, pardot config) before the worker takes traffic
+warm_tiered_caches()
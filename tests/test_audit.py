@@ -1,6 +1,10 @@
+import datetime
+
 from django.test import TestCase
+from django.utils import timezone
 
-from api.models import FieldChangeLog, RequestLog
+from api import rollups
+from api.models import FieldChangeLog, RequestLog, RequestRollup
 from db.models import Account
 
 
@@ -29,6 +33,57 @@ class RequestLogTest(TestCase):
         self.assertEqual(logs[0].path, "/b")
 
 
+class RequestRollupTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.old = self.now - datetime.timedelta(minutes=10)
+
+    def _log(self, path, duration_ms, status_code=200, **fields):
+        fields.setdefault("timestamp", self.old)
+        return RequestLog.objects.create(
+            method="GET", path=path, status_code=status_code, duration_ms=duration_ms, **fields
+        )
+
+    def test_percentiles_within_bucket_growth(self):
+        histogram = {}
+        for ms in range(1, 1001):
+            rollups.merge_histograms(histogram, {rollups.bucket_index(ms): 1})
+        for q, exact in ((0.5, 500), (0.95, 950), (0.99, 990)):
+            self.assertAlmostEqual(rollups.percentile(histogram, q), exact, delta=exact * (rollups.BUCKET_GROWTH - 1))
+        self.assertIsNone(rollups.percentile({}, 0.5))
+
+    def test_fold_groups_by_route_and_weights_samples(self):
+        self._log("/api/v1/schools/001A", 10, auth_type="api_key", auth_identifier="website")
+        self._log("/api/v1/schools/001B", 30, auth_type="api_key", auth_identifier="website", sample_rate=0.5)
+        self._log("/api/v1/schools/001C", 500, status_code=503, auth_type="sso", auth_identifier="some-uuid")
+        self._log("/no/such/route", 5)
+
+        self.assertEqual(rollups.fold(self.now), 4)
+
+        rollup = RequestRollup.objects.get(period="hour", status_class="2xx", auth_type="api_key")
+        self.assertEqual((rollup.path, rollup.api_key), ("/api/v1/schools/<school_id>", "website"))
+        self.assertEqual((rollup.requests, rollup.logged, rollup.duration_ms_max), (3, 2, 30))
+        sso = RequestRollup.objects.get(period="day", auth_type="sso")
+        self.assertEqual((sso.status_class, sso.api_key), ("5xx", ""))
+        self.assertTrue(RequestRollup.objects.filter(path=rollups.UNMATCHED_PATH).exists())
+
+    def test_fold_is_incremental_and_stops_at_unsettled_rows(self):
+        self._log("/api/v1/books", 10)
+        rollups.fold(self.now)
+        self._log("/api/v1/books", 20)
+        recent = self._log("/api/v1/books", 30, timestamp=self.now)
+        self._log("/api/v1/books", 40)  # a higher id that committed earlier must wait for the recent row
+
+        self.assertEqual(rollups.fold(self.now), 1)
+        self.assertEqual(RequestRollup.objects.get(period="hour").logged, 2)
+        self.assertEqual(rollups.fold(recent.timestamp + rollups.SETTLE), 2)
+        self.assertEqual(rollups.fold(recent.timestamp + rollups.SETTLE), 0)
+
+        summary = rollups.summarize(RequestRollup.objects.filter(period="day"))
+        self.assertEqual(summary[0]["requests"], 4)
+        self.assertEqual((summary[0]["mean_ms"], summary[0]["max_ms"]), (25, 40))
+
+
 class FieldChangeLogTest(TestCase):
     def test_create_field_change_log(self):
         log = FieldChangeLog.objects.create(
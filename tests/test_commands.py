@@ -3,40 +3,93 @@ from io import StringIO
 from unittest.mock import MagicMock, patch
 
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 
+from api import partitions
 from api.models import RequestLog
 from db.models import Account, Contact
 
 
 class CleanupLogsCommandTest(TestCase):
-    def _create_old_request_log(self, days_old=100):
-        log = RequestLog.objects.create(method="GET", path="/api/v1/schools", status_code=200, duration_ms=10)
-        # auto_now_add prevents setting timestamp on create; update it directly
-        RequestLog.objects.filter(pk=log.pk).update(timestamp=timezone.now() - timedelta(days=days_old))
-        return log
+    def setUp(self):
+        self.now = timezone.now()
 
-    def test_dry_run(self):
-        self._create_old_request_log(100)
+    def _tables(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tablename FROM pg_tables WHERE tablename LIKE 'api_requestlog%%'")
+            return {row[0] for row in cursor.fetchall()}
+
+    def _run(self, *args, months_later=0):
         out = StringIO()
-        call_command("cleanup_logs", "--dry-run", stdout=out)
-        output = out.getvalue()
-        self.assertIn("Would delete 1 request logs", output)
-        self.assertEqual(RequestLog.objects.count(), 1)  # Not deleted
+        later = partitions.add_months(self.now, months_later)
+        with patch("api.management.commands.cleanup_logs.timezone.now", return_value=later):
+            call_command("cleanup_logs", *args, stdout=out)
+        return out.getvalue()
+
+    def test_logs_are_partitioned_by_month(self):
+        names = [name for name, _, _ in partitions.partitions("api_requestlog")]
+        self.assertEqual(names[0], "api_requestlog_legacy")
+        self.assertEqual(len(names), 1 + partitions.MONTHS_AHEAD)
+        RequestLog.objects.create(method="GET", path="/api/v1/schools", status_code=200, duration_ms=10)
+        RequestLog.objects.create(
+            method="GET",
+            path="/api/v1/schools",
+            status_code=200,
+            duration_ms=10,
+            timestamp=self.now + timedelta(days=62),
+        )
+        self.assertEqual(RequestLog.objects.count(), 2)
+
+    def test_rows_past_the_last_partition_move_out_of_the_default_partition(self):
+        default = partitions.default_partition("api_requestlog")
+        self.assertEqual(default, "api_requestlog_default")
+        late = RequestLog.objects.create(
+            method="GET",
+            path="/api/v1/contact",
+            status_code=200,
+            duration_ms=5,
+            timestamp=partitions.add_months(self.now, 8),
+        )
+        self._run(months_later=10)
+        month = partitions.month_start(late.timestamp)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{default}"')  # noqa: S608
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute(f'SELECT id FROM "api_requestlog_p{month:%Y%m}"')  # noqa: S608
+            self.assertEqual(cursor.fetchall(), [(late.pk,)])
 
-    def test_cleanup_old_logs(self):
-        self._create_old_request_log(100)
+    def test_dry_run(self):
+        output = self._run("--dry-run", months_later=6)
+        self.assertIn("Would drop ~0 request logs older than 90 days (partitions: api_requestlog_legacy", output)
+        self.assertIn("api_requestlog_legacy", self._tables())
+
+    def test_drops_expired_partitions_and_creates_new_ones(self):
         RequestLog.objects.create(method="GET", path="/api/v1/contact", status_code=200, duration_ms=5)
-        out = StringIO()
-        call_command("cleanup_logs", stdout=out)
-        self.assertIn("Cleaned up", out.getvalue())
-        self.assertEqual(RequestLog.objects.count(), 1)
+        recent = RequestLog.objects.create(
+            method="GET",
+            path="/api/v1/contact",
+            status_code=200,
+            duration_ms=5,
+            timestamp=self.now + timedelta(days=95),
+        )
+        output = self._run(months_later=5)
+        self.assertIn("Dropped", output)
+        self.assertEqual(list(RequestLog.objects.values_list("pk", flat=True)), [recent.pk])
+        self.assertNotIn("api_requestlog_legacy", self._tables())
+        month = partitions.month_start(partitions.add_months(self.now, 5 + partitions.MONTHS_AHEAD))
+        self.assertIn(f"api_requestlog_p{month:%Y%m}", self._tables())
+
+    def test_detach_keeps_partition_as_table(self):
+        RequestLog.objects.create(method="GET", path="/api/v1/contact", status_code=200, duration_ms=5)
+        output = self._run("--detach", months_later=4)
+        self.assertIn("Detached", output)
+        self.assertEqual(RequestLog.objects.count(), 0)
+        self.assertIn("api_requestlog_legacy", self._tables())
 
-    def test_cleanup_no_old_logs(self):
-        out = StringIO()
-        call_command("cleanup_logs", stdout=out)
-        self.assertIn("Cleaned up 0 request logs", out.getvalue())
+    def test_cleanup_nothing_expired(self):
+        self.assertIn("Dropped 0 partitions (~0 rows) of request logs", self._run())
 
 
 class CreateApiKeyCommandTest(TestCase):
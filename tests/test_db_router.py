@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from api.db_router import ReadReplicaMiddleware, ReplicaRouter, read_alias, stick_to_primary
+from api.models import RequestLog
+from db.models import Account
+from sf.models.case import Case
+
+
+@override_settings(DATABASE_REPLICA_MAX_LAG=5)
+@patch("api.db_router.replica_configured", return_value=True)
+@patch("api.db_router.replica_lag", return_value=0.5)
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def reads_during(self, request, view=lambda: None):
+        """The database Account reads are routed to while serving request, after view ran."""
+        seen = []
+
+        def get_response(request):
+            view()
+            seen.append(self.router.db_for_read(Account))
+            return HttpResponse()
+
+        ReadReplicaMiddleware(get_response)(request)
+        return seen[0]
+
+    def test_safe_api_requests_read_from_replica(self, *mocks):
+        self.assertEqual(self.reads_during(self.factory.get("/api/v1/schools")), "replica")
+        self.assertEqual(self.reads_during(self.factory.get("/pardot/")), "replica")
+        self.assertIsNone(self.reads_during(self.factory.get("/admin/")))
+        self.assertIsNone(self.reads_during(self.factory.post("/api/v1/case")))
+        # outside a request (sync commands) everything stays on the primary
+        self.assertEqual(read_alias(), "default")
+        self.assertIsNone(self.router.db_for_read(Account))
+
+    def test_write_sends_later_reads_to_primary(self, *mocks):
+        def view():
+            self.assertEqual(self.router.db_for_write(RequestLog), "default")
+
+        self.assertIsNone(self.reads_during(self.factory.get("/api/v1/adoptions"), view))
+
+    def test_lagging_replica_falls_back_to_primary(self, lag, configured):
+        lag.return_value = 30
+        self.assertIsNone(self.reads_during(self.factory.get("/api/v1/schools")))
+
+    def test_caller_sticks_to_primary_after_contact_update(self, *mocks):
+        update = self.factory.put("/api/v1/contact", HTTP_AUTHORIZATION="Bearer abc")
+        ReadReplicaMiddleware(lambda request: stick_to_primary(request) or HttpResponse())(update)
+
+        self.assertIsNone(self.reads_during(self.factory.get("/api/v1/contact", HTTP_AUTHORIZATION="Bearer abc")))
+        other = self.factory.get("/api/v1/contact", HTTP_AUTHORIZATION="Bearer xyz")
+        self.assertEqual(self.reads_during(other), "replica")
+
+    def test_salesforce_models_are_left_to_the_salesforce_router(self, *mocks):
+        def view():
+            self.assertIsNone(self.router.db_for_read(Case))
+            self.assertIsNone(self.router.db_for_write(Case))
+
+        # a Salesforce write is not a write to the primary, later reads can still use the replica
+        self.assertEqual(self.reads_during(self.factory.get("/api/v1/contact"), view), "replica")
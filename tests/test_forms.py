@@ -1,11 +1,16 @@
+from datetime import timedelta
+from io import StringIO
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
+from api.forms import outbox, queue
 from api.forms.pipeline import FormPipeline
-from api.forms.processors import PROCESSORS, process_submission
-from api.models import FormSubmission
+from api.forms.processors import CASE_BUILDERS, process_submission
+from api.models import FormSubmission, SFAPIUsageLog
 
 
 class FormPipelineTest(TestCase):
@@ -49,6 +54,11 @@ class FormPipelineTest(TestCase):
         self.assertFalse(is_valid)
         self.assertIn("form_type is required", errors)
 
+    def test_api_case_is_reserved(self):
+        is_valid, errors = FormPipeline().validate(self._payload(form_type="api_case"))
+        self.assertFalse(is_valid)
+        self.assertIn("form_type api_case cannot be submitted as a form", errors)
+
     def test_missing_data(self):
         is_valid, errors = FormPipeline().validate(self._payload(data={}))
         self.assertFalse(is_valid)
@@ -57,8 +67,9 @@ class FormPipelineTest(TestCase):
 
 class FormProcessorTest(TestCase):
     def test_processors_registered(self):
-        self.assertIn("web_to_case", PROCESSORS)
-        self.assertIn("contact_us", PROCESSORS)
+        self.assertIn("web_to_case", CASE_BUILDERS)
+        self.assertIn("contact_us", CASE_BUILDERS)
+        self.assertIn("api_case", CASE_BUILDERS)
 
     def test_unknown_form_type(self):
         submission = FormSubmission.objects.create(
@@ -70,12 +81,17 @@ class FormProcessorTest(TestCase):
         )
         process_submission(submission)
         submission.refresh_from_db()
-        self.assertEqual(submission.status, "failed")
+        self.assertEqual(submission.status, "dead")
         self.assertIn("Unknown form type", submission.error_message)
 
-    @patch("api.forms.processors.Case")
-    def test_web_to_case_success(self, mock_case):
-        mock_case.objects.create.return_value = MagicMock(pk="500000000000001")
+    def test_contact_us_builds_case(self):
+        _, build = CASE_BUILDERS["contact_us"]
+        case = build({"subject": "Question", "message": "Hi"})
+        self.assertEqual((case.subject, case.description), ("Contact Us: Question", "Hi"))
+        self.assertIsNone(case.pk)
+
+    @patch("api.forms.outbox.create_cases", return_value=[("500000000000001", None)])
+    def test_web_to_case_success(self, mock_create):
         submission = FormSubmission.objects.create(
             form_type="web_to_case",
             data={"subject": "Help", "description": "Need help"},
@@ -87,32 +103,150 @@ class FormProcessorTest(TestCase):
         submission.refresh_from_db()
         self.assertEqual(submission.status, "completed")
         self.assertEqual(submission.sf_record_id, "500000000000001")
+        cases, usage_source = mock_create.call_args.args
+        self.assertEqual((cases[0].subject, usage_source), ("Help", "form_web_to_case"))
 
-    @patch("api.forms.processors.Case")
-    def test_contact_us_success(self, mock_case):
-        mock_case.objects.create.return_value = MagicMock(pk="500000000000002")
+    @patch("api.forms.outbox.create_cases", side_effect=Exception("SF connection failed"))
+    def test_processor_exception(self, mock_create):
         submission = FormSubmission.objects.create(
-            form_type="contact_us",
-            data={"subject": "Question", "message": "Hi"},
+            form_type="web_to_case",
+            data={"subject": "Help"},
             status="pending",
             auth_type="sso",
             auth_identifier="test",
         )
         process_submission(submission)
         submission.refresh_from_db()
-        self.assertEqual(submission.status, "completed")
+        self.assertEqual(submission.status, "failed")
+        self.assertIn("SF connection failed", submission.error_message)
+        self.assertEqual(submission.attempts, 1)
+        self.assertGreater(submission.next_attempt_at, timezone.now() + timedelta(seconds=queue.BACKOFF_BASE - 5))
 
-    @patch("api.forms.processors.Case")
-    def test_processor_exception(self, mock_case):
-        mock_case.objects.create.side_effect = Exception("SF connection failed")
+    @patch("api.forms.outbox.create_cases", side_effect=Exception("SF connection failed"))
+    def test_dead_letter_after_max_attempts(self, mock_create):
         submission = FormSubmission.objects.create(
-            form_type="web_to_case",
-            data={"subject": "Help"},
-            status="pending",
-            auth_type="sso",
-            auth_identifier="test",
+            form_type="web_to_case", data={"subject": "Help"}, status="failed", attempts=queue.MAX_ATTEMPTS - 1
         )
         process_submission(submission)
         submission.refresh_from_db()
-        self.assertEqual(submission.status, "failed")
-        self.assertIn("SF connection failed", submission.error_message)
+        self.assertEqual(submission.status, "dead")
+        self.assertIsNone(submission.next_attempt_at)
+
+
+class CaseOutboxTest(TestCase):
+    def _submit(self, n, form_type="contact_us"):
+        return [
+            FormSubmission.objects.create(form_type=form_type, data={"subject": f"Q{i}", "message": "Hi"})
+            for i in range(n)
+        ]
+
+    def _sf_response(self, results):
+        session = MagicMock()
+        session.auth.instance_url = "https://example.my.salesforce.com"
+        session.request.return_value.json.return_value = results
+        return session
+
+    def test_one_request_per_batch_of_cases(self):
+        submissions = self._submit(outbox.BATCH_SIZE + 1)
+        batches = []
+
+        def create_cases(cases, usage_source):
+            batches.append(len(cases))
+            return [(f"500{len(batches)}{i:011d}", None) for i in range(len(cases))]
+
+        with patch("api.forms.outbox.create_cases", side_effect=create_cases):
+            outbox.flush(submissions)
+        self.assertEqual(batches, [outbox.BATCH_SIZE, 1])
+        self.assertEqual(FormSubmission.objects.filter(status="completed").count(), outbox.BATCH_SIZE + 1)
+        submissions[-1].refresh_from_db()
+        self.assertEqual(submissions[-1].sf_record_id, "500200000000000")
+
+    def test_partial_failure_is_per_record(self):
+        ok, rejected = self._submit(2)
+        session = self._sf_response(
+            [
+                {"id": "500000000000001", "success": True, "errors": []},
+                {"success": False, "errors": [{"statusCode": "REQUIRED_FIELD_MISSING", "message": "Subject"}]},
+            ]
+        )
+        with patch("sf.collections.connections", {"salesforce": MagicMock(sf_session=session)}):
+            outbox.flush([ok, rejected])
+        ok.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual((ok.status, ok.sf_record_id), ("completed", "500000000000001"))
+        self.assertEqual(rejected.status, "failed")
+        self.assertEqual(rejected.error_message, "REQUIRED_FIELD_MISSING: Subject")
+
+        body = session.request.call_args.kwargs["json"]
+        self.assertFalse(body["allOrNone"])
+        self.assertEqual(
+            body["records"][0], {"attributes": {"type": "Case"}, "Subject": "Contact Us: Q0", "Description": "Hi"}
+        )
+        self.assertEqual(SFAPIUsageLog.objects.get(source="form_contact_us").call_count, 1)
+
+    def test_case_that_cannot_be_built_fails_on_its_own(self):
+        ok = FormSubmission.objects.create(form_type="api_case", data={"subject": "Help", "description": "Hi"})
+        malformed = FormSubmission.objects.create(form_type="api_case", data={"description": "no subject"})
+        with patch("api.forms.outbox.create_cases", return_value=[("500000000000001", None)]) as mock_create:
+            outbox.flush([ok, malformed])
+        self.assertEqual(len(mock_create.call_args.args[0]), 1)
+        ok.refresh_from_db()
+        malformed.refresh_from_db()
+        self.assertEqual((ok.status, ok.attempts), ("completed", 1))
+        self.assertEqual((malformed.status, malformed.attempts), ("failed", 1))
+        self.assertIn("subject", malformed.error_message)
+
+
+class FormQueueTest(TestCase):
+    def _submit(self, form_type="contact_us", **kwargs):
+        return FormSubmission.objects.create(form_type=form_type, data={"message": "Hi"}, **kwargs)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual([queue.retry_delay(n) for n in (1, 2, 3)], [30, 60, 120])
+        self.assertEqual(queue.retry_delay(20), queue.BACKOFF_MAX)
+
+    def test_claims_only_due_submissions(self):
+        due = self._submit()
+        self._submit(status="failed", next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self._submit(status="spam", next_attempt_at=None)
+        claimed = queue.claim(10)
+        self.assertEqual([s.pk for s in claimed], [due.pk])
+        due.refresh_from_db()
+        self.assertEqual(due.status, "processing")
+        self.assertEqual(queue.claim(10), [])
+
+    @override_settings(FORM_QUEUE_CONCURRENCY={"newsletter": 2})
+    def test_per_form_type_concurrency(self):
+        for _ in range(3):
+            self._submit("newsletter")
+        self._submit("web_to_case")
+        claimed = queue.claim(10)
+        self.assertEqual(sorted(s.form_type for s in claimed), ["newsletter", "newsletter", "web_to_case"])
+        # both newsletter slots are taken until one of them finishes
+        self.assertEqual(queue.claim(10), [])
+        finished = next(s for s in claimed if s.form_type == "newsletter")
+        FormSubmission.objects.filter(pk=finished.pk).update(status="completed")
+        self.assertEqual(len(queue.claim(10)), 1)
+
+    @override_settings(FORM_QUEUE_CONCURRENCY={"contact_us": 1})
+    def test_case_forms_count_concurrency_in_batches(self):
+        self.assertEqual(queue.concurrency("contact_us"), outbox.BATCH_SIZE)
+        for _ in range(3):
+            self._submit()
+        self.assertEqual(len(queue.claim(10)), 3)
+
+    def test_reclaims_submission_of_a_dead_worker(self):
+        stale = self._submit(status="processing", claimed_at=timezone.now() - queue.LEASE - timedelta(seconds=1))
+        self.assertEqual([s.pk for s in queue.claim(10)], [stale.pk])
+
+    @patch("api.forms.outbox.create_cases")
+    def test_worker_drains_queue(self, mock_create):
+        mock_create.side_effect = lambda cases, usage_source: [("500000000000003", None)] * len(cases)
+        submissions = [self._submit(), self._submit(), self._submit("unknown_type")]
+        out = StringIO()
+        call_command("process_form_submissions", "--once", stdout=out)
+        statuses = FormSubmission.objects.filter(pk__in=[s.pk for s in submissions]).values_list("status", flat=True)
+        self.assertEqual(sorted(statuses), ["completed", "completed", "dead"])
+        # both contact_us cases went to Salesforce in one request
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertIn("Processed 3 form submissions", out.getvalue())
@@ -1,8 +1,16 @@
+import time
+from collections import Counter
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpResponse
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 
+from api import audit, profiler, timing
+from api.auth import APIKey
 from api.middleware import AuditLogMiddleware
-from api.models import RequestLog
+from api.models import RequestLog, RequestProfile, SuperUser
 
 
 class AuditLogMiddlewareTest(TestCase):
@@ -68,3 +76,143 @@ class AuditLogMiddlewareTest(TestCase):
         self.middleware.process_response(request, HttpResponse(status=200))
         log = RequestLog.objects.first()
         self.assertEqual(log.ip_address, "127.0.0.1")
+
+
+@override_settings(AUDIT_LOG_SAMPLING=[("/api/v1/schools", ["2xx"], 0.0), ("/api/v1/books", ["200"], 0.5)])
+class AuditBufferTest(TestCase):
+    def setUp(self):
+        audit.reset()
+        self.addCleanup(audit.reset)
+
+    def _record(self, path="/api/v1/contact", status_code=200):
+        audit.record(method="GET", path=path, status_code=status_code, duration_ms=5)
+
+    def test_sample_rates(self):
+        self.assertEqual(audit.sample_rate("/api/v1/schools/suggest", 200), 0.0)
+        self.assertEqual(audit.sample_rate("/api/v1/books", 200), 0.5)
+        self.assertEqual(audit.sample_rate("/api/v1/books", 304), 1.0)
+        self.assertEqual(audit.sample_rate("/api/v1/contact", 200), 1.0)
+        # errors are always logged
+        self.assertEqual(audit.sample_rate("/api/v1/schools", 500), 1.0)
+
+    def test_sampled_rows_record_their_rate(self):
+        self._record("/api/v1/schools")
+        with patch("api.audit.random.random", return_value=0.2):
+            self._record("/api/v1/books")
+        self._record("/api/v1/schools", status_code=404)
+        rows = RequestLog.objects.order_by("path").values_list("path", "sample_rate")
+        self.assertEqual(list(rows), [("/api/v1/books", 0.5), ("/api/v1/schools", 1.0)])
+        self.assertEqual(audit.stats()["sampled_out"], 1)
+
+    @override_settings(AUDIT_LOG_BUFFERED=True, AUDIT_LOG_QUEUE_SIZE=2)
+    @patch("api.audit.threading.Thread")  # the flusher's writes would land outside the test's transaction
+    def test_rows_are_buffered_until_flushed(self, mock_thread):
+        for _ in range(3):
+            self._record()
+        self.assertEqual(RequestLog.objects.count(), 0)
+        self.assertEqual(audit.stats()["queued"], 2)
+        audit.flush()
+        self.assertEqual(RequestLog.objects.count(), 2)
+        stats = audit.stats()
+        self.assertEqual((stats["written"], stats["flushes"], stats["dropped"], stats["queued"]), (2, 1, 1, 0))
+        mock_thread.return_value.start.assert_called_once()
+
+
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        self.super_uuid = "f8a6b8b8-32f7-4b4d-b6f9-054ab6fb5623"
+        SuperUser.objects.create(accounts_uuid=self.super_uuid, name="Test Super User")
+
+    def test_layers_add_to_current_request(self):
+        self.addCleanup(cache.delete, "timing-test")
+        timings, token = timing.start()
+        try:
+            cache.set("timing-test", 1)
+            cache.get("timing-test")
+            cache.get_many(["timing-test", "timing-missing"])
+            with timing.measure("auth"), timing.measure("auth"):
+                RequestLog.objects.count()
+        finally:
+            timing.stop(token)
+        fields = timings.log_fields()
+        self.assertEqual((fields["cache_hits"], fields["cache_misses"], fields["db_queries"]), (2, 1, 1))
+        self.assertEqual(timings.counts["auth"], 1)  # nested blocks count once
+        self.assertIn("cache;dur=", timings.header())
+
+        cache.get("timing-test")  # outside a request
+        self.assertEqual(timings.counts["cache_hit"], 2)
+
+    @patch("sf.api_usage.get_sf_api_usage", return_value=(1000, 15000))
+    @patch("api.api_v1.get_logged_in_user_uuid")
+    @patch("api.auth.get_logged_in_user_uuid")
+    def test_header_for_super_users_and_logged_columns(self, mock_auth_uuid, mock_api_uuid, mock_usage):
+        mock_auth_uuid.return_value = mock_api_uuid.return_value = self.super_uuid
+        response = self.client.get("/api/v1/info")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="Database: \d+ calls", cache;')
+        log = RequestLog.objects.get(path="/api/v1/info")
+        self.assertGreater(log.db_queries, 0)
+        self.assertGreater(log.auth_ms, 0)
+
+    @patch("api.auth.get_logged_in_user_uuid", return_value=None)
+    def test_header_only_when_enabled(self, mock_uuid):
+        self.assertNotIn("Server-Timing", self.client.get("/api/v1/info"))
+        with override_settings(SERVER_TIMING_ENABLED=True):
+            self.assertIn("Server-Timing", self.client.get("/api/v1/info"))
+
+
+def _slow_usage():
+    time.sleep(0.05)
+    return 1000, 15000
+
+
+class ProfilerTest(TestCase):
+    def setUp(self):
+        self.super_uuid = "f8a6b8b8-32f7-4b4d-b6f9-054ab6fb5623"
+        SuperUser.objects.create(accounts_uuid=self.super_uuid, name="Test Super User")
+
+    @patch("sf.api_usage.get_sf_api_usage", side_effect=_slow_usage)
+    @patch("api.api_v1.get_logged_in_user_uuid")
+    @patch("api.auth.get_logged_in_user_uuid")
+    def test_profiles_flagged_super_user_request(self, mock_auth_uuid, mock_api_uuid, mock_usage):
+        mock_auth_uuid.return_value = mock_api_uuid.return_value = self.super_uuid
+        self.client.cookies[settings.SSO_COOKIE_NAME] = "sso-cookie"
+        self.assertNotIn("X-Profile-Id", self.client.get("/api/v1/info"))
+
+        response = self.client.get("/api/v1/info?profile=1")
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual((profile.path, profile.status_code, profile.auth_type), ("/api/v1/info", 200, "sso"))
+        self.assertGreater(profile.samples, 0)
+        frames = [frame for frame, _ in profiler.top_frames(profile.stacks)]
+        self.assertIn("_slow_usage (tests/test_middleware.py)", frames)
+
+    @patch("api.profiler.start")
+    @patch("api.auth.get_logged_in_user_uuid", return_value="not-a-super-user")
+    def test_unauthorized_flags_do_not_start_sampling(self, mock_uuid, mock_start):
+        response = self.client.get("/api/v1/info", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 401)
+
+        _, raw_key = APIKey.create_key(name="books-only", scopes=["read:books"])
+        self.client.get("/api/v1/info?profile=1", HTTP_AUTHORIZATION=f"Bearer {raw_key}")
+        self.client.cookies[settings.SSO_COOKIE_NAME] = "sso-cookie"
+        response = self.client.get("/api/v1/info?profile=1")
+        mock_start.assert_not_called()
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @patch("api.auth.get_logged_in_user_uuid", return_value=None)
+    def test_api_key_with_read_info_is_profiled(self, mock_uuid):
+        _, raw_key = APIKey.create_key(name="ops", scopes=["read:info"])
+        with patch("sf.api_usage.get_sf_api_usage", side_effect=_slow_usage):
+            response = self.client.get("/api/v1/info?profile=1", HTTP_AUTHORIZATION=f"Bearer {raw_key}")
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual((profile.auth_type, profile.auth_identifier), ("api_key", "ops"))
+        sampler = profiler.start()  # the sampling slot was handed back
+        self.assertIsNotNone(sampler)
+        profiler.stop(sampler)
+
+    def test_size_limit_keeps_most_frequent_stacks(self):
+        stacks = Counter({"a;b": 5, "a;c": 3, "a;d": 1})
+        self.assertEqual(profiler.collapsed(stacks), ("a;b 5\na;c 3\na;d 1", False))
+        self.assertEqual(profiler.collapsed(stacks, max_bytes=12), ("a;b 5\na;c 3", True))
+        self.assertEqual(profiler.top_frames("a;b 5\na;c 3"), [("b", 0.625), ("c", 0.375)])
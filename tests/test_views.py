@@ -1,8 +1,11 @@
-from unittest.mock import patch
+from unittest.mock import Mock, PropertyMock, patch
 
+from django.db import connections
 from django.test import TestCase
+from django.utils import timezone
 
-from api.models import SuperUser
+from api import db_pool, rollups
+from api.models import RequestRollup, SuperUser
 
 
 class InfoEndpointTest(TestCase):
@@ -44,3 +47,65 @@ class InfoEndpointTest(TestCase):
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertIn("error", data["api_usage"])
+
+
+class LatencyEndpointTest(TestCase):
+    def setUp(self):
+        self.super_uuid = "f8a6b8b8-32f7-4b4d-b6f9-054ab6fb5623"
+        SuperUser.objects.create(accounts_uuid=self.super_uuid, name="Test Super User")
+        hour = rollups.period_start("hour", timezone.now())
+        for status_class, requests in (("2xx", 97), ("5xx", 3)):
+            RequestRollup.objects.create(
+                period="hour",
+                bucket_start=hour,
+                path="/api/v1/books",
+                method="GET",
+                status_class=status_class,
+                auth_type="sso",
+                requests=requests,
+                logged=requests,
+                duration_ms_total=requests * 20,
+                duration_ms_max=80,
+                histogram={str(rollups.bucket_index(20)): requests},
+            )
+
+    @patch("api.auth.get_logged_in_user_uuid", return_value=None)
+    def test_requires_auth(self, mock_uuid):
+        self.assertEqual(self.client.get("/api/v1/info/latency").status_code, 401)
+
+    @patch("api.auth.get_logged_in_user_uuid")
+    def test_latency_report(self, mock_auth_uuid):
+        mock_auth_uuid.return_value = self.super_uuid
+        data = self.client.get("/api/v1/info/latency").json()
+        self.assertEqual(data["count"], 1)
+        books = data["endpoints"][0]
+        self.assertEqual((books["requests"], books["error_rate"], books["mean_ms"]), (100, 0.03, 20))
+        self.assertAlmostEqual(books["p99_ms"], 20, delta=2)
+
+        self.assertEqual(self.client.get("/api/v1/info/latency?auth_type=api_key").json()["count"], 0)
+        self.assertEqual(self.client.get("/api/v1/info/latency?period=week").status_code, 422)
+
+
+class DatabasePoolStatsTest(TestCase):
+    def test_no_pool_configured(self):
+        self.assertEqual(db_pool.stats(), {})
+
+    def test_pool_metrics(self):
+        pool = Mock(min_size=2, max_size=10)
+        pool.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 5,
+            "pool_available": 1,
+            "requests_num": 40,
+            "requests_queued": 4,
+            "requests_wait_ms": 30,
+        }
+        with (
+            patch.dict(connections.settings["default"]["OPTIONS"], {"pool": {"min_size": 2}}),
+            patch.object(type(connections["default"]), "pool", new_callable=PropertyMock, return_value=pool),
+        ):
+            stats = db_pool.stats()["default"]
+        self.assertEqual((stats["size"], stats["in_use"], stats["idle"], stats["overflow"]), (5, 4, 1, 3))
+        self.assertEqual((stats["checkouts"], stats["checkouts_waited"], stats["wait_ms_avg"]), (40, 4, 7.5))
+        self.assertEqual(stats["checkout_timeouts"], 0)